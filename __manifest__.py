@@ -15,8 +15,8 @@
     'author': "Ali&Murtaja",
     'website': "https://www.odoo.com",
     'category': 'Services/Project',  
-    'version': '18.0.1.1.0',
-    'depends': ['base', 'web', 'project', 'portal', 'website', 'queue_job'],
+    'version': '18.0.1.2.0',
+    'depends': ['base', 'web', 'project', 'portal', 'website', 'queue_job', 'bus'],
     'data': [
         'security/ir.model.access.csv',
         'security/rfp_security.xml',
@@ -30,6 +30,8 @@
         'views/res_config_settings_views.xml',
         'views/ai_model_views.xml',
         'views/rfp_ai_log_views.xml',
+        'views/rfp_generation_job_views.xml',
+        'views/rfp_document_export_views.xml',
         'data/queue_data.xml',
         'data/ai_model_data.xml',
         'data/rfp_prompt_data.xml',
@@ -31,6 +31,7 @@ PROMPT_GENERATE_EVAL_CRITERIA = 'generate_eval_criteria'
 PROMPT_ANALYZE_PROPOSAL_CRITERIA = 'analyze_proposal_criteria'
 PROMPT_DOCUMENT_AUTO_FILLER = 'document_auto_filler'
 PROMPT_PROPOSAL_EXTRACTOR = 'proposal_extractor'
+PROMPT_MERMAID_REPAIR = 'mermaid_repair'
 
 # KB Prompts
 PROMPT_KB_STRUCTURE_EXTRACTOR = 'kb_structure_extractor'
@@ -38,6 +39,12 @@ PROMPT_KB_CONTENT_EXTRACTOR = 'kb_content_extractor'
 PROMPT_KB_PROJECT_GENERALIZER = 'kb_project_generalizer'
 PROMPT_KB_SELECTOR = 'kb_selector'
 
+DOCX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+PDF_MIMETYPE = 'application/pdf'
+# Appended to the content key of an export built while a diagram could not be
+# rasterized: it never matches the document key, so the export is not reused.
+INCOMPLETE_EXPORT_SUFFIX = '|incomplete'
+
 # Generation Status
 STATUS_PENDING = 'pending'
 STATUS_QUEUED = 'queued'
@@ -54,3 +61,13 @@ AI_STATUS_RATE_LIMIT = 'rate_limit'
 
 # Default Configuration
 DEFAULT_GEMINI_MODEL = "gemini-1.5-flash"
+
+# Vendor info extraction only needs the opening of a proposal
+PROPOSAL_EXTRACT_MAX_CHARS = 10000
+
+# Queue Job Lanes (channel topology, see data/queue_data.xml)
+CHANNEL_INTERACTIVE = 'root.rfp_interactive'   # a user is waiting on the result
+CHANNEL_BULK = 'root.rfp_generation'           # section content generation
+CHANNEL_IMAGES = 'root.rfp_images'             # diagram / illustration rendering
+CHANNEL_BACKGROUND = 'root.rfp_background'     # follow-up analysis nobody waits for
+CHANNEL_EXPORT = 'root.rfp_export'             # Word / PDF documents built in the background
@@ -1,9 +1,9 @@
 from odoo import http, _, fields
-from odoo.http import request
+from odoo.http import request, content_disposition
 from odoo.addons.portal.controllers.portal import CustomerPortal
 import json
-import base64
 import logging
+from werkzeug.wsgi import wrap_file
 
 _logger = logging.getLogger(__name__)
 from odoo.addons.project_rfp_ai.const import *
@@ -88,6 +88,7 @@ class RfpCustomerPortal(CustomerPortal):
             # If files provided, store the first one in the standard field for compatibility
             has_doc = False
             first_file = None
+            source_data = None
             if uploaded_files and uploaded_files[0].filename:
                 first_file = uploaded_files[0]
                 filename = first_file.filename
@@ -97,24 +98,24 @@ class RfpCustomerPortal(CustomerPortal):
                     'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
                 }
                 if ext in MIME_MAP:
-                    file_data = first_file.read()
+                    source_data = first_file.read()
                     vals.update({
-                        'source_document': base64.b64encode(file_data),
                         'source_filename': filename,
                         'source_mimetype': MIME_MAP[ext],
                     })
-                    first_file.seek(0) # Reset for attachment creation
                     has_doc = True
 
             new_project = Project.create(vals)
-            
+            if source_data:
+                new_project._set_binary_raw('source_document', source_data, mimetype=vals['source_mimetype'])
+
             # Save ALL files as attachments linked to the project
             for f in uploaded_files:
                 if not f.filename:
                     continue
                 request.env['ir.attachment'].sudo().create({
                     'name': f.filename,
-                    'datas': base64.b64encode(f.read()),
+                    'raw': source_data if f is first_file and source_data else f.read(),
                     'res_model': 'rfp.project',
                     'res_id': new_project.id,
                 })
@@ -150,17 +151,16 @@ class RfpCustomerPortal(CustomerPortal):
 
         try:
             file_data = uploaded_file.read()
-            file_b64 = base64.b64encode(file_data)
 
             Project = request.env['rfp.project'].sudo()
             new_project = Project.create({
                 'name': project_name or 'Untitled Upload',
                 'description': f'Imported from: {filename}',
                 'user_id': request.env.user.id,
-                'source_document': file_b64,
                 'source_filename': filename,
                 'source_mimetype': MIME_MAP[ext],
             })
+            new_project._set_binary_raw('source_document', file_data, mimetype=MIME_MAP[ext])
 
             new_project.action_initialize_from_document()
 
@@ -274,14 +274,20 @@ class RfpCustomerPortal(CustomerPortal):
              input_map = {inp.field_key: inp for inp in Project.practice_input_ids}
              stage_action = Project.action_analyze_practices_gap
 
-        # Process Inputs
+        # Process Inputs: collect the values, then write each distinct set once
+        pending_writes = {}
+
+        def queue_write(record, vals):
+            key = tuple(sorted(vals.items()))
+            pending_writes[key] = pending_writes.get(key, record.browse()) | record
+
         for key, inp_record in input_map.items():
             # 1. Custom Answer
             custom_answer_flag = post.get(f"has_custom_answer_{key}")
             if custom_answer_flag == 'true':
                 custom_val = post.get(f"custom_answer_val_{key}")
                 if custom_val:
-                    inp_record.sudo().write({'user_value': custom_val})
+                    queue_write(inp_record, {'user_value': custom_val})
                 continue
             # 2. Irrelevant
             is_irrelevant = post.get(f"is_irrelevant_{key}")
@@ -289,7 +295,7 @@ class RfpCustomerPortal(CustomerPortal):
                 reason = post.get(f"irrelevant_reason_{key}")
                 vals = {'is_irrelevant': True}
                 if reason: vals['irrelevant_reason'] = reason
-                inp_record.sudo().write(vals)
+                queue_write(inp_record, vals)
                 continue
             # 3. Standard
             if key in post:
@@ -299,7 +305,10 @@ class RfpCustomerPortal(CustomerPortal):
                 if specify_key in post and post.get(specify_key):
                      final_value = f"{value}: {post.get(specify_key)}"
                 
-                inp_record.sudo().write({'user_value': final_value})
+                queue_write(inp_record, {'user_value': final_value})
+
+        for vals, records in pending_writes.items():
+            records.sudo().write(dict(vals))
         # Trigger Next Analysis Step
         if stage_action:
             stage_action()
@@ -369,11 +378,25 @@ class RfpCustomerPortal(CustomerPortal):
         
         # Trigger status check to update stage if complete
         Project.action_check_generation_status()
-        
-        # Return progress
-        status_data = Project.get_generation_status()
-        status_data['stage'] = Project.current_stage # Add Stage Info
-        return status_data
+        return Project._get_progress_payload()
+
+    @http.route(['/rfp/progress/<int:project_id>'], type='http', auth="user", methods=['GET'], website=True)
+    def portal_rfp_progress(self, project_id, **kw):
+        """Fallback poll for the progress bar when the bus is unavailable.
+
+        Answers 304 while the project's progress version is unchanged. The
+        poll only reads the counters: pipeline transitions are made by the
+        jobs' completion hook (_advance_pipeline), not by watching browsers.
+        """
+        Project = request.env['rfp.project'].sudo().browse(project_id)
+        if not Project.exists() or Project.user_id != request.env.user:
+            return request.make_json_response({'error': 'Access Denied'}, status=403)
+
+        etag = f'"{Project.id}-{Project.progress_version}"'
+        headers = [('ETag', etag), ('Cache-Control', 'no-cache')]
+        if etag in (request.httprequest.headers.get('If-None-Match') or ''):
+            return request.make_response('', headers=headers, status=304)
+        return request.make_json_response(Project._get_progress_payload(), headers=headers)
 
     # --- GLOSSARY ---
     @http.route(['/rfp/glossary/<int:project_id>'], type='json', auth='user', website=True)
@@ -414,9 +437,18 @@ class RfpCustomerPortal(CustomerPortal):
         values.update({
             'rfp_project': Project,
             'page_name': 'rfp_edit',
+            'stale_sections': Project._get_stale_sections_cached() if Project.current_stage != STAGE_DOCUMENT_LOCKED else {},
         })
         return request.render("project_rfp_ai.portal_rfp_unified_editor", values)
 
+    @http.route(['/rfp/regenerate_stale/<int:project_id>'], type='http', auth="user", methods=['POST'], website=True)
+    def portal_rfp_regenerate_stale(self, project_id, **kw):
+        Project = request.env['rfp.project'].sudo().browse(project_id)
+        if not Project.exists() or Project.user_id != request.env.user:
+            return request.redirect('/my')
+        Project.action_regenerate_stale()
+        return request.redirect(f"/rfp/interface/{Project.id}")
+
     @http.route(['/rfp/unified/save/<int:project_id>'], type='json', auth="user", website=True)
     def portal_rfp_unified_save(self, project_id, structure_data=None, content_data=None, boq_data=None):
         """
@@ -507,20 +539,57 @@ class RfpCustomerPortal(CustomerPortal):
             # Create diagram record using sudo()
             diagram = request.env['rfp.section.diagram'].sudo().create({
                 'section_id': section.id,
-                'image_file': base64.b64encode(image_data),
                 'title': title or image_file.filename,
                 'description': description or 'Uploaded Image'
             })
+            diagram._set_binary_raw('image_file', image_data)
             return json.dumps({
                 'success': True, 
                 'diagram_id': diagram.id, 
                 'image_url': f"/web/image/rfp.section.diagram/{diagram.id}/image_file",
+                'image_srcset': diagram._get_image_srcset(),
+                'view_url': diagram._get_image_view_url(),
                 'title': diagram.title,
                 'description': diagram.description
             })
         except Exception as e:
             return json.dumps({'error': str(e)})
 
+    @http.route(['/rfp/diagram/svg/<int:diagram_id>'], type='http', auth="user", methods=['GET'], website=True)
+    def portal_rfp_diagram_svg(self, diagram_id, **kw):
+        diagram = request.env['rfp.section.diagram'].sudo().browse(diagram_id)
+        if not diagram.exists() or diagram.section_id.project_id.user_id != request.env.user:
+            return request.not_found()
+        return self._svg_response(diagram)
+
+    @http.route(['/rfp/published/diagram/svg/<int:diagram_id>'], type='http', auth="user", methods=['GET'], website=True)
+    def portal_rfp_published_diagram_svg(self, diagram_id, **kw):
+        diagram = request.env['rfp.published.diagram'].sudo().browse(diagram_id)
+        if not diagram.exists() or diagram.section_id.published_id.owner_id != request.env.user:
+            return request.not_found()
+        return self._svg_response(diagram)
+
+    def _svg_response(self, record):
+        """Serve a stored SVG as an image.
+
+        Attachments saved by non-admin users get a text/plain mimetype (Odoo's
+        XSS guard), so the type is set here, with a CSP that blocks scripts.
+        """
+        attachment = record._get_binary_attachment('image_svg')
+        if not attachment:
+            return request.not_found()
+        etag = f'"{attachment.checksum}"'
+        headers = [
+            ('Content-Type', 'image/svg+xml'),
+            ('Content-Security-Policy', "default-src 'none'; style-src 'unsafe-inline'; img-src data:; font-src data:"),
+            ('X-Content-Type-Options', 'nosniff'),
+            ('ETag', etag),
+            ('Cache-Control', 'private, no-cache'),
+        ]
+        if etag in (request.httprequest.headers.get('If-None-Match') or ''):
+            return request.make_response('', headers=headers, status=304)
+        return request.make_response(attachment.raw, headers=headers)
+
     @http.route(['/rfp/diagram/delete/<int:diagram_id>'], type='json', auth="user", website=True)
     def portal_rfp_diagram_delete(self, diagram_id):
         # Use sudo entirely to bypass the restriction, BUT modify the check logic
@@ -535,6 +604,25 @@ class RfpCustomerPortal(CustomerPortal):
             return {'success': True}
         return {'error': 'Diagram not found'}
 
+    # --- SECTION HISTORY ---
+
+    @http.route(['/rfp/section/undo'], type='json', auth="user", website=True)
+    def portal_rfp_section_undo(self, section_id):
+        """Restore the section's previous stored version (no AI call)."""
+        section = request.env['rfp.document.section'].sudo().browse(int(section_id))
+        if not section.exists():
+            return {'error': 'Section not found'}
+        if section.project_id.user_id.id != request.env.user.id:
+            return {'error': 'Permission Denied'}
+        if section.project_id.current_stage == STAGE_DOCUMENT_LOCKED:
+            return {'error': 'Document is locked'}
+
+        revision = section._get_undo_revision()
+        if not revision:
+            return {'error': 'Nothing to undo'}
+        revision.action_restore()
+        return {'success': True, 'revision': revision.revision_no, 'new_content': section.content_html}
+
     # --- AI EDITING ROUTES ---
     
     @http.route(['/rfp/ai/edit/text'], type='json', auth="user", website=True)
@@ -576,7 +664,7 @@ class RfpCustomerPortal(CustomerPortal):
 
             if response:
                 # Update section content
-                section.write({'content_html': response})
+                section.with_context(revision_source='ai_edit').write({'content_html': response})
                 return {'success': True, 'new_content': response}
             else:
                 return {'error': 'AI returned empty response'}
@@ -585,10 +673,12 @@ class RfpCustomerPortal(CustomerPortal):
             return {'error': str(e)}
     
     @http.route(['/rfp/ai/edit/image'], type='json', auth="user", website=True)
-    def portal_rfp_ai_edit_image(self, diagram_id, user_prompt):
-        """Regenerate diagram image with AI based on user prompt."""
-        import base64
+    def portal_rfp_ai_edit_image(self, diagram_id, user_prompt, force_regenerate=False):
+        """Regenerate diagram image with AI based on user prompt.
 
+        An identical earlier request is answered from the illustration cache
+        unless ``force_regenerate`` is set.
+        """
         diagram = request.env['rfp.section.diagram'].sudo().browse(int(diagram_id))
         if not diagram.exists():
             return {'error': 'Diagram not found'}
@@ -613,16 +703,18 @@ class RfpCustomerPortal(CustomerPortal):
             image_bytes = request.env['rfp.ai.log'].sudo().execute_image_request(
                 prompt=full_prompt,
                 env=request.env,
-                prompt_record=prompt_record
+                prompt_record=prompt_record,
+                force=bool(force_regenerate),
             )
 
             if image_bytes:
-                # Convert to base64 and update diagram
-                image_b64 = base64.b64encode(image_bytes).decode('utf-8')
-                diagram.write({'image_file': image_b64})
+                diagram._store_image(image_bytes)
+                cache_buster = f"?t={int(__import__('time').time())}"
                 return {
                     'success': True,
-                    'new_image_url': f"/web/image/rfp.section.diagram/{diagram.id}/image_file?t={int(__import__('time').time())}"
+                    'new_image_url': f"/web/image/rfp.section.diagram/{diagram.id}/image_file{cache_buster}",
+                    'new_image_srcset': diagram._get_image_srcset(query=cache_buster),
+                    'new_view_url': diagram._get_image_view_url() + cache_buster,
                 }
             else:
                 return {'error': 'AI returned empty response'}
@@ -636,70 +728,93 @@ class RfpCustomerPortal(CustomerPortal):
         if not Project.exists() or Project.user_id != request.env.user:
             return request.redirect('/my')
 
-        # Use Zero-Dependency DOCX Generator
-        from odoo.addons.project_rfp_ai.utils.simple_docx import SimpleDocxGenerator
-        
-        docx = SimpleDocxGenerator()
-        
-        # Add Title
-        docx.add_heading(Project.name, 1)
-        docx.add_text("") # spacing
-        
-        # Add Contact Information
-        contact_keys = ['contact_name', 'contact_email', 'contact_phone', 'contact_details']
-        contact_inputs = Project.form_input_ids.filtered(lambda i: i.field_key in contact_keys)
-        
-        if contact_inputs:
-            docx.add_heading("Contact Information", 3)
-            # Sort by intended order? The fields have sequence in DB, but inputs might be created by ID. 
-            # We can just map key to value.
-            input_map = {i.field_key: i.user_value for i in contact_inputs}
-            
-            # Helper to add line if exists
-            def add_contact_line(label, key):
-                val = input_map.get(key)
-                if val:
-                    docx.add_text(f"{label}: {val}")
-            
-            add_contact_line("Name", 'contact_name')
-            add_contact_line("Email", 'contact_email')
-            add_contact_line("Phone", 'contact_phone')
-            add_contact_line("Details", 'contact_details')
-            
-            docx.add_spacer()
-        
-        for section in Project.document_section_ids.sorted('sequence'):
-            docx.add_heading(section.section_title, 2)
-            
-            # Content
-            if section.content_html:
-                docx.add_html_chunk(section.content_html)
-                
-            # Diagrams
-            if section.diagram_ids:
-                docx.add_spacer()
-                
-                for diagram in section.diagram_ids:
-                    # Image
-                    if diagram.image_file:
-                        try:
-                            image_data = base64.b64decode(diagram.image_file)
-                            docx.add_image(image_data)
-                        except Exception as e:
-                            print(f"Error embedding image: {e}")
-                            docx.add_text("[Error embedding image]")
-                            
-                    # Title (Caption) under the image
-                    docx.add_caption(diagram.title)
-                    docx.add_spacer()
-
-        file_content = docx.generate()
-        
+        attachment, key = Project._get_word_export()
         headers = [
-            ('Content-Type', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'),
-            ('Content-Disposition', f'attachment; filename="RFP - {Project.name}.docx"')
+            ('Content-Type', DOCX_MIMETYPE),
+            ('Content-Disposition', f'attachment; filename="RFP - {Project.name}.docx"'),
+            ('Cache-Control', 'private, no-cache'),
         ]
-        return request.make_response(file_content, headers=headers)
+        # A file missing diagrams is not validated: the next download rebuilds it
+        if not key.endswith(INCOMPLETE_EXPORT_SUFFIX):
+            etag = f'"{key}"'
+            headers.append(('ETag', etag))
+            if etag in (request.httprequest.headers.get('If-None-Match') or ''):
+                return request.make_response('', headers=headers, status=304)
+
+        # Stream from the filestore instead of loading the document in memory
+        headers.append(('Content-Length', str(attachment.file_size)))
+        file_obj = Project._open_binary('word_export_file')
+        response = request.make_response(wrap_file(request.httprequest.environ, file_obj), headers=headers)
+        response.direct_passthrough = True
+        return response
+
+    @http.route(['/rfp/download/pdf/<int:project_id>'], type='http', auth="user", website=True)
+    def portal_rfp_download_pdf(self, project_id, **kw):
+        """Server-side PDF, built in the request (the portal only links here below the async threshold)."""
+        Project = request.env['rfp.project'].sudo().browse(project_id)
+        if not Project.exists() or Project.user_id != request.env.user:
+            return request.redirect('/my')
+        return self._export_file_response(request.env['rfp.document.export']._build_now(Project, 'pdf'))
+
+    @http.route(['/rfp/export/request/<int:project_id>'], type='json', auth="user", methods=['POST'])
+    def portal_rfp_export_request(self, project_id, export_format='docx', **kw):
+        """
+        Start a Word / PDF download.
+
+        Small documents (and a Word file that is still current) get a direct
+        download URL. Larger ones are queued: the answer is the export's
+        progress payload, updated over the bus ('rfp_export_progress') and
+        by /rfp/export/status/<id>, whose 'url' is set once the file is ready.
+        """
+        Project = request.env['rfp.project'].sudo().browse(project_id)
+        if not Project.exists() or Project.user_id != request.env.user:
+            return {'error': 'Access denied'}
+        if export_format not in ('docx', 'pdf'):
+            return {'error': 'Unknown export format'}
+
+        Export = request.env['rfp.document.export']
+        if not Export._should_run_async(Project, export_format):
+            route = 'word' if export_format == 'docx' else 'pdf'
+            return {'state': 'direct', 'url': f'/rfp/download/{route}/{Project.id}'}
+        return Export._request(Project, export_format)._get_progress_payload()
+
+    @http.route(['/rfp/export/status/<int:export_id>'], type='json', auth="user")
+    def portal_rfp_export_status(self, export_id, **kw):
+        export = request.env['rfp.document.export'].sudo().browse(export_id)
+        if not export.exists() or export.project_id.user_id != request.env.user:
+            return {'error': 'Access denied'}
+        return export._get_progress_payload()
+
+    @http.route(['/rfp/export/download/<int:export_id>'], type='http', auth="user", website=True)
+    def portal_rfp_export_download(self, export_id, **kw):
+        export = request.env['rfp.document.export'].sudo().browse(export_id)
+        if not export.exists() or export.project_id.user_id != request.env.user:
+            return request.redirect('/my')
+        if export.state != 'done':
+            return request.not_found()
+        return self._export_file_response(export)
+
+    def _export_file_response(self, export):
+        """Stream a finished export from the filestore, with an ETag on its content key if complete."""
+        attachment = export._get_binary_attachment('file')
+        if not attachment:
+            return request.not_found()
+        headers = [
+            ('Content-Type', attachment.mimetype),
+            ('Content-Disposition', content_disposition(export._get_filename())),
+            ('Cache-Control', 'private, no-cache'),
+        ]
+        if not export.content_key.endswith(INCOMPLETE_EXPORT_SUFFIX):
+            etag = f'"{export.export_format}-{export.content_key}"'
+            headers.append(('ETag', etag))
+            if etag in (request.httprequest.headers.get('If-None-Match') or ''):
+                return request.make_response('', headers=headers, status=304)
+
+        headers.append(('Content-Length', str(attachment.file_size)))
+        file_obj = export._open_binary('file')
+        response = request.make_response(wrap_file(request.httprequest.environ, file_obj), headers=headers)
+        response.direct_passthrough = True
+        return response
 
     # ============ EXPORT ROUTES ============
 
@@ -854,7 +969,6 @@ class RfpCustomerPortal(CustomerPortal):
                 methods=['POST'], website=True, csrf=True)
     def portal_rfp_proposal_upload(self, project_id, **post):
         """Client uploads vendor proposal documents for AI analysis."""
-        import base64
         Project = request.env['rfp.project'].sudo().browse(project_id)
 
         # Verify ownership
@@ -888,30 +1002,27 @@ class RfpCustomerPortal(CustomerPortal):
                 f = all_files[file_key]
                 if f.filename:
                     f_bytes = f.read()
-                    f_b64 = base64.b64encode(f_bytes).decode('utf-8')
-                    doc_entries.append({
+                    doc_entries.append(({
                         'required_document_id': doc_type.id,
                         'name': doc_type.name,
-                        'file_data': f_b64,
                         'filename': f.filename,
                         'sequence': doc_type.sequence,
-                    })
+                    }, f_bytes))
                     # Use first PDF/DOCX as main proposal for AI extraction
                     if not main_proposal_file:
                         ext = f.filename.lower().split('.')[-1]
                         if ext in ('pdf', 'docx'):
-                            main_proposal_file = f_b64
+                            main_proposal_file = f_bytes
                             main_proposal_filename = f.filename
 
         # Process the additional/single proposal_file input
         additional_file = all_files.get('proposal_file')
         if additional_file and additional_file.filename:
             add_bytes = additional_file.read()
-            add_b64 = base64.b64encode(add_bytes).decode('utf-8')
             if not main_proposal_file:
                 ext = additional_file.filename.lower().split('.')[-1]
                 if ext in ('pdf', 'docx'):
-                    main_proposal_file = add_b64
+                    main_proposal_file = add_bytes
                     main_proposal_filename = additional_file.filename
                 else:
                     return request.make_json_response({
@@ -920,21 +1031,21 @@ class RfpCustomerPortal(CustomerPortal):
                     })
             # Also store as a document entry if required docs exist
             if required_docs:
-                doc_entries.append({
+                doc_entries.append(({
                     'name': 'Additional Document',
-                    'file_data': add_b64,
                     'filename': additional_file.filename,
                     'sequence': 999,
-                })
+                }, add_bytes))
 
         # Validate we have at least one file
         if not main_proposal_file and not doc_entries:
             return request.make_json_response({'success': False, 'error': 'No files provided'})
 
         # Create proposal record
+        # The file is stored after create, so create() does not queue a
+        # second analysis on top of action_extract_and_analyze() below.
         Proposal = request.env['rfp.proposal'].sudo().create({
             'published_id': Project.published_id.id,
-            'proposal_file': main_proposal_file,
             'proposal_filename': main_proposal_filename or '',
             'company_name': vendor_name or 'Processing...',
             'contact_person': 'Extracting...',
@@ -943,10 +1054,14 @@ class RfpCustomerPortal(CustomerPortal):
             'analysis_status': 'pending',
         })
 
+        if main_proposal_file:
+            Proposal._set_binary_raw('proposal_file', main_proposal_file)
+
         # Create document records
-        for entry in doc_entries:
+        for entry, file_bytes in doc_entries:
             entry['proposal_id'] = Proposal.id
-            request.env['rfp.proposal.document'].sudo().create(entry)
+            doc = request.env['rfp.proposal.document'].sudo().create(entry)
+            doc._set_binary_raw('file_data', file_bytes)
 
         # Trigger AI extraction and analysis
         try:
@@ -0,0 +1,24 @@
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Move the pre-lanes job records, kept by noupdate="1", to the new layout.
+
+    The generation channel used to be named "root.rfp_generation" (so its
+    complete name was "root.root.rfp_generation") and content generation ran
+    on the root channel.
+    """
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    channel = env.ref('project_rfp_ai.channel_rfp_generation', raise_if_not_found=False)
+    if channel:
+        channel.write({
+            'name': 'rfp_generation',
+            'parent_id': env.ref('queue_job.channel_root').id,
+        })
+    job_function = env.ref('project_rfp_ai.job_function_rfp_document_section_generate_content',
+                           raise_if_not_found=False)
+    if job_function and channel:
+        job_function.write({
+            'channel_id': channel.id,
+            'retry_pattern': {1: 60, 2: 180, 3: 300, 4: 300},
+        })
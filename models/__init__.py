@@ -1,3 +1,4 @@
+from . import binary_mixin
 from . import project
 from . import form_input
 from . import res_config_settings
@@ -8,6 +9,7 @@ from . import field_suggestion
 from . import rfp_domain
 from . import ai_model
 from . import rfp_document_section
+from . import rfp_section_revision
 from . import rfp_prompt
 from . import knowledge_base
 from . import kb_section
@@ -19,4 +21,8 @@ from . import rfp_evaluation_criterion
 from . import rfp_required_document
 from . import rfp_proposal_document
 from . import glossary_mixin
-from . import rfp_glossary_term
\ No newline at end of file
+from . import rfp_glossary_term
+from . import ai_file
+from . import generation_job
+from . import render_cache
+from . import document_export
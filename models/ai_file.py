@@ -0,0 +1,147 @@
+from odoo import models, fields, api
+from datetime import timedelta, timezone
+import time
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# A cached reference this close to expiry is re-uploaded rather than risk
+# expiring mid-request.
+EXPIRY_MARGIN = timedelta(hours=1)
+# Retention for stores without a provider-side expiry (OpenAI, local): the
+# autovacuum deletes the remote file once it is reached.
+DEFAULT_FILE_TTL = timedelta(days=30)
+
+
+class RfpAiFile(models.Model):
+    _name = 'rfp.ai.file'
+    _description = 'AI Provider File Reference'
+    _order = 'id desc'
+
+    checksum = fields.Char(string="Attachment Checksum", required=True, index=True, readonly=True,
+        help="SHA1 checksum of the ir.attachment content this reference was uploaded from")
+    provider = fields.Selection([
+        ('google', 'Google Gemini'),
+        ('openai', 'OpenAI'),
+        ('local', 'Local Stand-in'),
+    ], required=True, readonly=True)
+    account_key = fields.Char(string="Account Key", index=True, readonly=True,
+        help="Fingerprint of the API key the file was uploaded with")
+    mime_type = fields.Char(string="MIME Type", readonly=True)
+    file_ref = fields.Char(string="File Reference", required=True, readonly=True,
+        help="URI (Gemini) or file id (OpenAI) passed to the model instead of the bytes")
+    remote_name = fields.Char(string="Remote Name", readonly=True)
+    expires_at = fields.Datetime(string="Expires At", readonly=True)
+    file_size = fields.Integer(string="Size (bytes)", readonly=True)
+    upload_duration = fields.Float(string="Upload Duration (s)", readonly=True)
+
+    @api.model
+    def _get_store_provider(self, provider):
+        """Map the request provider to the file store to use, or None for inline."""
+        mode = self.env['ir.config_parameter'].sudo().get_param('project_rfp_ai.ai_file_store', 'provider')
+        if mode == 'inline':
+            return None
+        return 'local' if mode == 'local' else provider
+
+    @api.model
+    def _find_valid(self, checksum, provider, mime_type, account_key):
+        limit_date = fields.Datetime.now() + EXPIRY_MARGIN
+        # References are shared by all users, like the uploads that create them
+        return self.sudo().search([
+            ('checksum', '=', checksum),
+            ('provider', '=', provider),
+            ('account_key', '=', account_key),
+            ('mime_type', '=', mime_type),
+            ('expires_at', '>', limit_date),
+        ], limit=1)
+
+    @api.model
+    def _get_or_upload(self, attach, provider):
+        """Return a cached reference for this attachment, uploading it on a miss."""
+        from odoo.addons.project_rfp_ai.utils import ai_connector
+
+        account_key = ai_connector._file_store_account(provider, self.env)
+        ref = self._find_valid(attach['checksum'], provider, attach['mime_type'], account_key)
+        if ref and ai_connector._file_ref_available(provider, ref.file_ref):
+            return ref
+
+        data = ai_connector._attachment_bytes(attach['data'])
+        start_time = time.time()
+        result = ai_connector._upload_file(
+            provider, data, attach['mime_type'], self.env, display_name=attach.get('name'))
+        duration = time.time() - start_time
+
+        expires_at = result.get('expires_at')
+        if expires_at and expires_at.tzinfo:
+            expires_at = expires_at.astimezone(timezone.utc).replace(tzinfo=None)
+        if not expires_at:
+            expires_at = fields.Datetime.now() + DEFAULT_FILE_TTL
+
+        _logger.info("Uploaded %s (%d bytes) to %s file store in %.2fs",
+                     attach.get('name') or attach['checksum'], len(data), provider, duration)
+        return self.sudo().create({
+            'checksum': attach['checksum'],
+            'provider': provider,
+            'account_key': account_key,
+            'mime_type': attach['mime_type'],
+            'file_ref': result['file_ref'],
+            'remote_name': result.get('remote_name'),
+            'expires_at': expires_at,
+            'file_size': len(data),
+            'upload_duration': duration,
+        })
+
+    @api.model
+    def _resolve_attachments(self, attachments, provider):
+        """Swap inline attachments for provider file references where possible.
+
+        Only attachments carrying the ``checksum`` of their ir.attachment are
+        eligible. Upload failures are non-fatal: the attachment is sent inline.
+        """
+        from odoo.addons.project_rfp_ai.utils import ai_connector
+
+        store_provider = self._get_store_provider(provider)
+        if not attachments or not store_provider:
+            return attachments
+
+        resolved = []
+        for attach in attachments:
+            if (attach.get('file_ref') or not attach.get('checksum')
+                    or not ai_connector._file_store_supports(store_provider, attach['mime_type'])):
+                resolved.append(attach)
+                continue
+            try:
+                ref = self._get_or_upload(attach, store_provider)
+            except Exception as e:
+                _logger.warning("File upload to %s failed, sending inline: %s", store_provider, e)
+                resolved.append(attach)
+                continue
+            resolved.append({'file_ref': ref.file_ref, 'mime_type': attach['mime_type']})
+        return resolved
+
+    @api.model
+    def _forget(self, file_refs):
+        """Drop cached references the provider no longer resolves."""
+        self.sudo().search([('file_ref', 'in', file_refs)]).unlink()
+
+    @api.autovacuum
+    def _gc_expired_references(self):
+        """Delete expired references and the remote files behind them.
+
+        Gemini removes its files itself at expiry; OpenAI and local files are
+        deleted here. References saved without an expiry date before the
+        retention existed are treated as expired after DEFAULT_FILE_TTL.
+        """
+        from odoo.addons.project_rfp_ai.utils import ai_connector
+
+        now = fields.Datetime.now()
+        expired = self.search([
+            '|', ('expires_at', '<', now),
+            '&', ('expires_at', '=', False), ('create_date', '<', now - DEFAULT_FILE_TTL),
+        ])
+        for ref in expired.filtered(lambda r: r.remote_name and r.provider != 'google'):
+            try:
+                ai_connector._delete_file(ref.provider, ref.remote_name, self.env)
+            except Exception as e:
+                _logger.info("Could not delete %s file %s: %s", ref.provider, ref.remote_name, e)
+        expired.unlink()
@@ -36,6 +36,8 @@ class RfpAiLog(models.Model):
     ], string="Status", default='draft', readonly=True)
     
     error_message = fields.Text(string="Error Message", readonly=True)
+    is_cached = fields.Boolean(string="Served from Cache", readonly=True,
+        help="Answered from the render cache: the provider was not called and nothing was billed")
 
     # Links
     prompt_id = fields.Many2one('rfp.prompt', string="Prompt Used", readonly=True)
@@ -60,7 +62,9 @@ class RfpAiLog(models.Model):
             schema (dict): Optional JSON schema for validation.
             tools (list): Optional list of tools (e.g. Google Search).
             prompt_record (recordset): Optional rfp.prompt record.
-            attachments (list): Optional list of dicts {'data': bytes, 'mime_type': str}.
+            attachments (list): Optional list of dicts {'data': bytes|buffer|file, 'mime_type': str}.
+                Dicts with a 'checksum' (of their ir.attachment) are uploaded
+                once and then sent by reference.
         Returns:
             str: The AI response text (or JSON string).
         """
@@ -97,8 +101,19 @@ class RfpAiLog(models.Model):
             if prompt_record and prompt_record.ai_model_id:
                 provider = prompt_record.ai_model_id.provider or 'google'
 
-            if provider == 'openai':
-                response_text = ai_connector._call_openai_api(
+            def call_api(request_attachments):
+                if provider == 'openai':
+                    return ai_connector._call_openai_api(
+                        system_instructions=system_prompt,
+                        user_content=user_context,
+                        env=env,
+                        response_mime_type=response_mime_type,
+                        response_schema=schema,
+                        model_name=model_name,
+                        tools=tools,
+                        attachments=request_attachments
+                    )
+                return ai_connector._call_gemini_api(
                     system_instructions=system_prompt,
                     user_content=user_context,
                     env=env,
@@ -106,19 +121,25 @@ class RfpAiLog(models.Model):
                     response_schema=schema,
                     model_name=model_name,
                     tools=tools,
-                    attachments=attachments
-                )
-            else:
-                response_text = ai_connector._call_gemini_api(
-                    system_instructions=system_prompt,
-                    user_content=user_context,
-                    env=env,
-                    response_mime_type=response_mime_type,
-                    response_schema=schema,
-                    model_name=model_name,
-                    tools=tools,
-                    attachments=attachments
+                    attachments=request_attachments
                 )
+
+            # Large files are uploaded once per provider and referenced by id
+            inline_attachments = attachments
+            if attachments:
+                attachments = self.env['rfp.ai.file']._resolve_attachments(attachments, provider)
+
+            try:
+                response_text = call_api(attachments)
+            except Exception as e:
+                # A cached reference the provider no longer knows (deleted,
+                # other account): forget it and send the files inline once.
+                file_refs = [a['file_ref'] for a in attachments or [] if a.get('file_ref')]
+                if not file_refs or not ai_connector._is_missing_file_error(e):
+                    raise
+                _logger.warning("Provider rejected file references %s, retrying inline: %s", file_refs, e)
+                self.env['rfp.ai.file']._forget(file_refs)
+                response_text = call_api(inline_attachments)
             
             # Calculate duration
             duration = time.time() - start_time
@@ -163,14 +184,20 @@ class RfpAiLog(models.Model):
 
     @api.model
     @api.model
-    def execute_image_request(self, prompt, env=None, prompt_record=None):
+    def execute_image_request(self, prompt, env=None, prompt_record=None, force=False):
         """
         Execute Image Generation Request.
+
+        Results are kept in rfp.render.cache, keyed by the normalized prompt,
+        the provider and model, and the generation parameters; an identical
+        request returns the cached image without calling the provider unless
+        ``force`` is set.
         """
         from odoo.addons.project_rfp_ai.utils import ai_connector
         
         if not env:
             env = self.env
+        Cache = env['rfp.render.cache']
             
         vals = {
             'prompt_used': prompt,
@@ -187,15 +214,30 @@ class RfpAiLog(models.Model):
                 vals['ai_model_id'] = prompt_record.ai_model_id.id
                 model_name = prompt_record.ai_model_id.technical_name
 
+        # Determine provider from the model record
+        provider = 'google'  # default
+        if prompt_record and prompt_record.ai_model_id:
+            provider = prompt_record.ai_model_id.provider or 'google'
+
+        cache_key = Cache._illustration_key(prompt, provider, model_name,
+                                            ai_connector.IMAGE_GENERATION_PARAMS.get(provider, {}))
+        if not force:
+            cached = Cache._lookup(cache_key)
+            if cached:
+                _logger.info("Illustration cache hit %s (%s)", cache_key[:12], model_name)
+                self.create(dict(vals, **{
+                    'response_raw': '[CACHED IMAGE]',
+                    'response_date': fields.Datetime.now(),
+                    'duration': 0.0,
+                    'state': AI_STATUS_SUCCESS,
+                    'is_cached': True,
+                }))
+                return cached
+
         log = self.create(vals)
         start_time = time.time()
         
         try:
-            # Determine provider from the model record
-            provider = 'google'  # default
-            if prompt_record and prompt_record.ai_model_id:
-                provider = prompt_record.ai_model_id.provider or 'google'
-
             if provider == 'openai':
                 image_bytes = ai_connector._generate_image_openai(prompt, env, model_name=model_name)
             else:
@@ -210,6 +252,7 @@ class RfpAiLog(models.Model):
                     'duration': duration,
                     'state': AI_STATUS_SUCCESS
                 })
+                Cache._store(cache_key, 'illustration', image_bytes, duration=duration, replace=force)
                 return image_bytes
             else:
                 log.write({
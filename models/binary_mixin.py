@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+import base64
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+
+from odoo import models
+
+# Read size when hashing and copying files into the filestore.
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class RfpBinaryMixin(models.AbstractModel):
+    """Raw access to ``attachment=True`` binary fields.
+
+    Reading ``record.field`` returns the whole file base64-encoded, and
+    writing it expects base64 back, so every hop copies the file at 4/3 of
+    its size. These helpers go through the backing ir.attachment instead and
+    read/write bytes straight from/to the filestore.
+    """
+    _name = 'rfp.binary.mixin'
+    _description = 'Raw Binary Field Access'
+
+    def _get_binary_attachment(self, field_name):
+        self.ensure_one()
+        if not self.id:
+            return self.env['ir.attachment']
+        return self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', field_name),
+            ('res_id', '=', self.id),
+        ], limit=1)
+
+    def _get_binary_attachments(self, field_name):
+        """Backing attachments of the whole recordset in one query, by record id."""
+        if not self.ids:
+            return {}
+        attachments = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', field_name),
+            ('res_id', 'in', self.ids),
+        ])
+        return {attachment.res_id: attachment for attachment in attachments}
+
+    def _has_binary(self, field_name):
+        """Whether the field holds a file, without loading its content."""
+        self.ensure_one()
+        return bool(self.with_context(bin_size=True)[field_name])
+
+    def _get_binary_raw(self, field_name):
+        """Return the field content as bytes (b'' if empty)."""
+        attachment = self._get_binary_attachment(field_name)
+        if attachment:
+            return attachment.raw or b''
+        # Unsaved record or value only held in cache
+        value = self[field_name]
+        return base64.b64decode(value) if value else b''
+
+    def _open_binary(self, field_name):
+        """Return a readable binary file object over the field content."""
+        attachment = self._get_binary_attachment(field_name)
+        if attachment and attachment.store_fname:
+            return open(attachment._full_path(attachment.store_fname), 'rb')
+        return io.BytesIO(self._get_binary_raw(field_name))
+
+    def _set_binary_raw(self, field_name, data, mimetype=None, touch_owner=True):
+        """Store raw bytes in the field without a base64 round-trip.
+
+        The backing attachment is written directly; the owner then goes
+        through write() with no values, so its write_date is bumped, write()
+        overrides run and fields depending on the binary are recomputed as
+        after a regular field write.
+
+        Args:
+            touch_owner: False leaves the owner row alone, for rows other
+                transactions update while this one runs (an export's state
+                is published from separate cursors).
+        Returns:
+            ir.attachment: The backing attachment (empty if cleared).
+        """
+        self.ensure_one()
+        if not data:
+            self.write({field_name: False})
+            return self.env['ir.attachment']
+        self.check_access('write')
+        vals = {'raw': data}
+        if mimetype:
+            vals['mimetype'] = mimetype
+        attachment = self._write_binary_attachment(field_name, vals)
+        self._binary_written(field_name, touch_owner)
+        return attachment
+
+    def _set_binary_file(self, field_name, file_obj, mimetype=None, touch_owner=True):
+        """Like _set_binary_raw, from a readable, seekable binary file.
+
+        The file is hashed and copied into the filestore in chunks instead of
+        being loaded in memory (a file already stored is not copied again).
+        With database attachment storage it is read whole.
+        """
+        self.ensure_one()
+        Attachment = self.env['ir.attachment'].sudo()
+        if Attachment._storage() != 'file':
+            return self._set_binary_raw(field_name, file_obj.read(), mimetype=mimetype, touch_owner=touch_owner)
+        self.check_access('write')
+
+        sha, size = hashlib.sha1(), 0
+        for chunk in iter(lambda: file_obj.read(COPY_CHUNK_SIZE), b''):
+            sha.update(chunk)
+            size += len(chunk)
+        if not size:
+            return self._set_binary_raw(field_name, b'', touch_owner=touch_owner)
+        checksum = sha.hexdigest()
+        fname = f"{checksum[:2]}/{checksum}"
+        full_path = Attachment._full_path(fname)
+        if not os.path.isfile(full_path):
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            file_obj.seek(0)
+            with tempfile.NamedTemporaryFile(dir=os.path.dirname(full_path), delete=False) as tmp_file:
+                shutil.copyfileobj(file_obj, tmp_file, COPY_CHUNK_SIZE)
+            os.replace(tmp_file.name, full_path)
+        # Collected if this transaction rolls back, like ir.attachment's own writes
+        Attachment._mark_for_gc(fname)
+
+        attachment = self._write_binary_attachment(field_name, {'mimetype': mimetype} if mimetype else {})
+        old_fname = attachment.store_fname
+        # ir.attachment computes these from the content and ignores them in create/write
+        self.env.cr.execute("""
+            UPDATE ir_attachment
+               SET store_fname = %s, checksum = %s, file_size = %s, db_datas = NULL
+             WHERE id = %s
+        """, (fname, checksum, size, attachment.id))
+        attachment.invalidate_recordset(['store_fname', 'checksum', 'file_size', 'db_datas', 'raw', 'datas'])
+        if old_fname and old_fname != fname:
+            Attachment._file_delete(old_fname)
+        self._binary_written(field_name, touch_owner)
+        return attachment
+
+    def _write_binary_attachment(self, field_name, vals):
+        attachment = self._get_binary_attachment(field_name)
+        if attachment:
+            if vals:
+                attachment.write(vals)
+            return attachment
+        return self.env['ir.attachment'].sudo().create(dict(vals, **{
+            'name': field_name,
+            'res_model': self._name,
+            'res_field': field_name,
+            'res_id': self.id,
+            'type': 'binary',
+        }))
+
+    def _binary_written(self, field_name, touch_owner):
+        self.invalidate_recordset([field_name])
+        if touch_owner:
+            self.modified([field_name])
+            self.write({})
@@ -0,0 +1,265 @@
+from odoo import models, fields, api, SUPERUSER_ID
+from datetime import timedelta
+import functools
+import logging
+from odoo.addons.project_rfp_ai.const import CHANNEL_EXPORT, DOCX_MIMETYPE, INCOMPLETE_EXPORT_SUFFIX, PDF_MIMETYPE
+
+_logger = logging.getLogger(__name__)
+
+# Above either threshold the portal builds the export in a background job
+# instead of the HTTP worker.
+ASYNC_SECTIONS_PARAM = 'project_rfp_ai.export_async_sections'
+ASYNC_SIZE_PARAM = 'project_rfp_ai.export_async_size_mb'
+DEFAULT_ASYNC_SECTIONS = 40
+DEFAULT_ASYNC_SIZE_MB = 20
+# Finished exports stay downloadable this long, then the autovacuum removes them.
+EXPORT_MAX_AGE = timedelta(days=7)
+# Progress is published at most once per this many percent.
+PROGRESS_STEP = 5
+# export_format: (mimetype, file extension)
+EXPORT_FORMATS = {
+    'docx': (DOCX_MIMETYPE, 'docx'),
+    'pdf': (PDF_MIMETYPE, 'pdf'),
+}
+ACTIVE_STATES = ('queued', 'running')
+# queue.job states after which a queued/running export will never finish.
+DEAD_JOB_STATES = ('done', 'failed', 'cancelled')
+
+
+def _publish_export_state(registry, export_id, vals):
+    """Write export state in its own short transaction and push it to the requester."""
+    try:
+        with registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            export = env['rfp.document.export'].browse(export_id).exists()
+            if export:
+                export.write(vals)
+                export._push_progress()
+    except Exception as e:
+        _logger.warning("Could not publish the state of export %s: %s", export_id, e)
+
+
+class RfpDocumentExport(models.Model):
+    """A Word or PDF export of an RFP document, built by a queue job.
+
+    Image-heavy documents take too long to build in an HTTP worker, so the
+    portal queues an export, follows it over the bus (``rfp_export_progress``)
+    and downloads the stored file when it is done. Exports carry the
+    document content key (rfp.project._get_export_key): a request for an
+    unchanged document reuses the finished or still running export.
+
+    The job never writes its own export row. State and progress are written
+    from short separate transactions so the browser sees them while the job
+    runs, and the final state is written once the job has committed the file.
+    """
+    _name = 'rfp.document.export'
+    _description = 'RFP Document Export'
+    _inherit = ['rfp.binary.mixin']
+    _order = 'id desc'
+
+    project_id = fields.Many2one('rfp.project', string="Project", required=True, index=True,
+                                 ondelete='cascade', readonly=True)
+    user_id = fields.Many2one('res.users', string="Requested By", readonly=True)
+    export_format = fields.Selection([
+        ('docx', 'Word'),
+        ('pdf', 'PDF'),
+    ], string="Format", required=True, readonly=True)
+    content_key = fields.Char(string="Content Key", index=True, readonly=True)
+    state = fields.Selection([
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string="Status", default='queued', required=True, readonly=True)
+    progress = fields.Integer(string="Progress (%)", readonly=True)
+    file = fields.Binary(string="File", attachment=True, readonly=True)
+    file_size = fields.Integer(string="Size (bytes)", readonly=True)
+    error = fields.Text(string="Error", readonly=True)
+    job_id = fields.Many2one('queue.job', string="Queue Job", readonly=True, ondelete='set null')
+    date_done = fields.Datetime(string="Finished At", readonly=True)
+
+    @api.model
+    def _should_run_async(self, project, export_format):
+        """
+        Whether an export of ``project`` is too large to build inside the request.
+
+        A Word export whose stored file is still current is served directly.
+        Otherwise the export goes to a job once the document has more sections
+        than the Async Export Sections setting, or its content and images
+        exceed Async Export Size.
+        """
+        if export_format == 'docx' \
+                and project._get_binary_attachment('word_export_file').description == project._get_export_key():
+            return False
+        ICP = self.env['ir.config_parameter'].sudo()
+        max_sections = int(ICP.get_param(ASYNC_SECTIONS_PARAM, DEFAULT_ASYNC_SECTIONS) or 0)
+        max_size_mb = float(ICP.get_param(ASYNC_SIZE_PARAM, DEFAULT_ASYNC_SIZE_MB) or 0)
+
+        self.env['rfp.document.section'].flush_model(['project_id', 'content_html'])
+        self.env['rfp.section.diagram'].flush_model(['section_id'])
+        self.env['ir.attachment'].flush_model(['res_model', 'res_field', 'res_id', 'file_size'])
+        self.env.cr.execute("""
+            SELECT count(*), COALESCE(sum(octet_length(s.content_html)), 0),
+                   (SELECT COALESCE(sum(a.file_size), 0)
+                      FROM rfp_section_diagram d
+                      JOIN rfp_document_section ds ON ds.id = d.section_id
+                      JOIN ir_attachment a ON a.res_model = 'rfp.section.diagram'
+                                          AND a.res_field IN ('image_file', 'image_svg')
+                                          AND a.res_id = d.id
+                     WHERE ds.project_id = %(project_id)s)
+              FROM rfp_document_section s
+             WHERE s.project_id = %(project_id)s
+        """, {'project_id': project.id})
+        sections, content_size, image_size = self.env.cr.fetchone()
+        if max_sections and sections > max_sections:
+            return True
+        return bool(max_size_mb and content_size + image_size > max_size_mb * 1024 * 1024)
+
+    @api.model
+    def _find_current(self, project, export_format, key, states=ACTIVE_STATES + ('done',)):
+        """Export of ``project`` with content ``key``, in one of ``states``, or an empty recordset."""
+        exports = self.sudo().search([
+            ('project_id', '=', project.id),
+            ('export_format', '=', export_format),
+            ('content_key', '=', key),
+            ('state', 'in', states),
+        ])
+        # An export whose job died without reporting back is not waited on
+        return exports.filtered(
+            lambda e: e.state == 'done' or not e.job_id or e.job_id.state not in DEAD_JOB_STATES)[:1]
+
+    @api.model
+    def _create_for(self, project, export_format, key):
+        return self.sudo().create({
+            'project_id': project.id,
+            'user_id': self.env.user.id,
+            'export_format': export_format,
+            'content_key': key,
+        })
+
+    @api.model
+    def _request(self, project, export_format):
+        """Current export of ``project`` in this format, queuing a new one if needed."""
+        key = project._get_export_key()
+        export = self._find_current(project, export_format, key)
+        if export:
+            return export
+        export = self._create_for(project, export_format, key)
+        label = dict(self._fields['export_format'].selection)[export_format]
+        export.job_id = self.env['rfp.generation.job']._enqueue(
+            export, 'build_export_job', project=project, channel=CHANNEL_EXPORT,
+            description=f"{label} export: {project.name}")
+        return export
+
+    @api.model
+    def _build_now(self, project, export_format):
+        """Current finished export of ``project``, built inside this transaction if needed."""
+        key = project._get_export_key()
+        export = self._find_current(project, export_format, key, states=('done',))
+        if export:
+            return export
+        export = self._create_for(project, export_format, key)
+        vals = export._build()
+        export.write(dict(vals, state='done', progress=100, date_done=fields.Datetime.now()))
+        return export
+
+    def _build(self, progress=None):
+        """Build the file and attach it.
+
+        An export missing a diagram image that could not be rasterized gets
+        a content key ending in INCOMPLETE_EXPORT_SUFFIX, so it is not reused.
+
+        Args:
+            progress: Optional callable(done, total) for long builds.
+        Returns:
+            dict: file_size and content_key to write on the export
+        """
+        self.ensure_one()
+        project = self.project_id
+        mimetype = EXPORT_FORMATS[self.export_format][0]
+        # The job never writes its own row (state is published from separate
+        # cursors), so the file is attached without touching the export.
+        if self.export_format == 'docx':
+            # Goes through the project's stored Word file, so the synchronous
+            # download route reuses what the job built. Both files share the
+            # same filestore entry, which is streamed rather than read whole.
+            _attachment, key = project._get_word_export(progress=progress)
+            with project._open_binary('word_export_file') as file_obj:
+                attachment = self._set_binary_file('file', file_obj, mimetype=mimetype, touch_owner=False)
+        else:
+            if progress:
+                progress(1, 10)
+            key = project._get_export_key()
+            if project._rasterize_diagrams():
+                key += INCOMPLETE_EXPORT_SUFFIX
+            data, _report_type = self.env['ir.actions.report']._render_qweb_pdf(
+                'project_rfp_ai.action_report_rfp_document', res_ids=project.ids)
+            if progress:
+                progress(9, 10)
+            attachment = self._set_binary_raw('file', data, mimetype=mimetype, touch_owner=False)
+        return {'file_size': attachment.file_size, 'content_key': key}
+
+    def build_export_job(self):
+        """Queue job: build the file, publishing progress over the bus."""
+        # Portal owners have no access to the model; the request was checked when queued
+        export = self.sudo()
+        export.ensure_one()
+        if export.state == 'done':
+            return
+        registry = self.env.registry
+        _publish_export_state(registry, export.id, {'state': 'running', 'progress': 0, 'error': False})
+        try:
+            vals = export._build(progress=export._progress_callback())
+        except Exception as e:
+            _logger.exception("Export %s of project %s failed", export.id, export.project_id.id)
+            _publish_export_state(registry, export.id, {'state': 'failed', 'error': str(e)})
+            return
+        # Announce the download only once the file is committed
+        self.env.cr.postcommit.add(functools.partial(_publish_export_state, registry, export.id, dict(
+            vals, state='done', progress=100, date_done=fields.Datetime.now())))
+
+    def _progress_callback(self):
+        """callable(done, total) publishing progress in PROGRESS_STEP increments."""
+        registry, export_id = self.env.registry, self.id
+        last_percent = 0
+
+        def progress(done, total):
+            nonlocal last_percent
+            percent = min(99, done * 100 // total) if total else 0
+            if percent - last_percent >= PROGRESS_STEP:
+                last_percent = percent
+                _publish_export_state(registry, export_id, {'progress': percent})
+        return progress
+
+    def _get_filename(self):
+        self.ensure_one()
+        return f"RFP - {self.project_id.name}.{EXPORT_FORMATS[self.export_format][1]}"
+
+    def _get_download_url(self):
+        self.ensure_one()
+        return f"/rfp/export/download/{self.id}"
+
+    def _get_progress_payload(self):
+        self.ensure_one()
+        return {
+            'export_id': self.id,
+            'project_id': self.project_id.id,
+            'export_format': self.export_format,
+            'state': self.state,
+            'progress': self.progress,
+            'error': self.error or False,
+            'url': self._get_download_url() if self.state == 'done' else False,
+        }
+
+    def _push_progress(self):
+        for export in self:
+            partner = (export.user_id or export.project_id.user_id).partner_id
+            if partner:
+                self.env['bus.bus']._sendone(partner, 'rfp_export_progress', export._get_progress_payload())
+
+    @api.autovacuum
+    def _gc_old_exports(self):
+        old = self.sudo().search([('create_date', '<', fields.Datetime.now() - EXPORT_MAX_AGE)])
+        if old:
+            _logger.info("Removing %d old document exports", len(old))
+            old.unlink()
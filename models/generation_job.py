@@ -0,0 +1,276 @@
+from odoo import models, fields, api, SUPERUSER_ID
+from odoo.osv import expression
+from odoo.tools import escape_psql
+from odoo.service.model import PG_CONCURRENCY_ERRORS_TO_RETRY
+from psycopg2 import OperationalError
+import functools
+import hashlib
+import json
+import logging
+import random
+import time
+from odoo.addons.project_rfp_ai.const import (
+    CHANNEL_BACKGROUND, CHANNEL_BULK, CHANNEL_EXPORT, CHANNEL_IMAGES, CHANNEL_INTERACTIVE,
+)
+
+_logger = logging.getLogger(__name__)
+
+# queue_job runs lower priorities first; fair-share priorities start here
+# and grow with the owner's backlog.
+FAIR_SHARE_BASE_PRIORITY = 10
+FAIR_SHARE_MAX_PRIORITY = 999
+PENDING_JOB_STATES = ('wait_dependencies', 'pending', 'enqueued', 'started')
+# Jobs in these states have not started and can be coalesced or superseded.
+COALESCE_JOB_STATES = ('wait_dependencies', 'pending', 'enqueued')
+# Lane urgency, lower is more urgent. A request coalesced into a pending job
+# on a less urgent lane moves that job to the requested lane.
+CHANNEL_URGENCY = {
+    CHANNEL_INTERACTIVE: 0,
+    CHANNEL_BULK: 1,
+    CHANNEL_IMAGES: 1,
+    CHANNEL_EXPORT: 1,
+    CHANNEL_BACKGROUND: 2,
+}
+# Job methods whose completion updates the project progress counters.
+PROGRESS_JOB_METHODS = ('generate_content_job', 'generate_image_job', 'render_diagrams_job')
+FINISHED_JOB_STATES = ('done', 'failed')
+# Attempts to recount progress when the project row is being written concurrently.
+PROGRESS_SYNC_ATTEMPTS = 5
+
+
+def _sync_progress_after_commit(registry, project_ids):
+    """Recount project progress in a fresh transaction, retrying on write conflicts."""
+    for attempt in range(1, PROGRESS_SYNC_ATTEMPTS + 1):
+        try:
+            with registry.cursor() as cr:
+                env = api.Environment(cr, SUPERUSER_ID, {})
+                env['rfp.project'].browse(project_ids).exists()._sync_generation_counters()
+            return
+        except OperationalError as e:
+            if e.pgcode not in PG_CONCURRENCY_ERRORS_TO_RETRY or attempt == PROGRESS_SYNC_ATTEMPTS:
+                _logger.warning("Could not update generation progress of projects %s: %s", project_ids, e)
+                return
+            time.sleep(random.uniform(0.05, 0.2) * attempt)
+
+
+class RfpGenerationJob(models.Model):
+    """One row per AI job queued through the fair-share dispatcher.
+
+    The row links the queue.job to the project and owner it runs for, so
+    pending backlogs can be counted per owner/project and queue wait times
+    can be reviewed afterwards.
+    """
+    _name = 'rfp.generation.job'
+    _description = 'AI Generation Job (Fair Share)'
+    _order = 'id desc'
+
+    job_id = fields.Many2one('queue.job', string="Queue Job", required=True, index=True, ondelete='cascade', readonly=True)
+    project_id = fields.Many2one('rfp.project', string="Project", index=True, ondelete='cascade', readonly=True)
+    user_id = fields.Many2one('res.users', string="Owner", index=True, readonly=True)
+    method_name = fields.Char(string="Method", readonly=True)
+    fair_priority = fields.Integer(string="Assigned Priority", readonly=True)
+    job_state = fields.Selection(related='job_id.state', store=True, index=True, string="Job State")
+    date_enqueued = fields.Datetime(string="Enqueued At", readonly=True)
+    date_started = fields.Datetime(related='job_id.date_started', store=True, string="Started At")
+    wait_seconds = fields.Float(string="Queue Wait (s)", compute='_compute_wait_seconds', store=True,
+                                aggregator='avg')
+    coalesced_count = fields.Integer(string="Coalesced Requests", default=0, readonly=True, aggregator='sum',
+                                     help="Identical enqueue requests folded into this job while it was pending")
+    superseded = fields.Boolean(string="Superseded", readonly=True,
+                                help="Cancelled before starting because a newer request for the same record arrived")
+
+    @api.depends('date_enqueued', 'date_started')
+    def _compute_wait_seconds(self):
+        for rec in self:
+            if rec.date_enqueued and rec.date_started:
+                rec.wait_seconds = (rec.date_started - rec.date_enqueued).total_seconds()
+            else:
+                rec.wait_seconds = 0.0
+
+    @api.model
+    def _get_user_weight(self, user):
+        """Largest fair-share weight among the user's groups (default 1).
+
+        Configured as JSON in ``project_rfp_ai.fair_share_group_weights``,
+        e.g. ``{"base.group_system": 2}``.
+        """
+        raw = self.env['ir.config_parameter'].sudo().get_param('project_rfp_ai.fair_share_group_weights') or '{}'
+        try:
+            group_weights = json.loads(raw)
+        except (TypeError, ValueError):
+            _logger.warning("Invalid project_rfp_ai.fair_share_group_weights: %s", raw)
+            return 1.0
+        weight = 1.0
+        for xmlid, group_weight in group_weights.items():
+            try:
+                if float(group_weight) > weight and user.has_group(xmlid):
+                    weight = float(group_weight)
+            except (TypeError, ValueError):
+                continue
+        return weight
+
+    @api.model
+    def _get_backlog(self, user, project):
+        """Return (pending jobs of this project, owner's projects with pending jobs)."""
+        groups = self.sudo()._read_group(
+            [('user_id', '=', user.id), ('job_state', 'in', PENDING_JOB_STATES)],
+            groupby=['project_id'], aggregates=['__count'])
+        counts = {group_project.id: count for group_project, count in groups}
+        active_projects = len(set(counts) | {project.id if project else False})
+        return counts.get(project.id if project else False, 0), active_projects
+
+    @api.model
+    def _job_identity(self, record, method_name, kwargs):
+        """Return (record key, identity key) for a job call.
+
+        The record key names the target (model, ids, method); the identity key
+        adds a hash of the arguments and is what queue_job deduplicates on.
+        """
+        record_key = f"{record._name},{'-'.join(map(str, record.ids))}.{method_name}"
+        args_hash = hashlib.sha1(
+            json.dumps(kwargs or {}, sort_keys=True, default=str).encode()).hexdigest()[:16]
+        return record_key, f"{record_key}|{args_hash}"
+
+    @api.model
+    def _find_queued_jobs(self, record_keys):
+        """Not-yet-started jobs of the given record keys, grouped by record key."""
+        if not record_keys:
+            return {}
+        key_domains = [[('identity_key', '=like', escape_psql(key) + '|%')] for key in set(record_keys)]
+        queued = {}
+        for job in self.env['queue.job'].sudo().search(
+                expression.AND([[('state', 'in', COALESCE_JOB_STATES)], expression.OR(key_domains)])):
+            record_key = job.identity_key.split('|', 1)[0]
+            queued[record_key] = queued.get(record_key, self.env['queue.job'].sudo()) | job
+        return queued
+
+    @api.model
+    def _promote_job(self, job, channel, priority):
+        """Move a pending job to a more urgent lane (and priority) when a caller asks for one."""
+        current = CHANNEL_URGENCY.get(job.channel, 1)
+        if CHANNEL_URGENCY.get(channel, 1) >= current:
+            return
+        _logger.info("Moving pending %s job %s from %s to %s", job.method_name, job.uuid, job.channel, channel)
+        job.write({'channel': channel, 'priority': min(job.priority, priority)})
+
+    @api.model
+    def _enqueue_batch(self, calls, project=None, user=None, channel=CHANNEL_BULK, **delay_kwargs):
+        """Queue AI jobs with fair-share priorities.
+
+        Priorities follow stride scheduling: the n-th pending job of a project
+        gets ``base + n * owner_active_projects / owner_weight``. Jobs of
+        different owners therefore interleave round-robin, an owner's
+        projects split that owner's share, and a newly started project is
+        not stuck behind another user's long backlog.
+
+        Every job gets an identity key. A call identical to a job that has
+        not started yet is coalesced into it (no new job, counted in
+        ``coalesced_count``), and moves it to ``channel`` if that lane is
+        more urgent (e.g. a user's refresh joining a pending background
+        run); a call for the same record and method with different
+        arguments supersedes it (the stale job is cancelled).
+
+        Args:
+            calls: list of (record, method_name, kwargs) tuples.
+            project: rfp.project the jobs belong to (optional).
+            user: Owner used for fairness; defaults to the project owner,
+                then the current user.
+            channel: queue_job channel (lane), see CHANNEL_* in const.py.
+            delay_kwargs: Extra ``with_delay`` options (description, eta...).
+        Returns:
+            list: The queue.job records, one per call.
+        """
+        if not calls:
+            return []
+        user = user or (project.user_id if project else None) or self.env.user
+        weight = self._get_user_weight(user)
+        pending, active_projects = self._get_backlog(user, project)
+        stride = active_projects / weight
+
+        identities = [self._job_identity(record, method_name, kwargs) for record, method_name, kwargs in calls]
+        queued_by_key = self._find_queued_jobs([record_key for record_key, _identity_key in identities])
+        jobs = []
+        rows = []
+        index = 0
+        for (record, method_name, kwargs), (record_key, identity_key) in zip(calls, identities):
+            priority = int(FAIR_SHARE_BASE_PRIORITY + (pending + index) * stride)
+            priority = min(priority, FAIR_SHARE_MAX_PRIORITY)
+            queued = queued_by_key.get(record_key)
+            if queued:
+                same = queued.filtered(lambda j: j.identity_key == identity_key)[:1]
+                if same:
+                    self._record_coalesced(same)
+                    self._promote_job(same, channel, priority)
+                    jobs.append(same)
+                    continue
+                _logger.info("Superseding %d pending %s job(s) for %s", len(queued), method_name, record_key)
+                self.sudo().search([('job_id', 'in', queued.ids)]).write({'superseded': True})
+                queued.button_cancelled()
+
+            index += 1
+            delayed = getattr(record.with_delay(
+                channel=channel, priority=priority, identity_key=identity_key, **delay_kwargs), method_name)
+            job = delayed(**(kwargs or {}))
+            job_record = job.db_record() if job and hasattr(job, 'db_record') else self.env['queue.job']
+            jobs.append(job_record)
+            if job_record:
+                rows.append({
+                    'job_id': job_record.id,
+                    'project_id': project.id if project else False,
+                    'user_id': user.id,
+                    'method_name': method_name,
+                    'fair_priority': priority,
+                    'date_enqueued': job_record.date_created,
+                })
+        if rows:
+            self.sudo().create(rows)
+        return jobs
+
+    @api.model
+    def _record_coalesced(self, job):
+        ledger = self.sudo().search([('job_id', '=', job.id)], limit=1)
+        if ledger:
+            self.env.cr.execute(
+                "UPDATE rfp_generation_job SET coalesced_count = COALESCE(coalesced_count, 0) + 1 WHERE id = %s", (ledger.id,))
+            ledger.invalidate_recordset(['coalesced_count'])
+        _logger.info("Coalesced duplicate %s request into pending job %s", job.method_name, job.uuid)
+
+    @api.model
+    def _enqueue(self, record, method_name, project=None, user=None, channel=CHANNEL_BULK, **kwargs):
+        """Single-job shortcut for :meth:`_enqueue_batch`; ``kwargs`` go to the job method."""
+        delay_kwargs = {key: kwargs.pop(key) for key in ('description', 'eta', 'max_retries')
+                        if key in kwargs}
+        return self._enqueue_batch([(record, method_name, kwargs)], project=project, user=user,
+                                   channel=channel, **delay_kwargs)[0]
+
+    @api.model
+    def _on_job_state_change(self, jobs, old_states):
+        """Recount the projects whose jobs finished (or were requeued) once committed.
+
+        The recount runs after commit in its own short transaction: jobs
+        finishing together would otherwise all update the project row in
+        their long job transactions and fail with serialization errors.
+        """
+        changed = jobs.filtered(
+            lambda job: job.state != old_states.get(job.id)
+            and (job.state in FINISHED_JOB_STATES or old_states.get(job.id) in FINISHED_JOB_STATES))
+        if not changed:
+            return
+        project_ids = self.sudo().search([('job_id', 'in', changed.ids)]).project_id.ids
+        if project_ids:
+            self.env.cr.postcommit.add(
+                functools.partial(_sync_progress_after_commit, self.env.registry, project_ids))
+
+
+class QueueJob(models.Model):
+    _inherit = 'queue.job'
+
+    def write(self, vals):
+        if 'state' not in vals:
+            return super().write(vals)
+        tracked = self.filtered(lambda job: job.method_name in PROGRESS_JOB_METHODS)
+        old_states = {job.id: job.state for job in tracked}
+        res = super().write(vals)
+        if tracked:
+            self.env['rfp.generation.job']._on_job_state_change(tracked, old_states)
+        return res
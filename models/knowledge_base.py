@@ -3,8 +3,9 @@ from odoo.addons.project_rfp_ai.const import (
     PROMPT_KB_STRUCTURE_EXTRACTOR,
     PROMPT_KB_CONTENT_EXTRACTOR,
     PROMPT_KB_PROJECT_GENERALIZER,
+    CHANNEL_INTERACTIVE,
 )
-import base64
+from odoo.addons.project_rfp_ai.utils.concurrency import generation_slot
 import json
 import logging
 
@@ -14,7 +15,7 @@ _logger = logging.getLogger(__name__)
 class RfpKnowledgeBase(models.Model):
     _name = 'rfp.knowledge.base'
     _description = 'RFP Knowledge Base'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'rfp.binary.mixin']
 
     name = fields.Char(required=True, tracking=True)
     domain_id = fields.Many2one('rfp.project.domain', string="Domain", tracking=True)
@@ -66,10 +67,9 @@ class RfpKnowledgeBase(models.Model):
         self.state = 'analyzing'
         # Clear old sections if re-analyzing
         self.section_ids.unlink()
-        self.with_delay(
-            channel='root.rfp_generation',
-            description=f"KB Analysis: {self.name}"
-        )._run_analysis_job()
+        self.env['rfp.generation.job']._enqueue(
+            self, '_run_analysis_job', channel=CHANNEL_INTERACTIVE,
+            description=f"KB Analysis: {self.name}")
 
     def action_view_sections(self):
         """Open the list of sections for this KB."""
@@ -116,6 +116,7 @@ class RfpKnowledgeBase(models.Model):
 
     # ─── Document Analysis (2-step) ──────────────────────────
 
+    @generation_slot
     def _run_analysis_job(self):
         """Queue job: Two-step document analysis.
         Step 1: Extract section structure + summary + domain.
@@ -131,10 +132,15 @@ class RfpKnowledgeBase(models.Model):
             existing_domains = self.env['rfp.project.domain'].search([])
             domain_list = "\n".join([f"- {d.name}" for d in existing_domains])
 
-            file_content = base64.b64decode(self.document)
+            document_att = self._get_binary_attachment('document')
+            file_content = self._get_binary_raw('document')
+            # Both analysis steps share the same file: the checksum lets the
+            # provider upload happen once and be referenced by the second call.
             attachments = [{
                 'data': file_content,
-                'mime_type': self.mimetype or 'application/pdf'
+                'mime_type': self.mimetype or 'application/pdf',
+                'checksum': document_att.checksum,
+                'name': self.filename,
             }]
 
             # ── Step 1: Structure Extraction ──
@@ -251,6 +257,7 @@ class RfpKnowledgeBase(models.Model):
 
     # ─── Project-based Analysis (1-step) ─────────────────────
 
+    @generation_slot
     def _run_project_analysis_job(self):
         """Queue job: Generalize sections from a completed project.
         Sections already exist (created from document_section_ids).
@@ -1,20 +1,31 @@
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
 from odoo.exceptions import ValidationError
 from markupsafe import Markup
+import hashlib
 import json
 import logging
-import base64
-import zipfile
-import io
-from xml.etree import ElementTree
 from odoo.addons.project_rfp_ai.const import *
+from odoo.addons.project_rfp_ai.utils.concurrency import generation_slot
+from odoo.addons.project_rfp_ai.models.generation_job import PENDING_JOB_STATES
 
 _logger = logging.getLogger(__name__)
 
+# Contact form inputs printed at the top of the Word export: (label, field key)
+WORD_CONTACT_FIELDS = [
+    ("Name", 'contact_name'),
+    ("Email", 'contact_email'),
+    ("Phone", 'contact_phone'),
+    ("Details", 'contact_details'),
+]
+WORD_CONTACT_KEYS = [key for _label, key in WORD_CONTACT_FIELDS]
+# Seconds before a pipeline advance job that found the project row locked runs again.
+PIPELINE_LOCK_RETRY_SECONDS = 5
+
+
 class RfpProject(models.Model):
     _name = 'rfp.project'
     _description = 'RFP AI Project'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'rfp.binary.mixin']
 
     name = fields.Char(string="Project Name", required=True, tracking=True)
     description = fields.Text(string="Initial Description", required=True, tracking=True)
@@ -47,6 +58,23 @@ class RfpProject(models.Model):
 
     image_generation_progress = fields.Integer(string="Image Gen Progress", default=0, help="Transient field for progress bar")
 
+    # Generation progress counters, updated as section/diagram jobs finish
+    # (see rfp.generation.job) so status reads never walk sections or jobs.
+    gen_phase = fields.Selection([
+        ('content', 'Content'),
+        ('images', 'Images'),
+    ], string="Generation Phase", readonly=True, copy=False)
+    gen_total = fields.Integer(string="Items To Generate", default=0, readonly=True, copy=False)
+    gen_done = fields.Integer(string="Items Generated", default=0, readonly=True, copy=False)
+    gen_failed = fields.Integer(string="Items Failed", default=0, readonly=True, copy=False)
+    pipeline_started_at = fields.Datetime(string="Generation Started", readonly=True, copy=False)
+    pipeline_seconds = fields.Float(string="Generation Time (s)", readonly=True, copy=False,
+                                    help="Wall-clock time from content dispatch to images generated.")
+    critical_path_seconds = fields.Float(string="Critical Path (s)", readonly=True, copy=False,
+                                         help="Longest content-then-diagrams chain of job run times.")
+    progress_version = fields.Integer(string="Progress Version", default=0, readonly=True, copy=False,
+                                      help="Incremented on every progress or stage change; used as ETag.")
+
     active = fields.Boolean(default=True)
 
     form_input_ids = fields.One2many('rfp.form.input', 'project_id', string="Gathered Inputs")
@@ -84,7 +112,10 @@ class RfpProject(models.Model):
             for project in self:
                 if project.current_stage != STAGE_COMPLETED:
                     project._notify_completion()
-        return super(RfpProject, self).write(vals)
+        res = super(RfpProject, self).write(vals)
+        if 'current_stage' in vals:
+            self._push_generation_progress()
+        return res
 
     def _notify_completion(self):
         self.ensure_one()
@@ -156,6 +187,143 @@ class RfpProject(models.Model):
             completeness = cap
         return completeness
 
+    # ─── Generation Progress (counters + bus) ─────────────────
+
+    def _start_generation_phase(self, phase):
+        """Switch the progress counters to ``phase`` once its jobs are dispatched."""
+        self.ensure_one()
+        self.write({'gen_phase': phase})
+        self._sync_generation_counters()
+
+    def _sync_generation_counters(self):
+        """
+        Recount the current phase and store the totals on the project.
+
+        Runs when a phase starts and after every section/diagram job finishes
+        (see rfp.generation.job), so the counters stay exact whichever phase a
+        job finished in, while status reads remain a single record read.
+        """
+        for project in self.filtered('gen_phase'):
+            counts = project._get_generation_counts()[project.gen_phase]
+            project.write({
+                'gen_total': counts['total'],
+                'gen_done': counts['completed'],
+                'gen_failed': counts['failed'],
+            })
+            project._push_generation_progress()
+            if project.current_stage in (STAGE_GENERATING_CONTENT, STAGE_GENERATING_IMAGES) \
+                    and project._get_progress_status()['status'] == 'completed':
+                project._schedule_pipeline_advance()
+
+    def _schedule_pipeline_advance(self):
+        """Queue _advance_pipeline; duplicate requests coalesce on the identity key."""
+        for project in self:
+            self.env['rfp.generation.job']._enqueue(
+                project, '_advance_pipeline', project=project, channel=CHANNEL_INTERACTIVE,
+                description=f"Advance pipeline: {project.name}")
+
+    def _advance_pipeline(self):
+        """
+        Move the generation stage machine on once the running phase is finished.
+
+        Called as a queue job when the last section/diagram job of a phase
+        finishes, and by status polls. The project row is locked and the stage
+        re-read before acting, so each transition happens exactly once. A
+        status poll that finds the row locked leaves it to the lock holder;
+        the queue job is postponed instead, since the lock holder may be an
+        edit or a counter sync that will not advance the pipeline itself.
+
+        The stages only gate the end of the run; the work itself is a
+        dependency graph. The glossary and every section's content job start
+        once the outline exists, each section's diagram jobs start as soon as
+        that section is written, and images_generated waits on all of them.
+
+        Returns:
+            bool: True if a transition was made.
+        """
+        advanced = False
+        for project in self:
+            self.env.cr.execute(
+                "SELECT id FROM rfp_project WHERE id = %s FOR UPDATE SKIP LOCKED", (project.id,))
+            if not self.env.cr.fetchone():
+                if self.env.context.get('job_uuid'):
+                    from odoo.addons.queue_job.exception import RetryableJobError
+                    raise RetryableJobError(
+                        f"Project {project.id} is locked, retrying the pipeline advance",
+                        seconds=PIPELINE_LOCK_RETRY_SECONDS,
+                        ignore_retry=True,
+                    )
+                continue
+            project.invalidate_recordset(['current_stage', 'gen_phase', 'gen_total', 'gen_done', 'gen_failed'])
+
+            if project.current_stage == STAGE_SECTIONS_GENERATED:
+                # Structure is ready, start generating content immediately
+                project.action_generate_content()
+                advanced = True
+                continue
+            if project.current_stage not in (STAGE_GENERATING_CONTENT, STAGE_GENERATING_IMAGES):
+                continue
+            if project._get_progress_status()['status'] != 'completed':
+                continue
+
+            if project.current_stage == STAGE_GENERATING_CONTENT:
+                project.current_stage = STAGE_CONTENT_GENERATED
+                project._notify_stage_progress(STAGE_CONTENT_GENERATED)
+                project.action_generate_diagram_images()
+            else:
+                project.current_stage = STAGE_IMAGES_GENERATED
+                project._notify_stage_progress(STAGE_IMAGES_GENERATED)
+                project._record_pipeline_timing()
+            _logger.info("Project %s advanced to %s", project.id, project.current_stage)
+            advanced = True
+        return advanced
+
+    def _push_generation_progress(self):
+        """Bump the progress version and push the new snapshot to the owner."""
+        for project in self:
+            self.env.cr.execute(
+                "UPDATE rfp_project SET progress_version = COALESCE(progress_version, 0) + 1 WHERE id = %s",
+                (project.id,))
+            project.invalidate_recordset(['progress_version'])
+            if project.user_id.partner_id:
+                self.env['bus.bus']._sendone(
+                    project.user_id.partner_id, 'rfp_generation_progress', project._get_progress_payload())
+
+    def _get_progress_status(self):
+        """Same shape as get_generation_status(), read from the counters.
+
+        Falls back to get_generation_status() for a generation stage whose
+        counters were never initialised (jobs dispatched before they existed).
+        """
+        self.ensure_one()
+        phase = {STAGE_GENERATING_CONTENT: 'content', STAGE_GENERATING_IMAGES: 'images'}.get(self.current_stage)
+        if phase and self.gen_phase != phase:
+            return self.get_generation_status()
+
+        total, done, failed = self.gen_total, self.gen_done, self.gen_failed
+        if not total:
+            return {'status': 'completed', 'progress': 100, 'completed': 0, 'total': 0, 'failed': 0}
+        if done >= total:
+            status = 'completed'
+        elif done + failed >= total:
+            # Failed diagrams do not block the pipeline; failed sections do.
+            status = 'completed' if self.gen_phase == 'images' else 'completed_with_errors'
+        else:
+            status = 'generating_images' if self.gen_phase == 'images' else 'generating'
+        return {'status': status, 'progress': int(done * 100 / total), 'completed': done,
+                'total': total, 'failed': failed}
+
+    def _get_progress_payload(self):
+        """Snapshot sent over the bus and returned by the status endpoints."""
+        self.ensure_one()
+        payload = self._get_progress_status()
+        payload.update({
+            'project_id': self.id,
+            'stage': self.current_stage,
+            'version': self.progress_version,
+        })
+        return payload
+
     def _notify_stage_progress(self, stage):
         """Send notification when a major generation stage completes."""
         self.ensure_one()
@@ -201,6 +369,9 @@ class RfpProject(models.Model):
                 'sticky': True,
             })
 
+    # Word export, reused while its content key is unchanged (see _get_word_export)
+    word_export_file = fields.Binary(string="Word Export", attachment=True, readonly=True, copy=False)
+
     # Source Document (for uploaded RFP imports)
     source_document = fields.Binary(string="Source Document", attachment=True)
     source_filename = fields.Char(string="Source Filename")
@@ -339,120 +510,15 @@ class RfpProject(models.Model):
     @staticmethod
     def _extract_text_from_docx(file_bytes):
         """Extract plain text from a DOCX file including paragraphs, tables, altChunk HTML, headers, and footers."""
-        import re as _re
-        ns = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
-        ns_r = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
-
-        def _extract_from_body(body_elem):
-            """Walk body in document order, extracting text from paragraphs and table cells."""
-            lines = []
-            for elem in body_elem:
-                tag = elem.tag.split('}')[-1] if '}' in elem.tag else elem.tag
-
-                if tag == 'p':
-                    texts = [t.text for t in elem.iter(f'{{{ns}}}t') if t.text]
-                    if texts:
-                        lines.append(''.join(texts))
-
-                elif tag == 'tbl':
-                    for row in elem.iter(f'{{{ns}}}tr'):
-                        cells = []
-                        for cell in row.iter(f'{{{ns}}}tc'):
-                            cell_texts = [t.text for t in cell.iter(f'{{{ns}}}t') if t.text]
-                            cells.append(' '.join(cell_texts))
-                        if cells:
-                            lines.append('\t'.join(cells))
-
-                elif tag == 'sdt':
-                    texts = [t.text for t in elem.iter(f'{{{ns}}}t') if t.text]
-                    if texts:
-                        lines.append(''.join(texts))
-
-            return lines
-
-        def _strip_html(html_str):
-            """Strip HTML tags and return clean text."""
-            text = _re.sub(r'<[^>]+>', ' ', html_str)
-            text = _re.sub(r'&amp;', '&', text)
-            text = _re.sub(r'&lt;', '<', text)
-            text = _re.sub(r'&gt;', '>', text)
-            text = _re.sub(r'&nbsp;', ' ', text)
-            text = _re.sub(r'&#\d+;', ' ', text)
-            text = _re.sub(r'\s+', ' ', text).strip()
-            return text
-
-        all_parts = []
-        with zipfile.ZipFile(io.BytesIO(file_bytes)) as zf:
-            # Build relationship map for altChunk references
-            rel_map = {}
-            rels_path = 'word/_rels/document.xml.rels'
-            if rels_path in zf.namelist():
-                with zf.open(rels_path) as rels_xml:
-                    rels_tree = ElementTree.parse(rels_xml)
-                    for rel in rels_tree.getroot():
-                        rid = rel.get('Id', '')
-                        target = rel.get('Target', '')
-                        if target:
-                            rel_map[rid] = target
-
-            if 'word/document.xml' in zf.namelist():
-                with zf.open('word/document.xml') as doc_xml:
-                    tree = ElementTree.parse(doc_xml)
-                    body = tree.getroot().find(f'{{{ns}}}body')
-                    if body is not None:
-                        for elem in body:
-                            tag = elem.tag.split('}')[-1] if '}' in elem.tag else elem.tag
-
-                            if tag in ('p', 'tbl', 'sdt'):
-                                all_parts.extend(_extract_from_body([elem]))
-
-                            elif tag == 'altChunk':
-                                # Embedded HTML content — resolve via relationship
-                                rid = elem.get(f'{{{ns_r}}}id', '')
-                                target = rel_map.get(rid, '')
-                                if target:
-                                    html_path = f'word/{target}' if not target.startswith('word/') else target
-                                    if html_path in zf.namelist():
-                                        try:
-                                            with zf.open(html_path) as hf:
-                                                html_content = hf.read().decode('utf-8', errors='ignore')
-                                                clean_text = _strip_html(html_content)
-                                                if clean_text:
-                                                    all_parts.append(clean_text)
-                                        except Exception:
-                                            pass
-                    else:
-                        for t in tree.getroot().iter(f'{{{ns}}}t'):
-                            if t.text:
-                                all_parts.append(t.text)
-
-            # Headers and footers
-            for name in sorted(zf.namelist()):
-                if name.startswith('word/header') or name.startswith('word/footer'):
-                    try:
-                        with zf.open(name) as hf_xml:
-                            tree = ElementTree.parse(hf_xml)
-                            for p in tree.getroot().iter(f'{{{ns}}}p'):
-                                texts = [t.text for t in p.iter(f'{{{ns}}}t') if t.text]
-                                if texts:
-                                    all_parts.append(''.join(texts))
-                    except Exception:
-                        pass
-
-        return '\n'.join(all_parts)
+        from odoo.addons.project_rfp_ai.utils.docx_reader import extract_docx_text
+        return extract_docx_text(file_bytes)
 
     @staticmethod
     def _extract_text_from_pdf(file_bytes):
-        """Extract plain text from a PDF file using PyPDF2."""
+        """Extract plain text from a PDF file using PyPDF2 (page ranges in parallel for large files)."""
+        from odoo.addons.project_rfp_ai.utils.pdf_reader import extract_pdf_text
         try:
-            import PyPDF2
-            reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
-            parts = []
-            for page in reader.pages:
-                text = page.extract_text()
-                if text:
-                    parts.append(text)
-            return '\n'.join(parts)
+            return extract_pdf_text(file_bytes)
         except Exception:
             return ''
 
@@ -528,7 +594,7 @@ class RfpProject(models.Model):
 
         # 5. Gather original document attachments for multimodal AI analysis
         ai_attachments = None
-        if self.source_document:
+        if self._has_binary('source_document'):
             source_atts = self.env['ir.attachment'].sudo().search([
                 ('res_model', '=', 'rfp.project'),
                 ('res_id', '=', self.id),
@@ -536,13 +602,14 @@ class RfpProject(models.Model):
             if source_atts:
                 ai_attachments = []
                 for att in source_atts:
-                    file_content = base64.b64decode(att.datas)
+                    file_content = att.raw
                     mimetype = att.mimetype or 'application/octet-stream'
                     if mimetype in ('application/octet-stream', 'binary/octet-stream'):
                         ext = att.name.rsplit('.', 1)[-1].lower() if '.' in att.name else ''
                         if ext == 'pdf': mimetype = 'application/pdf'
                     if mimetype == 'application/pdf':
-                        ai_attachments.append({'data': file_content, 'mime_type': mimetype})
+                        ai_attachments.append({'data': file_content, 'mime_type': mimetype,
+                                               'checksum': att.checksum, 'name': att.name})
 
         # 6. Call AI
         try:
@@ -568,9 +635,10 @@ class RfpProject(models.Model):
             _logger.warning("Auto-fill AI returned invalid JSON for project %s", self.id)
             return
 
-        # 6. Apply results
+        # 6. Apply results (one write per distinct answer)
         auto_fill_count = 0
         input_map = {inp.field_key: inp for inp in unanswered}
+        inputs_by_answer = {}
 
         for field_result in data.get('auto_filled_fields', []):
             field_key = field_result.get('field_key')
@@ -596,12 +664,14 @@ class RfpProject(models.Model):
                     confidence = 'medium'
 
             if confidence in ('high', 'medium'):
-                inp.write({
-                    'user_value': answer,
-                    'is_auto_filled': True,
-                })
+                inputs_by_answer[answer] = inputs_by_answer.get(answer, inp.browse()) | inp
                 auto_fill_count += 1
 
+        for answer, inputs in inputs_by_answer.items():
+            inputs.write({
+                'user_value': answer,
+                'is_auto_filled': True,
+            })
         _logger.info(
             "Auto-fill for project %s: %d fields auto-filled",
             self.id, auto_fill_count
@@ -652,11 +722,14 @@ class RfpProject(models.Model):
             ('res_id', '=', self.id)
         ])
         
-        if not source_attachments and self.source_document:
+        if not source_attachments and self._has_binary('source_document'):
             # Fallback if no attachments found but main binary exists
+            source_att = self._get_binary_attachment('source_document')
             source_attachments = self.env['ir.attachment'].sudo().new({
                 'name': self.source_filename or 'document.pdf',
-                'datas': self.source_document,
+                'raw': self._get_binary_raw('source_document'),
+                'checksum': source_att.checksum,
+                'mimetype': self.source_mimetype or source_att.mimetype,
                 'res_model': 'rfp.project',
                 'res_id': self.id
             })
@@ -666,7 +739,7 @@ class RfpProject(models.Model):
         filenames = []
 
         for att in source_attachments:
-            file_content = base64.b64decode(att.datas)
+            file_content = att.raw
             mimetype = att.mimetype
             # Manually check extension if mimetype is generic or unknown
             if not mimetype or mimetype in ['application/octet-stream', 'binary/octet-stream']:
@@ -677,7 +750,8 @@ class RfpProject(models.Model):
             filenames.append(att.name)
             
             if mimetype == 'application/pdf':
-                ai_attachments.append({'data': file_content, 'mime_type': 'application/pdf'})
+                ai_attachments.append({'data': file_content, 'mime_type': 'application/pdf',
+                                       'checksum': att.checksum, 'name': att.name})
                 try:
                     extracted = self._extract_text_from_pdf(file_content)
                     if extracted:
@@ -911,6 +985,63 @@ class RfpProject(models.Model):
             kb_context['knowledge_bases'].append(kb_data)
         return kb_context
 
+    def _build_kb_reference_index(self):
+        """BM25 index over the described sections of the project's KBs, or None."""
+        self.ensure_one()
+        from odoo.addons.project_rfp_ai.utils.kb_retrieval import KbSectionIndex
+
+        documents = []
+        for kb in self.kb_ids:
+            for kb_sec in kb.section_ids.sorted('sequence'):
+                if not kb_sec.description:
+                    continue
+                key_topics = []
+                if kb_sec.key_topics:
+                    try:
+                        key_topics = [str(t) for t in json.loads(kb_sec.key_topics)]
+                    except (json.JSONDecodeError, TypeError):
+                        pass
+                documents.append({
+                    'kb_name': kb.name,
+                    'section_title': kb_sec.title,
+                    'section_type': kb_sec.section_type,
+                    'best_practices': kb_sec.description,
+                    'key_topics': key_topics,
+                })
+        return KbSectionIndex(documents) if documents else None
+
+    def _get_kb_reference_text(self, kb_index, section, intent=''):
+        """KB best practices relevant to one document section, formatted for the writer prompt."""
+        from odoo.addons.project_rfp_ai.utils.kb_retrieval import DEFAULT_TOP_K, DEFAULT_TOKEN_BUDGET
+
+        if not kb_index:
+            return ""
+        ICP = self.env['ir.config_parameter'].sudo()
+        top_k = int(ICP.get_param('project_rfp_ai.kb_reference_top_k', DEFAULT_TOP_K))
+        token_budget = int(ICP.get_param('project_rfp_ai.kb_reference_token_budget', DEFAULT_TOKEN_BUDGET))
+
+        matches = kb_index.search(
+            f"{section.section_title} {intent}", section_type=section.section_type,
+            top_k=top_k, token_budget=token_budget)
+        _logger.debug("KB reference for section '%s': %s", section.section_title,
+                     ", ".join(f"{doc['kb_name']}/{doc['section_title']}={score:.2f}" for score, doc in matches)
+                     or "no match")
+        if not matches:
+            return ""
+
+        kb_sections_ref = [{
+            'kb_name': doc['kb_name'],
+            'section_title': doc['section_title'],
+            'section_type': doc['section_type'],
+            'best_practices': doc['best_practices'],
+        } for _score, doc in matches]
+        return (
+            "\n\n**Knowledge Base Reference (Best Practices):**\n"
+            "Use the following reference material to ensure your content "
+            "follows established best practices and industry standards.\n\n"
+            + json.dumps(kb_sections_ref, indent=2)
+        )
+
     def _run_initial_research(self):
         self.ensure_one()
 
@@ -1493,31 +1624,25 @@ class RfpProject(models.Model):
             current_blob['toc_structure'] = toc_data
             project.ai_context_blob = json.dumps(current_blob, indent=4)
             
-            # Create Sections
-            sequence = 10
+            # Create Sections (one batched create)
+            section_vals = []
             for section in toc_data.get('table_of_contents', []):
-                self.env['rfp.document.section'].create({
-                    'project_id': project.id,
-                    'section_title': section.get('title'),
-                    'sequence': sequence,
-                    'section_type': section.get('section_type', 'narrative'),
-                })
-                sequence += 10
-
-                for sub in section.get('subsections', []):
-                    self.env['rfp.document.section'].create({
+                for item in [section] + (section.get('subsections') or []):
+                    section_vals.append({
                         'project_id': project.id,
-                        'section_title': sub.get('title'),
-                        'sequence': sequence,
-                        'section_type': sub.get('section_type', 'narrative'),
+                        'section_title': item.get('title'),
+                        'sequence': (len(section_vals) + 1) * 10,
+                        'section_type': item.get('section_type', 'narrative'),
                     })
-                    sequence += 10
+            self.env['rfp.document.section'].create(section_vals)
 
             project.current_stage = STAGE_SECTIONS_GENERATED
+            project._schedule_pipeline_advance()
             # Auto-generate the project glossary now that all gathering rounds
             # (info, practices, specs, gap) are complete and the section
             # outline exists. Runs as a queued job so it never blocks the user.
-            project.with_delay(channel='root.rfp_generation')._generate_glossary()
+            self.env['rfp.generation.job']._enqueue(
+                project, '_generate_glossary', project=project, channel=CHANNEL_BACKGROUND)
             return True
 
     def action_generate_content(self):
@@ -1526,119 +1651,220 @@ class RfpProject(models.Model):
         """
         for project in self:
             project.current_stage = STAGE_GENERATING_CONTENT
-            
-             # 1. Context Building
-            context_data = {
-                "project_name": project.name,
-                "description": project.description,
-                "domain": project.domain_id.name or 'General',
-                "q_and_a": []
-            }
-            for inp in project.form_input_ids:
-                if inp.user_value:
-                    context_data["q_and_a"].append(f"- **{inp.label}**: {inp.user_value}")
+            project.write({'pipeline_started_at': fields.Datetime.now(), 'pipeline_seconds': 0.0,
+                           'critical_path_seconds': 0.0})
+            sections = project.document_section_ids.filtered(lambda s: not s.content_html)
+            project._dispatch_section_jobs(project._prepare_section_writer_calls(sections))
+            # Diagrams of sections that already have content can start now
+            project._dispatch_diagram_jobs(project.document_section_ids.filtered('content_html').diagram_ids)
+            project._start_generation_phase('content')
+            return True
 
-            context_str = "\n".join(context_data["q_and_a"])
+    def _dispatch_section_jobs(self, calls):
+        """Queue section writer jobs on the bulk lane and link them to their sections."""
+        self.ensure_one()
+        jobs = self.env['rfp.generation.job']._enqueue_batch(calls, project=self, channel=CHANNEL_BULK)
+        for (section_record, _method, _kwargs), job in zip(calls, jobs):
+            if job:
+                section_record.job_id = job
+            section_record.generation_status = STATUS_QUEUED
+        return jobs
+
+    def _prepare_section_writer_calls(self, sections):
+        """
+        Build the writer job call of each section without calling the model.
 
-            # Retrieve TOC Structure for context
-            current_blob = project.get_context_data()
-            toc_data = current_blob.get('toc_structure', {})
-            toc_context_str = json.dumps(toc_data.get('table_of_contents', []), indent=2)
+        Each call carries the section's input fingerprint: short hashes of the
+        Q&A answers relevant to the section, its TOC entry, its KB reference
+        and the writer prompt template it is generated from (see
+        _get_stale_sections).
 
-            section_writer_template = self.env['rfp.prompt'].search([('code', '=', PROMPT_WRITER_SECTION)], limit=1).template_text
+        The writer prompt holds every answer, but only the answers sharing
+        terms with the section (title, intent, type vocabulary; BM25 over the
+        answers) count as its inputs, so one changed answer does not mark the
+        whole document stale. A section that matches no answer depends on
+        all of them.
 
-            # Build KB reference for section writers
-            kb_sections_ref = []
-            if project.kb_ids:
-                for kb in project.kb_ids:
-                    for kb_sec in kb.section_ids.sorted('sequence'):
-                        if kb_sec.description:
-                            kb_sections_ref.append({
-                                'kb_name': kb.name,
-                                'section_title': kb_sec.title,
-                                'section_type': kb_sec.section_type,
-                                'best_practices': kb_sec.description,
-                            })
-
-            kb_reference_text = ""
-            if kb_sections_ref:
-                kb_reference_text = (
-                    "\n\n**Knowledge Base Reference (Best Practices):**\n"
-                    "Use the following reference material to ensure your content "
-                    "follows established best practices and industry standards.\n\n"
-                    + json.dumps(kb_sections_ref, indent=2)
+        Returns:
+            list: (section, 'generate_content_job', kwargs) tuples.
+        """
+        self.ensure_one()
+        if not sections:
+            return []
+
+        def digest(value):
+            return hashlib.sha1(value.encode()).hexdigest()[:12]
+
+        from odoo.addons.project_rfp_ai.utils.kb_retrieval import KbSectionIndex, SECTION_TYPE_KEYWORDS, tokenize
+
+        # 1. Context Building
+        answers = [inp for inp in self.form_input_ids if inp.user_value]
+        q_and_a = [f"- **{inp.label}**: {inp.user_value}" for inp in answers]
+        context_str = "\n".join(q_and_a)
+        answer_index = KbSectionIndex([
+            {'section_title': inp.label, 'best_practices': inp.user_value} for inp in answers
+        ]) if answers else None
+
+        # Retrieve TOC Structure for context
+        toc_data = self.get_context_data().get('toc_structure', {})
+        toc_context_str = json.dumps(toc_data.get('table_of_contents', []), indent=2)
+
+        section_writer_template = self.env['rfp.prompt'].search(
+            [('code', '=', PROMPT_WRITER_SECTION)], limit=1).template_text
+
+        # Index KB sections once; each writer only gets its best matches
+        kb_index = self._build_kb_reference_index()
+        toc_intents = {}
+        for toc_section in toc_data.get('table_of_contents', []):
+            for item in [toc_section] + (toc_section.get('subsections') or []):
+                if item.get('title') and item.get('description_intent'):
+                    toc_intents[item['title']] = item['description_intent']
+
+        # Pre-fetch BOQ prompt template
+        boq_writer_template = self.env['rfp.prompt'].search(
+            [('code', '=', PROMPT_WRITER_BOQ)], limit=1).template_text or ''
+
+        domain_name = self.domain_id.name or 'General'
+        calls = []
+        for section_record in sections:
+            section_title = section_record.section_title
+            section_intent = toc_intents.get(section_title, '')
+
+            if section_record.section_type == 'boq' and boq_writer_template:
+                template = boq_writer_template
+                writer_prompt = boq_writer_template.format(
+                    project_name=self.name,
+                    domain=domain_name,
+                    toc_context=toc_context_str,
+                    section_title=section_title,
+                    context_str=context_str
+                )
+            else:
+                template = section_writer_template
+                writer_prompt = section_writer_template.format(
+                    project_name=self.name,
+                    domain=domain_name,
+                    toc_context=toc_context_str,
+                    section_title=section_title,
+                    section_intent="Write comprehensive details matching the project context.",
+                    context_str=context_str
                 )
 
-            # Pre-fetch BOQ prompt template
-            boq_writer_template = self.env['rfp.prompt'].search(
-                [('code', '=', PROMPT_WRITER_BOQ)], limit=1).template_text or ''
+            kb_reference_text = self._get_kb_reference_text(kb_index, section_record, section_intent)
+            user_context = f"Project Context:\n{context_str}\n\nPlease write the {section_title} section now.{kb_reference_text}"
+            relevant_answers = q_and_a
+            if answer_index:
+                scores = answer_index.score(
+                    tokenize(f"{section_title} {section_intent}")
+                    + tokenize(SECTION_TYPE_KEYWORDS.get(section_record.section_type, '')))
+                relevant_answers = [line for line, score in zip(q_and_a, scores) if score > 0] or q_and_a
+            fingerprint = {
+                'relevant_answers': digest(f"{self.name}|{domain_name}|" + "\n".join(relevant_answers)),
+                'outline': digest(json.dumps([section_title, section_record.section_type, section_intent])),
+                'kb': digest(kb_reference_text),
+                'prompt': digest(template),
+            }
+            calls.append((section_record, 'generate_content_job', {
+                'system_prompt': writer_prompt,
+                'user_context': user_context,
+                'fingerprint': json.dumps(fingerprint, sort_keys=True),
+            }))
+        return calls
+
+    def _get_stale_sections(self):
+        """
+        Compare each generated section's stored fingerprint with its current inputs.
 
-            for section_record in project.document_section_ids:
-                if section_record.content_html:
-                    continue
+        No model call is made, but every writer prompt and the KB index are
+        rebuilt; pages use _get_stale_sections_cached(). Sections generated
+        before fingerprints were recorded are never reported as stale, and
+        inputs missing from an older fingerprint are not compared.
 
-                section_title = section_record.section_title
+        Returns:
+            dict: {section_id: [changed input keys]} for the stale sections;
+                keys are 'relevant_answers', 'outline', 'kb' and 'prompt'.
+        """
+        self.ensure_one()
+        sections = self.document_section_ids.filtered(lambda s: s.content_html and s.input_fingerprint)
+        stale = {}
+        for section, _method, kwargs in self._prepare_section_writer_calls(sections):
+            try:
+                stored = json.loads(section.input_fingerprint)
+            except (TypeError, ValueError):
+                continue
+            current = json.loads(kwargs['fingerprint'])
+            changed = sorted(key for key in current if key in stored and stored[key] != current[key])
+            if changed:
+                stale[section.id] = changed
+        return stale
 
-                if section_record.section_type == 'boq' and boq_writer_template:
-                    writer_prompt = boq_writer_template.format(
-                        project_name=project.name,
-                        domain=project.domain_id.name or 'General',
-                        toc_context=toc_context_str,
-                        section_title=section_title,
-                        context_str=context_str
-                    )
-                else:
-                    section_intent = "Write comprehensive details matching the project context."
-                    writer_prompt = section_writer_template.format(
-                        project_name=project.name,
-                        domain=project.domain_id.name or 'General',
-                        toc_context=toc_context_str,
-                        section_title=section_title,
-                        section_intent=section_intent,
-                        context_str=context_str
-                    )
+    def _get_stale_inputs_key(self):
+        """
+        Cheap marker of the writer inputs of the project.
 
-                user_context = f"Project Context:\n{context_str}\n\nPlease write the {section_title} section now.{kb_reference_text}"
-                
-                job = section_record.with_delay(channel='root.rfp_generation').generate_content_job(
-                    system_prompt=writer_prompt,
-                    user_context=user_context
-                )
-                
-                if job and hasattr(job, 'db_record'):
-                    section_record.job_id = job.db_record()
-                
-                section_record.generation_status = STATUS_QUEUED
-                
-            return True
+        Last write date and row count of every table the fingerprints are
+        built from (project, answers, sections, selected KBs and their
+        sections, domain, writer prompts); any change to an input changes it.
+        """
+        self.ensure_one()
+        kb_field = self._fields['kb_ids']
+        for model_name in ('rfp.project', 'rfp.form.input', 'rfp.document.section', 'rfp.knowledge.base',
+                           'rfp.kb.section', 'rfp.project.domain', 'rfp.prompt'):
+            self.env[model_name].flush_model()
+        self.env.cr.execute(f"""
+            SELECT (SELECT concat(p.write_date, '/', d.write_date)
+                      FROM rfp_project p
+                 LEFT JOIN rfp_project_domain d ON d.id = p.domain_id
+                     WHERE p.id = %(project_id)s),
+                   (SELECT concat(max(write_date), '/', count(*))
+                      FROM rfp_form_input WHERE project_id = %(project_id)s),
+                   (SELECT concat(max(write_date), '/', count(*))
+                      FROM rfp_document_section WHERE project_id = %(project_id)s),
+                   (SELECT concat(max(GREATEST(kb.write_date, ks.write_date)), '/', count(ks.id), '/',
+                                  string_agg(DISTINCT kb.id::text, ','))
+                      FROM "{kb_field.relation}" rel
+                      JOIN rfp_knowledge_base kb ON kb.id = rel."{kb_field.column2}"
+                 LEFT JOIN rfp_kb_section ks ON ks.kb_id = kb.id
+                     WHERE rel."{kb_field.column1}" = %(project_id)s),
+                   (SELECT concat(max(write_date), '/', count(*))
+                      FROM rfp_prompt WHERE code IN %(codes)s)
+        """, {'project_id': self.id, 'codes': (PROMPT_WRITER_SECTION, PROMPT_WRITER_BOQ)})
+        return json.dumps(self.env.cr.fetchone(), default=str)
+
+    def _get_stale_sections_cached(self):
+        """_get_stale_sections() for page renders, recomputed only when an input changed."""
+        self.ensure_one()
+        return self._get_stale_sections_for_key(self._get_stale_inputs_key())
+
+    @tools.ormcache('self.id', 'inputs_key')
+    def _get_stale_sections_for_key(self, inputs_key):
+        return self._get_stale_sections()
+
+    def action_regenerate_stale(self):
+        """Re-queue only the sections whose inputs changed since they were generated."""
+        for project in self:
+            if project.current_stage in (STAGE_DOCUMENT_LOCKED, STAGE_GENERATING_CONTENT, STAGE_GENERATING_IMAGES):
+                raise ValidationError("Stale sections can only be regenerated on an unlocked, idle document.")
+            stale = project._get_stale_sections()
+            if not stale:
+                continue
+            sections = self.env['rfp.document.section'].browse(list(stale))
+            project.current_stage = STAGE_GENERATING_CONTENT
+            project.write({'pipeline_started_at': fields.Datetime.now(), 'pipeline_seconds': 0.0,
+                           'critical_path_seconds': 0.0})
+            project._dispatch_section_jobs(project._prepare_section_writer_calls(sections))
+            project._start_generation_phase('content')
+            project.message_post(
+                body=Markup("Regenerating %d stale section(s): %s") % (
+                    len(sections), ", ".join(sections.mapped('section_title'))),
+                message_type='notification',
+            )
+        return True
     
     def action_check_generation_status(self):
-        """ Check completion """
-        for project in self:
-            # 1. Immediate Transitions (Start Chains)
-            if project.current_stage == STAGE_SECTIONS_GENERATED:
-                 # Structure is ready, start generating content immediately
-                 project.action_generate_content()
-                 return True
+        """ Check completion (the completion callback normally gets there first) """
+        return self._advance_pipeline()
 
-            # 2. Check Status of Running Jobs
-            status_data = project.get_generation_status()
-            
-            # Auto-Advance Logic
-            if status_data['status'] == 'completed':
-                if project.current_stage == STAGE_GENERATING_CONTENT:
-                     project.current_stage = STAGE_CONTENT_GENERATED
-                     project._notify_stage_progress(STAGE_CONTENT_GENERATED)
-                     # Auto-Trigger Images
-                     project.action_generate_diagram_images()
-
-                elif project.current_stage == STAGE_GENERATING_IMAGES:
-                     project.current_stage = STAGE_IMAGES_GENERATED
-                     project._notify_stage_progress(STAGE_IMAGES_GENERATED)
-                
-                return True
-        return False
-        
     def action_lock_document(self):
         self.current_stage = STAGE_DOCUMENT_LOCKED
         return True
@@ -1647,27 +1873,78 @@ class RfpProject(models.Model):
         """
         Phase 8: Image Generation (Imagen) 
         Now using Queue Jobs (Async)
+
+        Most diagrams are already rendering by now: each section's diagrams
+        are queued as soon as that section's content is written. This picks
+        up whatever is left (no image and no job in flight).
         """
         for project in self:
             project.current_stage = STAGE_GENERATING_IMAGES
-            
-            # Find diagrams needing images
-            diagrams = self.env['rfp.section.diagram'].search([
-                ('section_id.project_id', '=', project.id),
-                ('image_file', '=', False)
-            ])
-            
-            prompt_record = self.env['rfp.prompt'].search([('code', '=', 'image_generator')], limit=1)
-            prompt_id = prompt_record.id if prompt_record else None
-            
-            for diagram in diagrams:
-                # Dispatch Job
-                job = diagram.with_delay(channel='root.rfp_generation').generate_image_job(prompt_record_id=prompt_id)
-                if job and hasattr(job, 'db_record'):
-                    diagram.job_id = job.db_record()
-                
+            diagrams = self.env['rfp.section.diagram'].search([('section_id.project_id', '=', project.id)])
+            project._dispatch_diagram_jobs(diagrams)
+            project._start_generation_phase('images')
             return True
 
+    def _dispatch_diagram_jobs(self, diagrams):
+        """Queue image jobs for the diagrams that have no image and no job in flight."""
+        self.ensure_one()
+        diagrams = self.env['rfp.section.diagram'].search([
+            ('id', 'in', diagrams.ids),
+            ('image_file', '=', False),
+            ('image_svg', '=', False),
+        ]).filtered(lambda d: not (d.job_id and d.job_id.state in PENDING_JOB_STATES))
+        if not diagrams:
+            return []
+
+        diagrams.write({'render_error': False})
+
+        # Mermaid diagrams render in one batch job per section; illustrations
+        # are AI image calls and keep one job each.
+        batched = diagrams.filtered(lambda d: d.diagram_type == 'mermaid' and d.mermaid_code)
+        single = diagrams - batched
+        # Code the renderer would reject is flagged now instead of being retried
+        invalid = batched.filtered(lambda d: d._flag_invalid_mermaid())
+        batched -= invalid
+        prompt_record = self.env['rfp.prompt'].search([('code', '=', 'image_generator')], limit=1)
+        prompt_id = prompt_record.id if prompt_record else None
+
+        calls = [(section, 'render_diagrams_job', {}) for section in batched.section_id]
+        calls += [(diagram, 'generate_image_job', {'prompt_record_id': prompt_id}) for diagram in single]
+        jobs = self.env['rfp.generation.job']._enqueue_batch(calls, project=self, channel=CHANNEL_IMAGES)
+        for (record, method_name, _kwargs), job in zip(calls, jobs):
+            if not job:
+                continue
+            if method_name == 'render_diagrams_job':
+                (batched & record.diagram_ids).job_id = job
+            else:
+                record.job_id = job
+        return jobs
+
+    def _record_pipeline_timing(self):
+        """
+        Store wall-clock and critical-path time of a finished generation run.
+
+        The critical path is the longest dependency chain of job run times:
+        a section's content job followed by its slowest diagram job. Queue
+        waiting is excluded, so the gap to the wall-clock time is time spent
+        waiting for workers.
+        """
+        def runtime(job):
+            if job and job.date_started and job.date_done:
+                return (job.date_done - job.date_started).total_seconds()
+            return 0.0
+
+        for project in self:
+            critical_path = max((
+                runtime(section.job_id) + max((runtime(d.job_id) for d in section.diagram_ids), default=0.0)
+                for section in project.document_section_ids
+            ), default=0.0)
+            elapsed = 0.0
+            if project.pipeline_started_at:
+                elapsed = (fields.Datetime.now() - project.pipeline_started_at).total_seconds()
+            project.write({'pipeline_seconds': elapsed, 'critical_path_seconds': critical_path})
+            _logger.info("Project %s generated in %.1fs (critical path %.1fs)", project.id, elapsed, critical_path)
+
     def action_mark_completed(self):
         for project in self:
             project.current_stage = 'completed'
@@ -1807,39 +2084,42 @@ class RfpProject(models.Model):
             dict: Mapping of temp IDs (str like 'new_123') to real section IDs (int).
         """
         self.ensure_one()
-        current_ids = self.document_section_ids.ids
-        incoming_ids = []
-        id_map = {}  # Temp ID -> Real ID
+        sections = self.document_section_ids
+        existing = {section.id: section for section in sections}
+        kept = self.env['rfp.document.section']
+        new_keys, new_vals = [], []
 
         for data in sections_data:
             section_id = data.get('id')
             title = data.get('section_title')
             sequence = int(data.get('sequence', 10))
 
-            if isinstance(section_id, int) and section_id in current_ids:
-                # Update existing
-                section = self.env['rfp.document.section'].browse(section_id)
-                section.write({
-                    'section_title': title,
-                    'sequence': sequence
-                })
-                incoming_ids.append(section_id)
+            if isinstance(section_id, int) and section_id in existing:
+                # Update existing (only what changed)
+                section = existing[section_id]
+                kept |= section
+                vals = {}
+                if section.section_title != title:
+                    vals['section_title'] = title
+                if section.sequence != sequence:
+                    vals['sequence'] = sequence
+                if vals:
+                    section.write(vals)
             elif isinstance(section_id, str) and section_id.startswith('new_'):
-                # Create new
-                new_section = self.env['rfp.document.section'].create({
+                new_keys.append(section_id)
+                new_vals.append({
                     'project_id': self.id,
                     'section_title': title,
                     'sequence': sequence,
                     'content_html': ''
                 })
-                incoming_ids.append(new_section.id)
-                id_map[section_id] = new_section.id  # Map temp to real
-        
+
+        # Create new sections in one batch; map temp IDs to real ones
+        new_sections = self.env['rfp.document.section'].create(new_vals)
+        id_map = dict(zip(new_keys, new_sections.ids))
+
         # Delete missing sections
-        to_delete = list(set(current_ids) - set(incoming_ids))
-        if to_delete:
-            self.env['rfp.document.section'].browse(to_delete).unlink()
-            
+        (sections - kept).unlink()
         return id_map
 
     def action_update_boq_data(self, section_id, boq_data):
@@ -1860,82 +2140,110 @@ class RfpProject(models.Model):
             sections_content (dict): {str(section_id): str(html_content)}
         """
         self.ensure_one()
+        sections = {section.id: section for section in self.document_section_ids}
         for section_id_str, content in sections_content.items():
-            if section_id_str.isdigit():
-                section = self.env['rfp.document.section'].browse(int(section_id_str))
-                if section.exists() and section.project_id == self:
-                    section.content_html = content
+            section = sections.get(int(section_id_str)) if section_id_str.isdigit() else None
+            if section and section.content_html != content:
+                section.content_html = content
         return True
 
+    def _get_generation_counts(self):
+        """
+        Count sections and diagrams by generation outcome in one query.
+
+        A section is completed when its job is done, or when it has content
+        and no job; a diagram when it has an image or its job is done without
+        a render error for it (batch render jobs finish even if some of their
+        diagrams failed).
+
+        Returns:
+            dict: {'content': {...}, 'images': {...}}, each with
+                'total', 'completed' and 'failed'.
+        """
+        self.ensure_one()
+        self.env['rfp.document.section'].flush_model(['project_id', 'job_id', 'content_html'])
+        self.env['rfp.section.diagram'].flush_model(['section_id', 'job_id', 'render_error'])
+        self.env['queue.job'].flush_model(['state'])
+        self.env['ir.attachment'].flush_model(['res_model', 'res_field', 'res_id'])
+        self.env.cr.execute("""
+            WITH items AS (
+                SELECT 'content' AS kind,
+                       (s.job_id IS NULL AND COALESCE(s.content_html, '') != '') AS has_output,
+                       FALSE AS has_error,
+                       j.state AS job_state
+                  FROM rfp_document_section s
+             LEFT JOIN queue_job j ON j.id = s.job_id
+                 WHERE s.project_id = %(project_id)s
+             UNION ALL
+                SELECT 'images',
+                       EXISTS (SELECT 1 FROM ir_attachment a
+                                WHERE a.res_model = 'rfp.section.diagram'
+                                  AND a.res_field IN ('image_file', 'image_svg')
+                                  AND a.res_id = d.id),
+                       COALESCE(d.render_error, '') != '',
+                       j.state
+                  FROM rfp_section_diagram d
+                  JOIN rfp_document_section s ON s.id = d.section_id
+             LEFT JOIN queue_job j ON j.id = d.job_id
+                 WHERE s.project_id = %(project_id)s
+            )
+            SELECT kind,
+                   COUNT(*),
+                   COUNT(*) FILTER (WHERE has_output OR (job_state = 'done' AND NOT has_error)),
+                   COUNT(*) FILTER (WHERE NOT has_output AND (job_state = 'failed' OR has_error))
+              FROM items
+          GROUP BY kind
+        """, {'project_id': self.id})
+        counts = {kind: {'total': 0, 'completed': 0, 'failed': 0} for kind in ('content', 'images')}
+        for kind, total, completed, failed in self.env.cr.fetchall():
+            counts[kind] = {'total': total, 'completed': completed, 'failed': failed}
+        return counts
+
     def get_generation_status(self):
         """
         Returns aggregate status of content generation jobs.
         """
         self.ensure_one()
-        
-        # Branch for Image Generation Phase
+        counts = self._get_generation_counts()
+
         # Branch for Image Generation Phase
         if self.current_stage == STAGE_GENERATING_IMAGES:
-             # Count Diagram Jobs
-             diagrams = self.env['rfp.section.diagram'].search([('section_id.project_id', '=', self.id)])
-             total_diagrams = len(diagrams)
-             
-             if total_diagrams == 0:
-                  return {'status': 'completed', 'progress': 100, 'completed': 0, 'total': 0}
-
-             completed_diagrams = 0
-             failed_diagrams = 0
-             
-             for d in diagrams:
-                 if d.image_file:
-                     completed_diagrams += 1
-                 elif d.job_id: # Check job status
-                     if d.job_id.state == 'done':
-                         completed_diagrams += 1
-                     elif d.job_id.state == 'failed':
-                         failed_diagrams += 1
-             
-             progress = (completed_diagrams / total_diagrams) * 100 if total_diagrams > 0 else 0
-             
-             status = 'generating_images'
-             if completed_diagrams == total_diagrams:
-                 status = 'completed'
-             elif failed_diagrams > 0 and (completed_diagrams + failed_diagrams == total_diagrams):
-                 status = 'completed_with_errors' # Should we allow partial?
-                 # If all done (success or fail), mark complete so user isn't stuck
-                 status = 'completed' 
-                 
-             return {
-                 'status': status, 
-                 'progress': int(progress), 
-                 'completed': completed_diagrams, 
-                 'total': total_diagrams
-             }
-        
-        total = len(self.document_section_ids)
+            total_diagrams = counts['images']['total']
+            if total_diagrams == 0:
+                return {'status': 'completed', 'progress': 100, 'completed': 0, 'total': 0}
+
+            completed_diagrams = counts['images']['completed']
+            failed_diagrams = counts['images']['failed']
+            progress = (completed_diagrams / total_diagrams) * 100
+
+            status = 'generating_images'
+            if completed_diagrams == total_diagrams:
+                status = 'completed'
+            elif failed_diagrams > 0 and (completed_diagrams + failed_diagrams == total_diagrams):
+                # If all done (success or fail), mark complete so user isn't stuck
+                status = 'completed'
+
+            return {
+                'status': status,
+                'progress': int(progress),
+                'completed': completed_diagrams,
+                'total': total_diagrams
+            }
+
+        total = counts['content']['total']
         if total == 0:
             return {'status': 'completed', 'progress': 100}
-        
-        completed_count = 0
-        failed_count = 0
-        
-        for section in self.document_section_ids:
-            if section.job_id: # Check linked Job
-                if section.job_id.state == 'done':
-                    completed_count += 1
-                elif section.job_id.state == 'failed':
-                    failed_count += 1
-            elif section.content_html:
-                completed_count += 1
-                
-        progress = (completed_count / total) * 100 if total > 0 else 0
-        
+
+        completed_count = counts['content']['completed']
+        failed_count = counts['content']['failed']
+        progress = (completed_count / total) * 100
+
         status = 'generating'
         if completed_count == total:
             status = 'completed'
         elif failed_count > 0 and (completed_count + failed_count == total):
             status = 'completed_with_errors'
-            
+
         return {'status': status, 'progress': int(progress), 'completed': completed_count, 'total': total}
 
     @api.depends('published_id', 'published_id.active')
@@ -2082,6 +2390,7 @@ class RfpProject(models.Model):
         if rows:
             Term.create(rows)
 
+    @generation_slot
     def _generate_glossary(self):
         """Build prompt context, call AI, apply response. Idempotent."""
         from odoo.addons.project_rfp_ai.models import ai_schemas
@@ -2117,7 +2426,8 @@ class RfpProject(models.Model):
     def action_refresh_glossary(self):
         """User-triggered re-run from backend or portal."""
         self.ensure_one()
-        self.with_delay(channel='root.rfp_generation')._generate_glossary()
+        self.env['rfp.generation.job']._enqueue(
+            self, '_generate_glossary', project=self, channel=CHANNEL_INTERACTIVE)
         return True
 
     def action_view_knowledge_bases(self):
@@ -2159,6 +2469,141 @@ class RfpProject(models.Model):
             self.published_id.active = False
         return True
 
+    def _get_export_key(self):
+        """
+        Hash of everything the Word and PDF exports contain.
+
+        Section titles, order and content, diagram titles, Mermaid code and
+        image checksums are hashed by the database, so no content or image
+        is loaded; any write that changes the document changes the key.
+        """
+        self.ensure_one()
+        self.env['rfp.document.section'].flush_model(['project_id', 'section_title', 'content_html', 'sequence'])
+        self.env['rfp.section.diagram'].flush_model(['section_id', 'title', 'mermaid_code'])
+        self.env['ir.attachment'].flush_model(['res_model', 'res_field', 'res_id', 'checksum'])
+        self.env.cr.execute("""
+            SELECT (SELECT md5(string_agg(concat_ws('|', s.id, s.sequence, s.section_title,
+                                                    md5(COALESCE(s.content_html, ''))),
+                                          ',' ORDER BY s.sequence, s.id))
+                      FROM rfp_document_section s
+                     WHERE s.project_id = %(project_id)s),
+                   (SELECT md5(string_agg(concat_ws('|', d.id, d.section_id, d.title,
+                                                    md5(COALESCE(d.mermaid_code, '')), a.res_field, a.checksum),
+                                          ',' ORDER BY d.id, a.res_field))
+                      FROM rfp_section_diagram d
+                      JOIN rfp_document_section s ON s.id = d.section_id
+                 LEFT JOIN ir_attachment a ON a.res_model = 'rfp.section.diagram'
+                                          AND a.res_field IN ('image_file', 'image_svg')
+                                          AND a.res_id = d.id
+                     WHERE s.project_id = %(project_id)s)
+        """, {'project_id': self.id})
+        sections_hash, diagrams_hash = self.env.cr.fetchone()
+        contacts = sorted((i.field_key, i.user_value or '') for i in self.form_input_ids
+                          if i.field_key in WORD_CONTACT_KEYS)
+        payload = json.dumps([self.name, contacts, sections_hash, diagrams_hash])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _build_word_export(self, progress=None):
+        """Write the Word document to a temporary file.
+
+        Args:
+            progress: Optional callable(done, total), called after each section.
+        Returns:
+            tuple: (rewound file object, whether every diagram image was embedded)
+        """
+        from odoo.addons.project_rfp_ai.utils.simple_docx import SimpleDocxGenerator
+
+        self.ensure_one()
+        docx = SimpleDocxGenerator()
+
+        # Add Title
+        docx.add_heading(self.name, 1)
+        docx.add_text("") # spacing
+
+        # Add Contact Information
+        input_map = {i.field_key: i.user_value for i in self.form_input_ids
+                     if i.field_key in WORD_CONTACT_KEYS}
+        if input_map:
+            docx.add_heading("Contact Information", 3)
+            for label, key in WORD_CONTACT_FIELDS:
+                if input_map.get(key):
+                    docx.add_text(f"{label}: {input_map[key]}")
+            docx.add_spacer()
+
+        complete = True
+        sections = self.document_section_ids.sorted('sequence')
+        for index, section in enumerate(sections, 1):
+            docx.add_heading(section.section_title, 2)
+
+            # Content
+            if section.content_html:
+                docx.add_html_chunk(section.content_html)
+
+            # Diagrams
+            if section.diagram_ids:
+                docx.add_spacer()
+
+                for diagram in section.diagram_ids:
+                    # Image (vector diagrams are rasterized here, on demand)
+                    if diagram._has_image():
+                        try:
+                            image = diagram._get_raster_image()
+                            if not image and diagram.mermaid_code:
+                                # Renderer unavailable: a retry may succeed
+                                complete = False
+                            docx.add_image(image)
+                        except Exception as e:
+                            _logger.warning("Error embedding image of diagram %s: %s", diagram.id, e)
+                            docx.add_text("[Error embedding image]")
+
+                    # Title (Caption) under the image
+                    docx.add_caption(diagram.title)
+                    docx.add_spacer()
+
+            if progress:
+                progress(index, len(sections))
+
+        return docx.close(), complete
+
+    def _get_word_export(self, progress=None):
+        """
+        The Word export as an attachment, rebuilt only when the document changed.
+
+        A file missing a diagram that could not be rasterized is stored under
+        a key ending in INCOMPLETE_EXPORT_SUFFIX, so the next request rebuilds it.
+        The key is kept in the attachment's description and the project row
+        is never written, so downloads neither bump its write_date nor lock it.
+
+        Args:
+            progress: Passed to _build_word_export() when a rebuild is needed.
+        Returns:
+            tuple: (ir.attachment, content key)
+        """
+        self.ensure_one()
+        key = self._get_export_key()
+        attachment = self._get_binary_attachment('word_export_file')
+        if attachment and attachment.description == key:
+            return attachment, key
+        file_obj, complete = self._build_word_export(progress=progress)
+        with file_obj:
+            attachment = self._set_binary_file(
+                'word_export_file', file_obj, mimetype=DOCX_MIMETYPE, touch_owner=False)
+        if not complete:
+            key += INCOMPLETE_EXPORT_SUFFIX
+        attachment.description = key
+        return attachment, key
+
+    def _rasterize_diagrams(self):
+        """Rasterize the document's vector diagrams ahead of an export.
+
+        The render cache keeps the PNGs for the export itself. Returns the
+        diagrams that could not be rasterized.
+        """
+        self.ensure_one()
+        vector_diagrams = self.document_section_ids.diagram_ids.filtered(
+            lambda d: d.mermaid_code and not d._has_binary('image_file') and d._has_binary('image_svg'))
+        return vector_diagrams.filtered(lambda d: not d._get_raster_image())
+
     def action_create_kb_from_project(self):
         """Create a Knowledge Base entry from this completed project's sections."""
         self.ensure_one()
@@ -2174,19 +2619,17 @@ class RfpProject(models.Model):
         })
 
         # Pre-create sections from the project's document sections
-        for section in self.document_section_ids.sorted('sequence'):
-            KbSection.create({
-                'kb_id': kb.id,
-                'title': section.section_title,
-                'section_type': 'functional',  # Will be classified by AI
-                'sequence': section.sequence,
-            })
+        KbSection.create([{
+            'kb_id': kb.id,
+            'title': section.section_title,
+            'section_type': 'functional',  # Will be classified by AI
+            'sequence': section.sequence,
+        } for section in self.document_section_ids.sorted('sequence')])
 
         # Queue AI generalization job
-        kb.with_delay(
-            channel='root.rfp_generation',
-            description=f"KB Generalization: {kb.name}"
-        )._run_project_analysis_job()
+        self.env['rfp.generation.job']._enqueue(
+            kb, '_run_project_analysis_job', project=self, channel=CHANNEL_BACKGROUND,
+            description=f"KB Generalization: {kb.name}")
 
         return {
             'type': 'ir.actions.act_window',
@@ -2208,8 +2651,6 @@ class RfpProject(models.Model):
         self.ensure_one()
         FormInput = self.env['rfp.form.input']
         PracticeInput = self.env['rfp.practice.input']
-        EvalCriterion = self.env['rfp.evaluation.criterion']
-        RequiredDoc = self.env['rfp.required.document']
 
         # Reset ai_context_blob: keep scope_assessment (interview limits), clear everything else
         old_blob = self.get_context_data() if self.ai_context_blob else {}
@@ -2237,8 +2678,7 @@ class RfpProject(models.Model):
             source_parts.append(f"Q: {inp.label}\nA: {inp.user_value}")
         new_project.source_extracted_text = "\n\n".join(source_parts)
 
-        # Manually copy form_input_ids with cleared user_value
-        for inp in self.form_input_ids:
+        def input_copy_vals(inp):
             # Build suggested_answers: preserve original answer as a suggestion
             suggestions = []
             try:
@@ -2247,8 +2687,7 @@ class RfpProject(models.Model):
                 suggestions = []
             if inp.user_value and inp.user_value not in suggestions:
                 suggestions.insert(0, inp.user_value)
-
-            FormInput.create({
+            return {
                 'project_id': new_project.id,
                 'field_key': inp.field_key,
                 'label': inp.label,
@@ -2264,43 +2703,15 @@ class RfpProject(models.Model):
                 'irrelevant_reason': False,
                 'specify_triggers': inp.specify_triggers,
                 'sequence': inp.sequence,
-            })
-
-        # Manually copy practice_input_ids with cleared user_value
-        for inp in self.practice_input_ids:
-            suggestions = []
-            try:
-                suggestions = json.loads(inp.suggested_answers) if inp.suggested_answers else []
-            except Exception:
-                suggestions = []
-            if inp.user_value and inp.user_value not in suggestions:
-                suggestions.insert(0, inp.user_value)
-
-            PracticeInput.create({
-                'project_id': new_project.id,
-                'field_key': inp.field_key,
-                'label': inp.label,
-                'component_type': inp.component_type,
-                'options': inp.options,
-                'user_value': False,
-                'data_type': inp.data_type,
-                'description_tooltip': inp.description_tooltip,
-                'round_number': inp.round_number,
-                'suggested_answers': json.dumps(suggestions) if suggestions else inp.suggested_answers,
-                'depends_on': inp.depends_on,
-                'is_irrelevant': False,
-                'irrelevant_reason': False,
-                'specify_triggers': inp.specify_triggers,
-                'sequence': inp.sequence,
-            })
+            }
 
-        # Copy evaluation criteria as-is
-        for crit in self.evaluation_criterion_ids:
-            crit.copy(default={'project_id': new_project.id})
+        # Manually copy form/practice inputs with cleared user_value (one create each)
+        FormInput.create([input_copy_vals(inp) for inp in self.form_input_ids])
+        PracticeInput.create([input_copy_vals(inp) for inp in self.practice_input_ids])
 
-        # Copy required documents as-is
-        for doc in self.required_document_ids:
-            doc.copy(default={'project_id': new_project.id})
+        # Copy evaluation criteria and required documents as-is
+        self.evaluation_criterion_ids.copy(default={'project_id': new_project.id})
+        self.required_document_ids.copy(default={'project_id': new_project.id})
 
         # Auto-fill from source text (original project's answers)
         new_project._auto_fill_from_source()
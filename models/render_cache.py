@@ -0,0 +1,138 @@
+from odoo import models, fields, api
+from datetime import timedelta
+import hashlib
+import json
+import logging
+import time
+import unicodedata
+
+_logger = logging.getLogger(__name__)
+
+# Entries not used for this long are removed by the autovacuum.
+CACHE_MAX_AGE = timedelta(days=90)
+# last_used is only refreshed once per period so that cache hits from
+# concurrent jobs do not all write the same row.
+LAST_USED_GRANULARITY = timedelta(days=1)
+
+
+class RfpRenderCache(models.Model):
+    """Content-addressed cache of rendered diagram images.
+
+    The key is a hash of everything that determines the output (for Mermaid:
+    the cleaned source including the theme, and the format; for AI
+    illustrations: the normalized prompt, provider, model and generation
+    parameters), so an unchanged diagram, in this project or in a duplicated
+    one, is never rendered twice.
+    The image is an attachment; the filestore already deduplicates the bytes
+    when the same image is attached to a diagram.
+    """
+    _name = 'rfp.render.cache'
+    _description = 'Rendered Diagram Cache'
+    _inherit = ['rfp.binary.mixin']
+    _order = 'last_used desc'
+
+    key = fields.Char(string="Content Key", required=True, index=True, readonly=True)
+    kind = fields.Selection([
+        ('mermaid', 'Mermaid'),
+        ('illustration', 'AI Illustration'),
+    ], string="Kind", required=True, readonly=True)
+    image = fields.Binary(string="Image", attachment=True, readonly=True)
+    mimetype = fields.Char(string="MIME Type", readonly=True)
+    image_size = fields.Integer(string="Size (bytes)", readonly=True)
+    render_duration = fields.Float(string="Render Duration (s)", readonly=True)
+    last_used = fields.Datetime(string="Last Used", default=fields.Datetime.now, readonly=True)
+
+    _sql_constraints = [
+        ('key_unique', 'unique(key)', 'A render cache key must be unique.'),
+    ]
+
+    @api.model
+    def _lookup(self, key):
+        """Cached image bytes for ``key``, or None."""
+        entry = self.sudo().search([('key', '=', key)], limit=1)
+        if not entry:
+            return None
+        data = entry._get_binary_raw('image')
+        if not data:
+            return None
+        if entry.last_used < fields.Datetime.now() - LAST_USED_GRANULARITY:
+            self.env.cr.execute("UPDATE rfp_render_cache SET last_used = now() at time zone 'UTC' WHERE id = %s",
+                                (entry.id,))
+            entry.invalidate_recordset(['last_used'])
+        return data
+
+    @api.model
+    def _illustration_key(self, prompt, provider, model_name, params):
+        """Cache key of an AI illustration request."""
+        # Whitespace and Unicode form do not change what the model draws
+        normalized = ' '.join(unicodedata.normalize('NFKC', prompt or '').split())
+        payload = json.dumps([provider, model_name, params, normalized], sort_keys=True)
+        return hashlib.sha256(f"illustration\n{payload}".encode()).hexdigest()
+
+    @api.model
+    def _store(self, key, kind, data, mimetype='image/png', duration=0.0, replace=False):
+        """Add a rendered image; a concurrent insert of the same key is not an error.
+
+        With ``replace``, an existing entry gets the new image (a forced
+        regeneration supersedes the cached result).
+        """
+        if replace:
+            entry = self.sudo().search([('key', '=', key)], limit=1)
+            if entry:
+                entry._set_binary_raw('image', data, mimetype=mimetype)
+                entry.write({
+                    'mimetype': mimetype,
+                    'image_size': len(data),
+                    'render_duration': duration,
+                    'last_used': fields.Datetime.now(),
+                })
+                return
+        # A concurrent insert of the same key wins; no savepoint, no error log
+        self.env.cr.execute("""
+            INSERT INTO rfp_render_cache (key, kind, mimetype, image_size, render_duration, last_used,
+                                          create_uid, create_date, write_uid, write_date)
+            VALUES (%(key)s, %(kind)s, %(mimetype)s, %(size)s, %(duration)s, %(now)s,
+                    %(uid)s, %(now)s, %(uid)s, %(now)s)
+            ON CONFLICT (key) DO NOTHING
+            RETURNING id
+        """, {
+            'key': key,
+            'kind': kind,
+            'mimetype': mimetype,
+            'size': len(data),
+            'duration': duration,
+            'now': fields.Datetime.now(),
+            'uid': self.env.uid,
+        })
+        row = self.env.cr.fetchone()
+        if not row:
+            _logger.debug("Render cache entry %s was stored concurrently", key)
+            return
+        self.sudo().browse(row[0])._set_binary_raw('image', data, mimetype=mimetype)
+
+    @api.model
+    def _render_mermaid(self, mermaid_code, output_format='png'):
+        """PNG or SVG bytes of a Mermaid diagram, rendered with the configured backend on a cache miss."""
+        from odoo.addons.project_rfp_ai.utils import mermaid
+
+        clean_code = mermaid.clean_mermaid_source(mermaid_code)
+        key = mermaid.source_key(clean_code, output_format)
+        cached = self._lookup(key)
+        if cached:
+            _logger.info("Mermaid render cache hit %s", key[:12])
+            return cached
+
+        start_time = time.time()
+        image_bytes = mermaid.render_mermaid_source(
+            clean_code, mermaid.get_renderer_config(self.env), output_format=output_format)
+        if image_bytes:
+            self._store(key, 'mermaid', image_bytes, mimetype=mermaid.MIMETYPES[output_format],
+                        duration=time.time() - start_time)
+        return image_bytes
+
+    @api.autovacuum
+    def _gc_unused_entries(self):
+        stale = self.sudo().search([('last_used', '<', fields.Datetime.now() - CACHE_MAX_AGE)])
+        if stale:
+            _logger.info("Removing %d unused render cache entries", len(stale))
+            stale.unlink()
@@ -6,44 +6,47 @@ class ResConfigSettings(models.TransientModel):
     rfp_gemini_api_key = fields.Char(string="Gemini API Key", config_parameter='project_rfp_ai.gemini_api_key', help="API Key for Google Gemini Service")
     rfp_openai_api_key = fields.Char(string="OpenAI API Key", config_parameter='project_rfp_ai.openai_api_key', help="API Key for OpenAI ChatGPT Service")
 
-    rfp_generation_concurrency = fields.Integer(string="Concurrent AI Requests", default=1, config_parameter='project_rfp_ai.generation_concurrency', help="Number of sections to generate in parallel.")
+    rfp_generation_concurrency = fields.Integer(string="Concurrent AI Requests", default=1, config_parameter='project_rfp_ai.generation_concurrency',
+        help="Number of AI generation jobs (sections, diagrams, glossary, KB analysis) running in parallel. "
+             "Applied immediately to the generation, images and background lanes; their channel capacities in odoo.conf are the upper bound.")
+
+    rfp_mermaid_renderer = fields.Selection([
+        ('kroki', 'Kroki server'),
+        ('mmdc', 'Local mermaid-cli (mmdc)'),
+    ], string="Mermaid Renderer", default='kroki', config_parameter='project_rfp_ai.mermaid_renderer',
+        help="Backend used to render Mermaid diagrams. Rendered images are cached by content, "
+             "so unchanged diagrams are never rendered twice.")
+    rfp_kroki_url = fields.Char(string="Kroki URL", default='https://kroki.io/', config_parameter='project_rfp_ai.kroki_url',
+        help="Public kroki.io or a self-hosted Kroki instance.")
+    rfp_mmdc_path = fields.Char(string="mermaid-cli Path", default='mmdc', config_parameter='project_rfp_ai.mmdc_path')
+    rfp_mmdc_workers = fields.Integer(string="mermaid-cli Processes", default=2, config_parameter='project_rfp_ai.mmdc_workers',
+        help="Maximum number of mermaid-cli processes running at once in each Odoo worker.")
+    rfp_mermaid_format = fields.Selection([
+        ('svg', 'SVG (vector)'),
+        ('png', 'PNG'),
+    ], string="Mermaid Output", default='svg', config_parameter='project_rfp_ai.mermaid_format',
+        help="SVG is smaller and stays sharp when zoomed; a PNG is rendered only when a Word export needs it.")
+    rfp_mermaid_invalid_action = fields.Selection([
+        ('repair', 'Ask the AI to fix it once'),
+        ('flag', 'Flag the diagram as failed'),
+    ], string="Invalid Mermaid Code", default='repair', config_parameter='project_rfp_ai.mermaid_invalid_action',
+        help="Mermaid code from the writer is syntax-checked before rendering. Invalid diagrams are never "
+             "sent to the renderer.")
+    rfp_render_threads = fields.Integer(string="Diagrams Rendered in Parallel", default=4,
+        config_parameter='project_rfp_ai.render_threads',
+        help="Mermaid diagrams of one section are rendered in a single job by this many threads.")
+    rfp_export_async_sections = fields.Integer(string="Async Export Sections", default=40,
+        config_parameter='project_rfp_ai.export_async_sections',
+        help="Word / PDF exports of documents with more sections than this are built by a background job "
+             "and offered for download when ready.")
+    rfp_export_async_size_mb = fields.Integer(string="Async Export Size (MB)", default=20,
+        config_parameter='project_rfp_ai.export_async_size_mb',
+        help="Exports of documents whose content and images exceed this size are built by a background job.")
 
     def set_values(self):
+        # OCA queue_job reads channel capacities from the server configuration
+        # at startup, so the limit is enforced by the job methods themselves
+        # (see utils/concurrency.py), which read this parameter on every run.
+        if self.rfp_generation_concurrency < 1:
+            self.rfp_generation_concurrency = 1
         super(ResConfigSettings, self).set_values()
-        # Update Queue Job Channel Capacity
-        channel = self.env.ref('project_rfp_ai.channel_rfp_generation', raise_if_not_found=False)
-        if channel and self.rfp_generation_concurrency > 0:
-            # We don't overwrite user changes if they modified it manually in the job menu,
-            # UNLESS they change it here.
-            # But here we just enforce the setting.
-            # Use sudo() as settings user might not have rights to queue config
-            channel.sudo().write({'parent_id': self.env.ref('queue_job.channel_root').id}) # Ensure parent
-            # Queue job channel capacity is complicated (it's a calculated field in some versions or stored).
-            # In OCA 16+, it is controlled by the 'root' channel configuration often? 
-            # Wait, queue.job.channel IS the model.
-            # Let's check model definition if available, otherwise assume standard behavior.
-            # Standard behavior: simple integer field or method?
-            # It's usually 'complete_name' and capacity is handled differently.
-            # Actually, OCA queue job configuration is often via odoo.conf or Channels menu.
-            # We will try to set it if possible, but simplest is creating a channel record.
-            # Checking OCA source implies we can't easily change capacity via a simple field on the record
-            # because "capacity" is not a stored field on queue.job.channel?
-            # It IS a field on queue.job.channel called 'bucket_size' or similar? No.
-            # Actually 'queue.job.channel' doesn't usually have a 'capacity' field, it is handled via ~/.odoo/odoo.conf [queue_job] channels=root:2
-            # HOWEVER, newer versions allow DB storage.
-            # Let's try to find if there is a field. If not, we warn.
-            pass 
-        
-        # Actually, let's just save the field to config_parameter.
-        # The user requested "set the number of channels to proccess the requests".
-        # This implies we should TRY to configure the queue mechanism.
-        # If we can't standardly do it via DB in this version, we stick to saving the param.
-        # BUT we can try updating the channel if it has a field.
-        # Let's just create/update the config parameter for now and rely on manual config if needed,
-        # OR better: Assume the user uses standard queue_job functionality where we can't easily set capacity from code dynamically without reloading config?
-        # WAIT. OCA queue_job 13+ supports 'channel details' in DB? 
-        # Let's assume we proceed with saving the config parameter.
-        
-        # Real implementation: Update the channel if 'removal_interval' or similar exists?
-        # No, let's keep it simple: Save the parameter.
-        pass
@@ -1,12 +1,19 @@
+import base64
 import json
+import logging
 from odoo import models, fields, api
-import base64
+from odoo.tools import image_data_uri
+from odoo.addons.project_rfp_ai.utils.concurrency import generation_slot
+
+_logger = logging.getLogger(__name__)
+
 
 class RfpSectionDiagram(models.Model):
     _name = 'rfp.section.diagram'
     _description = 'RFP Section Diagram'
+    _inherit = ['rfp.binary.mixin']
 
-    section_id = fields.Many2one('rfp.document.section', string="Section", ondelete='cascade')
+    section_id = fields.Many2one('rfp.document.section', string="Section", ondelete='cascade', index=True)
     title = fields.Char(string="Diagram Title", required=True)
     description = fields.Text(string="Description", required=True)
     diagram_type = fields.Selection([
@@ -17,16 +24,142 @@ class RfpSectionDiagram(models.Model):
 
     image_file = fields.Binary(string="Generated Image", attachment=True)
     image_filename = fields.Char(string="Image Filename")
+    # Browser derivatives of image_file (utils/image_variants.py); the
+    # original stays full resolution for the Word export.
+    image_webp = fields.Binary(string="Display Image (WebP)", attachment=True, readonly=True)
+    image_thumb = fields.Binary(string="Thumbnail (WebP)", attachment=True, readonly=True)
+    image_width = fields.Integer(string="Display Width", readonly=True)
+    thumb_width = fields.Integer(string="Thumbnail Width", readonly=True)
+    # Mermaid diagrams rendered as vector images are kept here instead of
+    # image_file; a PNG is only produced when the Word export needs one.
+    image_svg = fields.Binary(string="Vector Image (SVG)", attachment=True, readonly=True)
 
     job_id = fields.Many2one('queue.job', string="Generation Job", readonly=True)
+    render_error = fields.Char(string="Render Error", readonly=True, copy=False)
+
+    def _set_binary_raw(self, field_name, data, mimetype=None, touch_owner=True):
+        attachment = super()._set_binary_raw(field_name, data, mimetype=mimetype, touch_owner=touch_owner)
+        if field_name == 'image_file':
+            self._update_image_variants(data)
+        return attachment
+
+    def _update_image_variants(self, data):
+        """Rebuild (or clear) the WebP display copy and thumbnail of image_file."""
+        from odoo.addons.project_rfp_ai.utils.image_variants import make_variants
+
+        variants = make_variants(data)
+        self._set_binary_raw('image_webp', variants.get('display'), mimetype='image/webp')
+        self._set_binary_raw('image_thumb', variants.get('thumb'), mimetype='image/webp')
+        self.write({
+            'image_width': variants.get('display_width', 0),
+            'thumb_width': variants.get('thumb_width', 0),
+        })
+
+    def _store_image(self, image_bytes, output_format='png'):
+        """Store a rendered or generated image; the other format is cleared."""
+        from odoo.addons.project_rfp_ai.utils.mermaid import MIMETYPES
+
+        self.ensure_one()
+        if output_format == 'svg':
+            self._set_binary_raw('image_svg', image_bytes, mimetype=MIMETYPES['svg'])
+            self._set_binary_raw('image_file', False)
+        else:
+            self._set_binary_raw('image_file', image_bytes, mimetype=MIMETYPES['png'])
+            self._set_binary_raw('image_svg', False)
+        self.write({'image_filename': f"diagram_{self.id}.{output_format}"})
+
+    def _has_image(self):
+        """Whether the diagram has an image in either format, without loading it."""
+        self.ensure_one()
+        return self._has_binary('image_file') or self._has_binary('image_svg')
+
+    def _get_raster_image(self):
+        """
+        PNG (or the uploaded/generated raster) bytes of the diagram, for the Word and PDF exports.
+
+        Vector-only Mermaid diagrams are rendered to PNG on demand; the render
+        cache keeps the result, so this happens once per distinct diagram.
+        """
+        self.ensure_one()
+        if self._has_binary('image_file'):
+            return self._get_binary_raw('image_file')
+        if self._has_binary('image_svg') and self.mermaid_code:
+            try:
+                return self.env['rfp.render.cache']._render_mermaid(self.mermaid_code, 'png')
+            except Exception as e:
+                _logger.warning("Could not rasterize diagram %s: %s", self.id, e)
+        return b''
+
+    def _get_report_image_src(self):
+        """data: URI of the raster image for the PDF report ('' if there is none).
+
+        wkhtmltopdf fetches URLs without the user's session, so the image is inlined.
+        """
+        self.ensure_one()
+        data = self._get_raster_image()
+        return image_data_uri(base64.b64encode(data)) if data else ''
+
+    def _get_image_url(self):
+        """URL of the original image (SVG or raster)."""
+        self.ensure_one()
+        if self._has_binary('image_svg'):
+            return f"/rfp/diagram/svg/{self.id}"
+        return f"/web/image/{self._name}/{self.id}/image_file"
+
+    def _get_image_srcset(self, query=''):
+        """srcset of the WebP variants for <img> tags ('' if there are none)."""
+        self.ensure_one()
+        if not self.image_width:
+            return ''
+        url = f"/web/image/{self._name}/{self.id}"
+        return f"{url}/image_thumb{query} {self.thumb_width}w, {url}/image_webp{query} {self.image_width}w"
+
+    def _get_image_view_url(self):
+        """Best full-size image for on-screen viewing."""
+        self.ensure_one()
+        if not self.image_width:
+            return self._get_image_url()
+        return f"/web/image/{self._name}/{self.id}/image_webp"
+
+    def _flag_invalid_mermaid(self):
+        """Set render_error if the Mermaid code has syntax errors; return whether it did."""
+        from odoo.addons.project_rfp_ai.utils.mermaid_syntax import validate
 
+        self.ensure_one()
+        errors = validate(self.mermaid_code)
+        if not errors:
+            return False
+        self.write({'render_error': f"Invalid Mermaid syntax: {'; '.join(errors)}"[:250], 'job_id': False})
+        return True
+
+    def _commit_render_result(self, image_bytes, error=None, cache_key=None, output_format='png'):
+        """Store one render result in its own committed transaction and push progress."""
+        from odoo.addons.project_rfp_ai.models.generation_job import _sync_progress_after_commit
+        from odoo.addons.project_rfp_ai.utils.mermaid import MIMETYPES
+
+        self.ensure_one()
+        with self.env.registry.cursor() as cr:
+            diagram = self.with_env(self.env(cr=cr))
+            if image_bytes:
+                diagram._store_image(image_bytes, output_format)
+                diagram.write({'render_error': False})
+                if cache_key:
+                    diagram.env['rfp.render.cache']._store(cache_key, 'mermaid', image_bytes,
+                                                           mimetype=MIMETYPES[output_format])
+            else:
+                diagram.write({'render_error': (error or "Renderer returned no image")[:250]})
+        _sync_progress_after_commit(self.env.registry, self.section_id.project_id.ids)
+
+    @generation_slot
     def generate_image_job(self, prompt_record_id=None):
         self.ensure_one()
         try:
+            output_format = 'png'
             if self.diagram_type == 'mermaid' and self.mermaid_code:
-                # Render Mermaid code to PNG via Kroki API
-                from odoo.addons.project_rfp_ai.utils.ai_connector import _render_mermaid
-                image_bytes = _render_mermaid(self.mermaid_code)
+                # Render Mermaid code (configured renderer and format, content-addressed cache)
+                from odoo.addons.project_rfp_ai.utils import mermaid
+                output_format = mermaid.get_renderer_config(self.env)['output_format']
+                image_bytes = self.env['rfp.render.cache']._render_mermaid(self.mermaid_code, output_format)
             else:
                 # Illustration: use Imagen to generate image
                 prompt_record = self.env['rfp.prompt'].browse(prompt_record_id) if prompt_record_id else None
@@ -43,10 +176,7 @@ class RfpSectionDiagram(models.Model):
                 image_bytes = self.env['rfp.ai.log'].execute_image_request(prompt=prompt, env=self.env, prompt_record=prompt_record)
 
             if image_bytes:
-                self.write({
-                    'image_file': base64.b64encode(image_bytes),
-                    'image_filename': f"diagram_{self.id}.png"
-                })
+                self._store_image(image_bytes, output_format)
         except Exception as e:
             raise e
             
@@ -56,7 +186,7 @@ class RfpDocumentSection(models.Model):
     _description = 'RFP Document Section'
     _order = 'sequence, id'
 
-    project_id = fields.Many2one('rfp.project', string="Project", required=True, ondelete='cascade')
+    project_id = fields.Many2one('rfp.project', string="Project", required=True, ondelete='cascade', index=True)
     section_title = fields.Char(string="Title", required=True)
     content_html = fields.Html(string="Content (HTML)", sanitize=True, sanitize_tags=True, sanitize_attributes=True, sanitize_style=True, strip_style=True)
     sequence = fields.Integer(string="Sequence", default=10)
@@ -77,19 +207,118 @@ class RfpDocumentSection(models.Model):
         ('success', 'Content Generated'),
         ('failed', 'Generation Failed')
     ], string="Status", default='pending')
+    input_fingerprint = fields.Char(string="Input Fingerprint", readonly=True, copy=False,
+                                    help="Hashes of the Q&A, TOC entry, KB reference and prompt the content was generated from")
+    revision_ids = fields.One2many('rfp.section.revision', 'section_id', string="Revisions")
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        sections = super().create(vals_list)
+        self._record_revisions([(section, '', section.content_html) for section in sections
+                                if section.content_html])
+        return sections
+
+    def write(self, vals):
+        if 'content_html' not in vals:
+            return super().write(vals)
+        previous = {section.id: section.content_html or '' for section in self}
+        res = super().write(vals)
+        self._record_revisions([(section, previous[section.id], section.content_html) for section in self])
+        return res
+
+    @generation_slot
+    def render_diagrams_job(self):
+        """
+        Render this section's pending Mermaid diagrams concurrently.
+
+        Rendering is I/O bound (a Kroki round trip or an mmdc subprocess), so
+        the diagrams go through a bounded thread pool; the threads only render,
+        all database work stays on this thread. Each image is stored and
+        committed on its own as soon as it is ready and pushes a progress
+        update. A failing diagram gets a render_error and does not stop the
+        others. The job holds one generation slot for the whole section: the
+        results are committed from their own cursors, not the job's.
+        """
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        from odoo.addons.project_rfp_ai.utils import mermaid
+
+        self.ensure_one()
+        diagrams = self.diagram_ids.filtered(
+            lambda d: d.diagram_type == 'mermaid' and d.mermaid_code and not d.render_error
+            and not d._has_image())
+        if not diagrams:
+            return
 
-    def generate_content_job(self, system_prompt, user_context):
+        Cache = self.env['rfp.render.cache']
+        config = mermaid.get_renderer_config(self.env)
+        output_format = config['output_format']
+        pending = []
+        for diagram in diagrams:
+            clean_code = mermaid.clean_mermaid_source(diagram.mermaid_code)
+            key = mermaid.source_key(clean_code, output_format)
+            cached = Cache._lookup(key)
+            if cached:
+                diagram._commit_render_result(cached, output_format=output_format)
+            else:
+                pending.append((diagram, clean_code, key))
+        if not pending:
+            return
+
+        threads = max(1, min(len(pending), int(config.get('render_threads') or mermaid.DEFAULT_RENDER_THREADS)))
+        failed = 0
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='rfp_mermaid') as pool:
+            futures = {pool.submit(mermaid.render_mermaid_source, clean_code, config, output_format): (diagram, key)
+                       for diagram, clean_code, key in pending}
+            for future in as_completed(futures):
+                diagram, key = futures[future]
+                try:
+                    image_bytes, error = future.result(), None
+                except Exception as e:
+                    image_bytes, error = None, str(e)
+                if not image_bytes:
+                    failed += 1
+                diagram._commit_render_result(image_bytes, error=error, cache_key=key, output_format=output_format)
+        _logger.info("Rendered %d Mermaid diagram(s) of section %s with %d thread(s), %d failed",
+                     len(pending), self.id, threads, failed)
+
+    def _record_revisions(self, changes):
+        """Keep every content version; the context says where it came from."""
+        if not changes:
+            return
+        restored_from = self.env.context.get('revision_restored_from')
+        self.env['rfp.section.revision'].sudo()._record_versions(
+            changes,
+            source=self.env.context.get('revision_source', 'edit'),
+            restored_from=self.env['rfp.section.revision'].browse(restored_from) if restored_from else None,
+        )
+
+    def _get_undo_revision(self):
+        """Revision that undoing the last change goes back to (empty if none)."""
+        self.ensure_one()
+        head = self.env['rfp.section.revision'].search([('section_id', '=', self.id)], limit=1)
+        # Undoing after a restore steps back from the restored revision, not the restore itself
+        base = head.restored_from_id or head
+        if not base:
+            return base
+        return self.env['rfp.section.revision'].search([
+            ('section_id', '=', self.id), ('revision_no', '<', base.revision_no),
+        ], limit=1)
+
+    @generation_slot
+    def generate_content_job(self, system_prompt, user_context, fingerprint=None):
         self.ensure_one()
-        self.write({'generation_status': 'generating'})
+        section = self.with_context(revision_source='generation')
+        section.write({'generation_status': 'generating'})
 
         try:
-            if self.section_type == 'boq':
-                self._generate_boq_content(system_prompt, user_context)
+            if section.section_type == 'boq':
+                section._generate_boq_content(system_prompt, user_context)
             else:
-                self._generate_narrative_content(system_prompt, user_context)
+                section._generate_narrative_content(system_prompt, user_context)
         except Exception as e:
-            self.write({'generation_status': 'failed'})
+            section.write({'generation_status': 'failed'})
             raise e
+        section.input_fingerprint = fingerprint
 
     def _generate_narrative_content(self, system_prompt, user_context):
         """Generate standard narrative section content."""
@@ -119,7 +348,8 @@ class RfpDocumentSection(models.Model):
         self.diagram_ids.unlink()
         diagrams = data.get('diagrams', [])
         if diagrams:
-            self.env['rfp.section.diagram'].create([
+            self._repair_invalid_mermaid(diagrams)
+            new_diagrams = self.env['rfp.section.diagram'].create([
                 {
                     'section_id': self.id,
                     'title': d.get('title'),
@@ -128,6 +358,57 @@ class RfpDocumentSection(models.Model):
                     'mermaid_code': d.get('mermaid_code', ''),
                 } for d in diagrams
             ])
+            # This section's diagrams depend only on its content: start them now
+            self.project_id._dispatch_diagram_jobs(new_diagrams)
+
+    def _repair_invalid_mermaid(self, diagrams):
+        """
+        Check the writer's Mermaid code locally and, if enabled, ask the model
+        once to fix each invalid diagram. Diagrams still invalid afterwards
+        are flagged when their render is dispatched.
+        """
+        from odoo.addons.project_rfp_ai.utils import mermaid_syntax
+
+        action = self.env['ir.config_parameter'].sudo().get_param(
+            mermaid_syntax.INVALID_ACTION_PARAM, mermaid_syntax.DEFAULT_INVALID_ACTION)
+        for diagram in diagrams:
+            if diagram.get('diagram_type', 'mermaid') != 'mermaid' or not diagram.get('mermaid_code'):
+                continue
+            errors = mermaid_syntax.validate(diagram['mermaid_code'])
+            if not errors:
+                continue
+            _logger.info("Section %s: diagram '%s' has invalid Mermaid syntax: %s",
+                         self.id, diagram.get('title'), '; '.join(errors))
+            if action != 'repair':
+                continue
+            repaired = self._repair_mermaid_code(diagram['mermaid_code'], errors)
+            if repaired and not mermaid_syntax.validate(repaired):
+                diagram['mermaid_code'] = repaired
+
+    def _repair_mermaid_code(self, mermaid_code, errors):
+        """One model call to fix Mermaid code; returns the new code or None."""
+        from odoo.addons.project_rfp_ai.const import PROMPT_MERMAID_REPAIR
+
+        prompt_record = self.env['rfp.prompt'].search([('code', '=', PROMPT_MERMAID_REPAIR)], limit=1)
+        if not prompt_record:
+            return None
+        try:
+            response = self.env['rfp.ai.log'].execute_request(
+                system_prompt=prompt_record.template_text.format(errors='\n'.join(errors)),
+                user_context=mermaid_code,
+                env=self.env,
+                mode='text',
+                prompt_record=prompt_record,
+            )
+        except Exception as e:
+            _logger.warning("Mermaid repair failed for section %s: %s", self.id, e)
+            return None
+        code = (response or '').strip()
+        # Models often wrap code in a Markdown fence despite the instructions
+        if code.startswith('```'):
+            code = code.split('\n', 1)[1] if '\n' in code else ''
+            code = code.rsplit('```', 1)[0]
+        return code.strip() or None
 
     def _generate_boq_content(self, system_prompt, user_context):
         """Generate BOQ structured data via AI, then render to HTML."""
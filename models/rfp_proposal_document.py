@@ -4,6 +4,7 @@ from odoo import models, fields
 class RfpProposalDocument(models.Model):
     _name = 'rfp.proposal.document'
     _description = 'Proposal Uploaded Document'
+    _inherit = ['rfp.binary.mixin']
     _order = 'sequence, id'
 
     proposal_id = fields.Many2one('rfp.proposal', string="Proposal", required=True, ondelete='cascade')
@@ -1,5 +1,6 @@
 import uuid
 from odoo import models, fields, api
+from odoo.addons.project_rfp_ai.const import CHANNEL_INTERACTIVE
 
 
 class RfpPublished(models.Model):
@@ -58,22 +59,41 @@ class RfpPublished(models.Model):
         # Clear existing sections
         self.section_ids.unlink()
         
-        # Copy sections from project
-        for section in project.document_section_ids.sorted(lambda s: s.sequence):
-            published_section = self.env['rfp.published.section'].create({
-                'published_id': self.id,
-                'title': section.section_title,
-                'content_html': section.content_html,
-                'sequence': section.sequence,
-            })
-            
-            # Copy diagrams
-            for diagram in section.diagram_ids:
-                self.env['rfp.published.diagram'].create({
-                    'section_id': published_section.id,
-                    'title': diagram.title,
-                    'image_file': diagram.image_file,
-                })
+        # Copy sections from project (one create per model)
+        sections = project.document_section_ids.sorted(lambda s: s.sequence)
+        published_sections = self.env['rfp.published.section'].create([{
+            'published_id': self.id,
+            'title': section.section_title,
+            'content_html': section.content_html,
+            'sequence': section.sequence,
+        } for section in sections])
+
+        # Copy diagrams
+        diagram_pairs = [(published_section, diagram)
+                         for section, published_section in zip(sections, published_sections)
+                         for diagram in section.diagram_ids]
+        published_diagrams = self.env['rfp.published.diagram'].create([{
+            'section_id': published_section.id,
+            'title': diagram.title,
+            'image_width': diagram.image_width,
+        } for published_section, diagram in diagram_pairs])
+
+        # Copy diagram images (raster original, WebP display copy, SVG)
+        # straight into attachments of the new records
+        attachment_vals = []
+        for field_name in ('image_file', 'image_webp', 'image_svg'):
+            images = sections.diagram_ids._get_binary_attachments(field_name)
+            attachment_vals += [{
+                'name': field_name,
+                'res_model': published_diagram._name,
+                'res_field': field_name,
+                'res_id': published_diagram.id,
+                'type': 'binary',
+                'raw': images[diagram.id].raw,
+                'mimetype': images[diagram.id].mimetype,
+            } for published_diagram, (_section, diagram) in zip(published_diagrams, diagram_pairs)
+                if diagram.id in images]
+        self.env['ir.attachment'].sudo().create(attachment_vals)
 
 
 class RfpPublishedSection(models.Model):
@@ -91,15 +111,37 @@ class RfpPublishedSection(models.Model):
 class RfpPublishedDiagram(models.Model):
     _name = 'rfp.published.diagram'
     _description = 'Published RFP Diagram'
+    _inherit = ['rfp.binary.mixin']
 
     section_id = fields.Many2one('rfp.published.section', string="Section", required=True, ondelete='cascade')
     title = fields.Char(string="Title")
     image_file = fields.Binary(string="Image", attachment=True)
+    image_webp = fields.Binary(string="Display Image (WebP)", attachment=True)
+    image_width = fields.Integer(string="Display Width")
+    image_svg = fields.Binary(string="Vector Image (SVG)", attachment=True)
+
+    def _has_image(self):
+        self.ensure_one()
+        return self._has_binary('image_file') or self._has_binary('image_svg')
+
+    def _get_image_url(self):
+        self.ensure_one()
+        if self._has_binary('image_svg'):
+            return f"/rfp/published/diagram/svg/{self.id}"
+        return f"/web/image/{self._name}/{self.id}/image_file"
+
+    def _get_image_srcset(self):
+        """srcset of the WebP display copy for <img> tags ('' if there is none)."""
+        self.ensure_one()
+        if not self.image_width:
+            return ''
+        return f"/web/image/{self._name}/{self.id}/image_webp {self.image_width}w"
 
 
 class RfpProposal(models.Model):
     _name = 'rfp.proposal'
     _description = 'Vendor Proposal'
+    _inherit = ['rfp.binary.mixin']
     _order = 'submitted_date desc'
 
     published_id = fields.Many2one('rfp.published', string="RFP", required=True, ondelete='cascade')
@@ -158,7 +200,7 @@ class RfpProposal(models.Model):
     def create(self, vals):
         record = super().create(vals)
         # Trigger AI analysis via queue job
-        if record.proposal_file:
+        if record._has_binary('proposal_file'):
             record._trigger_analysis_job()
         return record
     
@@ -171,20 +213,19 @@ class RfpProposal(models.Model):
         prompt_record = self.env['rfp.prompt'].search([('code', '=', 'prompt_analyze_proposal')], limit=1)
         prompt_id = prompt_record.id if prompt_record else None
         
-        # Create queue job
-        job = self.with_delay(
-            channel='root.rfp_ai',
-            description=f"AI Analysis: {self.company_name}"
-        ).analyze_proposal_job(prompt_id)
-        
+        # The vendor is waiting on this result: interactive lane
+        job = self.env['rfp.generation.job']._enqueue(
+            self, 'analyze_proposal_job', project=self.published_id.project_id,
+            channel=CHANNEL_INTERACTIVE, description=f"AI Analysis: {self.company_name}",
+            prompt_record_id=prompt_id)
+
         # Store job reference
-        if hasattr(job, 'db_record'):
-            self.write({'analysis_job_id': job.db_record().id})
+        if job:
+            self.write({'analysis_job_id': job.id})
     
     def analyze_proposal_job(self, prompt_record_id=None):
         """Queue job: Analyze proposal against RFP content using AI."""
         import json
-        import base64
         self.ensure_one()
         self.write({'analysis_status': 'processing'})
 
@@ -201,12 +242,12 @@ class RfpProposal(models.Model):
             if self.notes:
                 proposal_content += f"Notes: {self.notes}\n"
 
-            if self.proposal_file and self.proposal_filename:
+            if self.proposal_filename and self._has_binary('proposal_file'):
                 proposal_content += f"\n[Attached file: {self.proposal_filename}]\n"
 
             # Include multi-document filenames
             for doc in self.document_ids:
-                if doc.file_data and doc.filename:
+                if doc.filename and doc._has_binary('file_data'):
                     proposal_content += f"\n[Attached document - {doc.name}: {doc.filename}]\n"
 
             # Check if project has finalized evaluation criteria
@@ -359,30 +400,29 @@ Be objective, evidence-based, and score each criterion according to its scoring
         """Extract vendor info from uploaded proposal and trigger scoring."""
         self.ensure_one()
         import json
-        import base64
         import io
         import logging
         _logger = logging.getLogger(__name__)
 
         from odoo.addons.project_rfp_ai.models.ai_schemas import get_proposal_extraction_schema
-        from odoo.addons.project_rfp_ai.const import PROMPT_PROPOSAL_EXTRACTOR
+        from odoo.addons.project_rfp_ai.const import PROMPT_PROPOSAL_EXTRACTOR, PROPOSAL_EXTRACT_MAX_CHARS
         from odoo.exceptions import ValidationError
 
         # Decode file
-        if not self.proposal_file:
+        if not self._has_binary('proposal_file'):
             _logger.warning("No proposal file to extract from")
             self._trigger_analysis_job()
             return
 
-        file_bytes = base64.b64decode(self.proposal_file)
+        file_bytes = self._get_binary_raw('proposal_file')
         filename = self.proposal_filename or ''
 
         # Extract text
         try:
             if filename.lower().endswith('.pdf'):
-                text = self._extract_text_from_pdf(file_bytes)
+                text = self._extract_text_from_pdf(file_bytes, max_chars=PROPOSAL_EXTRACT_MAX_CHARS)
             elif filename.lower().endswith('.docx'):
-                text = self._extract_text_from_docx(file_bytes)
+                text = self._extract_text_from_docx(file_bytes, max_chars=PROPOSAL_EXTRACT_MAX_CHARS)
             else:
                 _logger.warning(f"Unsupported file type: {filename}")
                 self._trigger_analysis_job()
@@ -400,7 +440,7 @@ Be objective, evidence-based, and score each criterion according to its scoring
             return
 
         system_prompt = prompt_record.template_text.replace(
-            '{proposal_text}', text[:10000]  # Truncate for safety
+            '{proposal_text}', text[:PROPOSAL_EXTRACT_MAX_CHARS]  # Truncate for safety
         )
 
         # Call AI
@@ -429,41 +469,14 @@ Be objective, evidence-based, and score each criterion according to its scoring
         # Trigger scoring analysis
         self._trigger_analysis_job()
 
-    def _trigger_analysis_job(self):
-        """Trigger proposal analysis as a queue job."""
-        if hasattr(self.env['rfp.proposal'], 'with_delay'):
-            # Queue job available
-            self.with_delay().analyze_proposal_job()
-        else:
-            # Fallback to immediate execution
-            self.analyze_proposal_job()
-
     @staticmethod
-    def _extract_text_from_pdf(file_bytes):
-        """Extract text from PDF."""
-        import io
-        import PyPDF2
-        reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
-        parts = []
-        for page in reader.pages:
-            text = page.extract_text()
-            if text:
-                parts.append(text)
-        return '\n'.join(parts)
+    def _extract_text_from_pdf(file_bytes, max_chars=None):
+        """Extract text from PDF, stopping once max_chars have been read."""
+        from odoo.addons.project_rfp_ai.utils.pdf_reader import extract_pdf_text
+        return extract_pdf_text(file_bytes, max_chars=max_chars)
 
     @staticmethod
-    def _extract_text_from_docx(file_bytes):
-        """Extract text from DOCX."""
-        import io
-        import zipfile
-        from xml.etree import ElementTree
-        ns = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
-        paragraphs = []
-        with zipfile.ZipFile(io.BytesIO(file_bytes)) as zf:
-            with zf.open('word/document.xml') as doc_xml:
-                tree = ElementTree.parse(doc_xml)
-                for p in tree.getroot().iter(f'{{{ns}}}p'):
-                    texts = [t.text for t in p.iter(f'{{{ns}}}t') if t.text]
-                    if texts:
-                        paragraphs.append(''.join(texts))
-        return '\n'.join(paragraphs)
+    def _extract_text_from_docx(file_bytes, max_chars=None):
+        """Extract text from DOCX, stopping once max_chars have been read."""
+        from odoo.addons.project_rfp_ai.utils.docx_reader import extract_docx_text
+        return extract_docx_text(file_bytes, max_chars=max_chars)
@@ -0,0 +1,146 @@
+import base64
+import hashlib
+from odoo import models, fields, api
+from odoo.exceptions import ValidationError
+
+
+class RfpSectionRevision(models.Model):
+    """One stored version of a section's content.
+
+    Most revisions hold a compressed delta against the previous one; a full
+    compressed snapshot is stored for the first revision and then at least
+    every SNAPSHOT_INTERVAL revisions (utils/revision_delta.py), so any
+    version is rebuilt from one snapshot and a bounded number of deltas.
+    The latest version is always the section's own content_html.
+    """
+    _name = 'rfp.section.revision'
+    _description = 'RFP Section Revision'
+    _order = 'section_id, revision_no desc'
+
+    section_id = fields.Many2one('rfp.document.section', string="Section", required=True, index=True,
+                                 ondelete='cascade', readonly=True)
+    revision_no = fields.Integer(string="Revision", required=True, readonly=True)
+    source = fields.Selection([
+        ('generation', 'AI Generation'),
+        ('ai_edit', 'AI Edit'),
+        ('edit', 'Manual Edit'),
+        ('restore', 'Restore'),
+    ], string="Source", default='edit', readonly=True)
+    restored_from_id = fields.Many2one('rfp.section.revision', string="Restored From", readonly=True,
+                                       ondelete='set null')
+    is_snapshot = fields.Boolean(string="Full Snapshot", readonly=True)
+    payload = fields.Binary(string="Payload", attachment=False, readonly=True)
+    content_hash = fields.Char(string="Content Hash", readonly=True)
+    content_size = fields.Integer(string="Content Size", readonly=True)
+    stored_size = fields.Integer(string="Stored Size", readonly=True)
+
+    _sql_constraints = [
+        ('section_revision_unique', 'unique(section_id, revision_no)',
+         'Revision numbers must be unique per section.'),
+    ]
+
+    @api.model
+    def _hash(self, content):
+        return hashlib.sha1((content or '').encode()).hexdigest()
+
+    @api.model
+    def _record_versions(self, changes, source='edit', restored_from=None):
+        """
+        Store new versions of sections' content.
+
+        Args:
+            changes: list of (section, previous content, new content).
+            source: Value of the ``source`` field.
+            restored_from: Revision the new content was restored from.
+        """
+        from odoo.addons.project_rfp_ai.utils.revision_delta import (
+            SNAPSHOT_INTERVAL, compress_text, make_delta)
+
+        # Two transactions writing the same section would both read the same
+        # head and number their revision alike. The second one waits here and,
+        # once the first has committed its update of the section, fails to
+        # serialize and is retried with the new head visible.
+        section_ids = sorted({section.id for section, _previous, _content in changes})
+        if section_ids:
+            self.env.cr.execute(
+                "SELECT id FROM rfp_document_section WHERE id IN %s ORDER BY id FOR UPDATE",
+                [tuple(section_ids)])
+
+        vals_list = []
+        for section, previous, content in changes:
+            content = content or ''
+            head = self.search([('section_id', '=', section.id)], limit=1)
+            if head and head.content_hash == self._hash(content):
+                continue
+            revision_no = head.revision_no + 1 if head else 1
+            if not head and previous:
+                # Content written before revisions were kept becomes revision 1
+                vals_list.append(self._prepare_vals(section, 1, previous, compress_text(previous), True, 'edit'))
+                head_content, last_snapshot_no = previous, 1
+                revision_no = 2
+            elif head:
+                last_snapshot_no = self.search([
+                    ('section_id', '=', section.id), ('is_snapshot', '=', True),
+                ], limit=1).revision_no
+                # A delta is only valid against the exact stored head content
+                head_content = previous if head.content_hash == self._hash(previous) else None
+            else:
+                head_content = None
+
+            snapshot = compress_text(content)
+            payload, is_snapshot = snapshot, True
+            if head_content is not None and revision_no - last_snapshot_no < SNAPSHOT_INTERVAL:
+                delta = make_delta(head_content, content)
+                if len(delta) < len(snapshot):
+                    payload, is_snapshot = delta, False
+            vals_list.append(self._prepare_vals(
+                section, revision_no, content, payload, is_snapshot, source, restored_from))
+        return self.create(vals_list)
+
+    @api.model
+    def _prepare_vals(self, section, revision_no, content, payload, is_snapshot, source, restored_from=None):
+        return {
+            'section_id': section.id,
+            'revision_no': revision_no,
+            'source': source,
+            'restored_from_id': restored_from.id if restored_from else False,
+            'is_snapshot': is_snapshot,
+            'payload': base64.b64encode(payload),
+            'content_hash': self._hash(content),
+            'content_size': len((content or '').encode()),
+            'stored_size': len(payload),
+        }
+
+    def _get_content(self):
+        """Rebuild this revision's content from its snapshot and the deltas after it."""
+        from odoo.addons.project_rfp_ai.utils.revision_delta import apply_delta, decompress_text
+
+        self.ensure_one()
+        chain = self.search([
+            ('section_id', '=', self.section_id.id),
+            ('revision_no', '<=', self.revision_no),
+            ('revision_no', '>=', self.search([
+                ('section_id', '=', self.section_id.id),
+                ('revision_no', '<=', self.revision_no),
+                ('is_snapshot', '=', True),
+            ], limit=1).revision_no),
+        ], order='revision_no')
+        content = ''
+        for revision in chain:
+            payload = base64.b64decode(revision.payload or b'')
+            if revision.is_snapshot:
+                content = decompress_text(payload)
+            else:
+                content = apply_delta(content, payload)
+        return content
+
+    def action_restore(self):
+        """Make this revision the section's current content (recorded as a new revision)."""
+        self.ensure_one()
+        section = self.section_id
+        if section.project_id.current_stage == 'document_locked':
+            raise ValidationError("The document is locked.")
+        section.with_context(revision_source='restore', revision_restored_from=self.id).write({
+            'content_html': self._get_content(),
+        })
+        return True
@@ -42,6 +42,7 @@ publicWidget.registry.RfpPortalInteractions = publicWidget.Widget.extend({
 
         // AI Editing
         'click .btn-ai-edit-section': '_onAiEditSection',
+        'click .btn-undo-section': '_onUndoSection',
         'click .btn-ai-edit-diagram': '_onAiEditDiagram',
         'click #btn_submit_ai_edit': '_onSubmitAiEdit',
 
@@ -52,6 +53,7 @@ publicWidget.registry.RfpPortalInteractions = publicWidget.Widget.extend({
         'click #btn_copy_publish_url': '_onCopyExportUrl',
         'click #btn_copy_editor_url': '_onCopyEditorUrl',
         'click #btn_copy_proposals_url': '_onCopyProposalsUrl',
+        'click .btn-rfp-export': '_onDocumentExport',
 
         // Evaluation Criteria Review
         'click #btn_save_criteria': '_onSaveCriteria',
@@ -593,141 +595,188 @@ publicWidget.registry.RfpPortalInteractions = publicWidget.Widget.extend({
             return 'Phase 1 · Initializing';
         };
 
-        const interval = setInterval(async () => {
-            try {
-                const result = await self._rpc({
-                    route: `/rfp/status/${projectId}`,
-                    params: {}
-                });
-
-                // Status Map for Steps
-                // We need to map `result.stage` (e.g., 'generating_content') to our steps
-                const stage = result.stage;
-                // Stages: sections_generated, generating_content, content_generated, generating_images, images_generated, completed...
-
-                // Helper to set step status (supports both legacy Bootstrap badges
-                // and the new design-system step markup with .step-icon + state classes)
-                const setStep = ($el, state) => {
-                    const $badge = $el.find('.status-badge');
-                    const $icon = $el.find('.step-icon');
-                    $el.removeClass('rfp-step--done rfp-step--active rfp-step--pending');
-                    if (state === 'done') {
-                        $badge.removeClass('bg-secondary bg-primary').addClass('bg-success').text('Completed');
-                        $el.addClass('list-group-item-success rfp-step--done');
-                        $icon.text('✓');
-                    } else if (state === 'active') {
-                        $badge.removeClass('bg-secondary bg-success').addClass('bg-primary').text('In Progress');
-                        $el.removeClass('list-group-item-success').addClass('list-group-item-light rfp-step--active');
-                        $icon.text('●');
-                    } else {
-                        $badge.removeClass('bg-success bg-primary').addClass('bg-secondary').text('Pending');
-                        $el.removeClass('list-group-item-success list-group-item-light').addClass('rfp-step--pending');
-                        $icon.text('○');
-                    }
-                };
-
-                // Phase label above the title
-                if ($phaseText.length) $phaseText.text(phaseFor(stage));
-
-                // Info + Practices: always done by the time we land on processing
-                setStep($stepInfo, 'done');
-                setStep($stepPractices, 'done');
-
-                // Structure
-                if (['sections_generated', 'generating_content', 'content_generated',
-                     'generating_images', 'images_generated', 'completed', 'document_locked'].includes(stage)) {
-                    setStep($stepStructure, 'done');
+        // Progress arrives as bus.bus pushes ('rfp_generation_progress', sent
+        // by the server whenever a section/diagram job finishes or the stage
+        // changes). The ETag'd /rfp/progress endpoint is only a fallback:
+        // frequent when no bus is available, occasional otherwise.
+        let interval = null;
+        let finished = false;
+        let lastVersion = -1;
+
+        const render = (result) => {
+            // Status Map for Steps
+            // We need to map `result.stage` (e.g., 'generating_content') to our steps
+            const stage = result.stage;
+            // Stages: sections_generated, generating_content, content_generated, generating_images, images_generated, completed...
+
+            // Helper to set step status (supports both legacy Bootstrap badges
+            // and the new design-system step markup with .step-icon + state classes)
+            const setStep = ($el, state) => {
+                const $badge = $el.find('.status-badge');
+                const $icon = $el.find('.step-icon');
+                $el.removeClass('rfp-step--done rfp-step--active rfp-step--pending');
+                if (state === 'done') {
+                    $badge.removeClass('bg-secondary bg-primary').addClass('bg-success').text('Completed');
+                    $el.addClass('list-group-item-success rfp-step--done');
+                    $icon.text('✓');
+                } else if (state === 'active') {
+                    $badge.removeClass('bg-secondary bg-success').addClass('bg-primary').text('In Progress');
+                    $el.removeClass('list-group-item-success').addClass('list-group-item-light rfp-step--active');
+                    $icon.text('●');
                 } else {
-                    setStep($stepStructure, 'active');
+                    $badge.removeClass('bg-success bg-primary').addClass('bg-secondary').text('Pending');
+                    $el.removeClass('list-group-item-success list-group-item-light').addClass('rfp-step--pending');
+                    $icon.text('○');
                 }
+            };
 
-                // Content
-                if (['content_generated', 'generating_images', 'images_generated',
-                     'completed', 'document_locked'].includes(stage)) {
-                    setStep($stepContent, 'done');
-                    if ($contentProgress.length) $contentProgress.text('');
-                } else if (stage === 'generating_content' || stage === 'sections_generated') {
-                    setStep($stepContent, 'active');
-                    $statusText.text("Writing granular content for each section…");
-                    // Dynamic "(X of Y sections done)" hint — requires the backend status
-                    // response to include sections_done / sections_total. Silently skip
-                    // if unavailable.
-                    if ($contentProgress.length && result.completed !== undefined && result.total) {
-                        $contentProgress.text('(' + result.completed + ' of ' + result.total + ' sections done)');
-                    }
-                } else {
-                    setStep($stepContent, 'pending');
-                }
+            // Phase label above the title
+            if ($phaseText.length) $phaseText.text(phaseFor(stage));
 
-                // Images
-                if (['images_generated', 'completed', 'document_locked'].includes(stage)) {
-                    setStep($stepImages, 'done');
-                } else if (stage === 'generating_images') {
-                    setStep($stepImages, 'active');
-                    $statusText.text("Generating architectural diagrams…");
-                } else {
-                    setStep($stepImages, 'pending');
-                }
+            // Info + Practices: always done by the time we land on processing
+            setStep($stepInfo, 'done');
+            setStep($stepPractices, 'done');
 
-                // Finalize & lock
-                if (['document_locked', 'completed'].includes(stage)) {
-                    setStep($stepLock, 'done');
-                } else if (['images_generated'].includes(stage)) {
-                    setStep($stepLock, 'active');
-                } else {
-                    setStep($stepLock, 'pending');
+            // Structure
+            if (['sections_generated', 'generating_content', 'content_generated',
+                 'generating_images', 'images_generated', 'completed', 'document_locked'].includes(stage)) {
+                setStep($stepStructure, 'done');
+            } else {
+                setStep($stepStructure, 'active');
+            }
+
+            // Content
+            if (['content_generated', 'generating_images', 'images_generated',
+                 'completed', 'document_locked'].includes(stage)) {
+                setStep($stepContent, 'done');
+                if ($contentProgress.length) $contentProgress.text('');
+            } else if (stage === 'generating_content' || stage === 'sections_generated') {
+                setStep($stepContent, 'active');
+                $statusText.text("Writing granular content for each section…");
+                // Dynamic "(X of Y sections done)" hint — requires the backend status
+                // response to include sections_done / sections_total. Silently skip
+                // if unavailable.
+                if ($contentProgress.length && result.completed !== undefined && result.total) {
+                    $contentProgress.text('(' + result.completed + ' of ' + result.total + ' sections done)');
                 }
+            } else {
+                setStep($stepContent, 'pending');
+            }
 
-                // Global Progress Bar
-                let pct = 0;
-                const jobProgress = result.progress || 0; // 0-100 from backend
-
-                if (['sections_generated'].includes(stage)) {
-                    // Just started
-                    pct = 20;
-                } else if (stage === 'generating_content') {
-                    // Structure (20) + Content Portion (50 * job_progress)
-                    pct = 20 + (jobProgress * 0.5);
-                } else if (['content_generated'].includes(stage)) {
-                    // Structure (20) + Content (50) Done
-                    pct = 70;
-                } else if (stage === 'generating_images') {
-                    // Structure (20) + Content (50) + Images Portion (30 * job_progress)
-                    pct = 70 + (jobProgress * 0.3);
-                } else if (['images_generated', 'completed', 'document_locked'].includes(stage)) {
-                    pct = 100;
-                }
+            // Images
+            if (['images_generated', 'completed', 'document_locked'].includes(stage)) {
+                setStep($stepImages, 'done');
+            } else if (stage === 'generating_images') {
+                setStep($stepImages, 'active');
+                $statusText.text("Generating architectural diagrams…");
+            } else {
+                setStep($stepImages, 'pending');
+            }
 
-                // Ensure int
-                pct = Math.round(pct);
-                // The new design-system %-text is just a <span> inside the ring —
-                // only update the text. Do NOT set width/height or Bootstrap
-                // progress-bar classes (those made the span overflow the ring).
-                $progressBar.text(pct + '%');
-
-                // Also update the new design-system conic-gradient ring (if present)
-                const $ring = self.$('#rfp_processing_ring');
-                if ($ring.length) {
-                    const deg = Math.round(pct * 3.6);
-                    $ring.css(
-                        'background',
-                        'conic-gradient(var(--rfp-gold) 0 ' + deg + 'deg, var(--rfp-ink-100) ' + deg + 'deg 360deg)'
-                    );
-                }
+            // Finalize & lock
+            if (['document_locked', 'completed'].includes(stage)) {
+                setStep($stepLock, 'done');
+            } else if (['images_generated'].includes(stage)) {
+                setStep($stepLock, 'active');
+            } else {
+                setStep($stepLock, 'pending');
+            }
+
+            // Global Progress Bar
+            let pct = 0;
+            const jobProgress = result.progress || 0; // 0-100 from backend
+
+            if (['sections_generated'].includes(stage)) {
+                // Just started
+                pct = 20;
+            } else if (stage === 'generating_content') {
+                // Structure (20) + Content Portion (50 * job_progress)
+                pct = 20 + (jobProgress * 0.5);
+            } else if (['content_generated'].includes(stage)) {
+                // Structure (20) + Content (50) Done
+                pct = 70;
+            } else if (stage === 'generating_images') {
+                // Structure (20) + Content (50) + Images Portion (30 * job_progress)
+                pct = 70 + (jobProgress * 0.3);
+            } else if (['images_generated', 'completed', 'document_locked'].includes(stage)) {
+                pct = 100;
+            }
+
+            // Ensure int
+            pct = Math.round(pct);
+            // The new design-system %-text is just a <span> inside the ring —
+            // only update the text. Do NOT set width/height or Bootstrap
+            // progress-bar classes (those made the span overflow the ring).
+            $progressBar.text(pct + '%');
+
+            // Also update the new design-system conic-gradient ring (if present)
+            const $ring = self.$('#rfp_processing_ring');
+            if ($ring.length) {
+                const deg = Math.round(pct * 3.6);
+                $ring.css(
+                    'background',
+                    'conic-gradient(var(--rfp-gold) 0 ' + deg + 'deg, var(--rfp-ink-100) ' + deg + 'deg 360deg)'
+                );
+            }
+
+            // Completion Redirect
+            if (['images_generated', 'completed', 'document_locked'].includes(stage)) {
+                finished = true;
+                clearInterval(interval);
+                $statusText.text("All Done! Redirecting to Editor…");
+
+                setTimeout(() => {
+                    window.location.href = `/rfp/edit/${projectId}`;
+                }, 1000);
+            }
+        };
 
-                // Completion Redirect
-                if (['images_generated', 'completed', 'document_locked'].includes(stage)) {
-                    clearInterval(interval);
-                    $statusText.text("All Done! Redirecting to Editor…");
+        const apply = (result) => {
+            if (!result || result.error || finished) return;
+            // Pushes and polls can cross; never step back to an older snapshot
+            if (result.version !== undefined) {
+                if (result.version < lastVersion) return;
+                lastVersion = result.version;
+            }
+            render(result);
+        };
 
-                    setTimeout(() => {
-                        window.location.href = `/rfp/edit/${projectId}`;
-                    }, 1000);
+        const poll = async () => {
+            try {
+                // 'no-cache' revalidates with If-None-Match; an unchanged
+                // project answers 304 and the cached body is reused.
+                const response = await fetch(`/rfp/progress/${projectId}`, {
+                    cache: 'no-cache',
+                    credentials: 'same-origin',
+                    headers: { 'Accept': 'application/json' },
+                });
+                if (response.ok) {
+                    apply(await response.json());
                 }
             } catch (e) {
                 console.error("Polling error", e);
             }
-        }, 2000); // 2 seconds
+        };
+
+        let busService = null;
+        try {
+            busService = typeof this.bindService === 'function' ? this.bindService('bus_service') : null;
+        } catch (e) {
+            busService = null;
+        }
+        if (busService && typeof busService.subscribe === 'function') {
+            busService.subscribe('rfp_generation_progress', (payload) => {
+                if (!payload || payload.project_id !== projectId) return;
+                // The server advances the stage itself and pushes it here
+                apply(payload);
+            });
+            if (typeof busService.start === 'function') busService.start();
+        } else {
+            busService = null;
+        }
+
+        poll();
+        interval = setInterval(poll, busService ? 15000 : 3000);
     },
 
     // --- PHASE 3: UNIFIED EDITOR ---
@@ -1149,7 +1198,7 @@ publicWidget.registry.RfpPortalInteractions = publicWidget.Widget.extend({
                     <div class="col-md-4 col-sm-6 diagram-wrapper" data-diagram-id="${result.diagram_id}">
                         <div class="card h-100 border-0 shadow-sm diagram-card">
                             <div class="position-relative">
-                                <img src="${result.image_url}" class="card-img-top object-fit-cover" style="height: 150px; cursor: pointer;" alt="${result.title}">
+                                <img src="${result.image_url}" ${result.image_srcset ? `srcset="${result.image_srcset}" sizes="(min-width: 768px) 33vw, 50vw"` : ''} data-view-src="${result.view_url}" loading="lazy" decoding="async" class="card-img-top object-fit-cover" style="height: 150px; cursor: pointer;" alt="${result.title}">
                                 <div class="position-absolute top-0 end-0 p-2">
                                     <button class="btn btn-sm btn-light text-danger shadow-sm btn-delete-diagram" data-diagram-id="${result.diagram_id}" title="Delete Image">
                                         <i class="fa fa-trash"></i>
@@ -1240,10 +1289,10 @@ publicWidget.registry.RfpPortalInteractions = publicWidget.Widget.extend({
         const $card = $img.closest('.diagram-wrapper');
         const title = $card.find('.card-title').text() || 'Image Preview';
 
-        // Set modal content
+        // Set modal content: show the compressed copy, download the original
         this.$('#image_viewer_title').text(title);
-        this.$('#image_viewer_img').attr('src', imgSrc);
-        this.$('#image_viewer_download').attr('href', imgSrc).attr('download', title + '.png');
+        this.$('#image_viewer_img').attr('src', $img.attr('data-view-src') || imgSrc);
+        this.$('#image_viewer_download').attr('href', imgSrc).attr('download', title + (imgSrc.includes('/svg/') ? '.svg' : '.png'));
 
         // Show modal
         $('#modal_image_viewer').modal('show');
@@ -1260,6 +1309,7 @@ publicWidget.registry.RfpPortalInteractions = publicWidget.Widget.extend({
         this.$('#ai_edit_context_label').text('Describe how you want to modify the section content:');
         this.$('#ai_edit_prompt').val('').attr('placeholder', 'E.g., Make it more formal, add bullet points, focus on security aspects...');
         this.$('#ai_edit_type').val('section');
+        this.$('#ai_edit_force_wrapper').addClass('d-none');
         this.$('#ai_edit_target_id').val(sectionId);
 
         // Show modal
@@ -1277,11 +1327,34 @@ publicWidget.registry.RfpPortalInteractions = publicWidget.Widget.extend({
         this.$('#ai_edit_prompt').val('').attr('placeholder', 'E.g., Add more details, change colors to blue, add a legend...');
         this.$('#ai_edit_type').val('diagram');
         this.$('#ai_edit_target_id').val(diagramId);
+        this.$('#ai_edit_force').prop('checked', false);
+        this.$('#ai_edit_force_wrapper').removeClass('d-none');
 
         // Show modal
         $('#modal_ai_edit').modal('show');
     },
 
+    _onUndoSection: async function (ev) {
+        ev.preventDefault();
+        ev.stopPropagation();
+        const $btn = $(ev.currentTarget);
+        const sectionId = $btn.data('section-id');
+        $btn.prop('disabled', true);
+        try {
+            const result = await this._rpc({ route: '/rfp/section/undo', params: { section_id: sectionId } });
+            if (result.success) {
+                // Reload page to ensure Quill renders the restored content from DB
+                window.location.reload();
+                return;
+            }
+            this._showNotification('error', 'Undo Failed', result.error || 'Unknown error');
+        } catch (e) {
+            console.error(e);
+            this._showNotification('error', 'Error', 'Error undoing change: ' + e.message);
+        }
+        $btn.prop('disabled', false);
+    },
+
     _onSubmitAiEdit: async function (ev) {
         ev.preventDefault();
         const $btn = $(ev.currentTarget);
@@ -1306,7 +1379,11 @@ publicWidget.registry.RfpPortalInteractions = publicWidget.Widget.extend({
                 params = { section_id: targetId, user_prompt: userPrompt };
             } else if (editType === 'diagram') {
                 route = '/rfp/ai/edit/image';
-                params = { diagram_id: targetId, user_prompt: userPrompt };
+                params = {
+                    diagram_id: targetId,
+                    user_prompt: userPrompt,
+                    force_regenerate: this.$('#ai_edit_force').is(':checked'),
+                };
             } else {
                 throw new Error('Invalid edit type');
             }
@@ -1324,7 +1401,12 @@ publicWidget.registry.RfpPortalInteractions = publicWidget.Widget.extend({
                 } else if (editType === 'diagram') {
                     // Update image src with cache buster
                     const $img = this.$(`.diagram-wrapper[data-diagram-id="${targetId}"] img`);
-                    $img.attr('src', result.new_image_url);
+                    $img.attr('src', result.new_image_url).attr('data-view-src', result.new_view_url);
+                    if (result.new_image_srcset) {
+                        $img.attr('srcset', result.new_image_srcset);
+                    } else {
+                        $img.removeAttr('srcset');
+                    }
                 }
 
                 // Show success feedback
@@ -1681,6 +1763,89 @@ publicWidget.registry.RfpPortalInteractions = publicWidget.Widget.extend({
         }
     },
 
+    // Word / PDF download. Small documents download directly; large ones are
+    // built by a background job whose progress arrives over the bus
+    // ('rfp_export_progress'), with /rfp/export/status/<id> as the fallback.
+    _onDocumentExport: async function (ev) {
+        ev.preventDefault();
+        const $btn = $(ev.currentTarget);
+        if ($btn.hasClass('rfp-export-busy')) return;
+        const projectId = $btn.data('project-id');
+        const exportFormat = $btn.data('export-format');
+        const originalHtml = $btn.html();
+
+        $btn.addClass('rfp-export-busy').html('<i class="fa fa-spinner fa-spin me-1"></i> Preparing...');
+        try {
+            const result = await this._rpc({
+                route: `/rfp/export/request/${projectId}`,
+                params: { export_format: exportFormat },
+                loading: false,
+            });
+            if (result.error) {
+                throw new Error(result.error);
+            }
+            const url = result.state === 'direct' ? result.url : await this._followExport(result, $btn);
+            window.location.href = url;
+        } catch (e) {
+            this._showNotification('error', 'Export failed', e.message);
+        } finally {
+            $btn.removeClass('rfp-export-busy').html(originalHtml);
+        }
+    },
+
+    _followExport: function (initial, $btn) {
+        return new Promise((resolve, reject) => {
+            let interval = null;
+            let busService = null;
+
+            const apply = (payload) => {
+                if (!interval || !payload || payload.export_id !== initial.export_id) return;
+                if (payload.state === 'done') {
+                    stop();
+                    resolve(payload.url);
+                } else if (payload.state === 'failed') {
+                    stop();
+                    reject(new Error(payload.error || 'The document could not be exported'));
+                } else {
+                    $btn.html(`<i class="fa fa-spinner fa-spin me-1"></i> Preparing... ${payload.progress || 0}%`);
+                }
+            };
+            const stop = () => {
+                clearInterval(interval);
+                interval = null;
+                if (busService && typeof busService.unsubscribe === 'function') {
+                    busService.unsubscribe('rfp_export_progress', apply);
+                }
+            };
+            const poll = async () => {
+                try {
+                    apply(await this._rpc({
+                        route: `/rfp/export/status/${initial.export_id}`,
+                        params: {},
+                        loading: false,
+                    }));
+                } catch (e) {
+                    console.error("Export status error", e);
+                }
+            };
+
+            try {
+                busService = typeof this.bindService === 'function' ? this.bindService('bus_service') : null;
+            } catch (e) {
+                busService = null;
+            }
+            if (busService && typeof busService.subscribe === 'function') {
+                busService.subscribe('rfp_export_progress', apply);
+                if (typeof busService.start === 'function') busService.start();
+            } else {
+                busService = null;
+            }
+
+            interval = setInterval(poll, busService ? 15000 : 3000);
+            apply(initial);
+        });
+    },
+
     _showExportSuccessModal: function (title, url) {
         // Update existing notification modal to show export success
         const $modal = this.$('#modal_publish_success');
@@ -0,0 +1,75 @@
+import io
+import zipfile
+
+from odoo.tests import BaseCase, tagged
+
+from odoo.addons.project_rfp_ai.utils.docx_reader import extract_docx_text
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" ' \
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+
+
+def _p(text):
+    return f'<w:p><w:r><w:t>{text}</w:t></w:r></w:p>'
+
+
+def _tc(*content):
+    return f'<w:tc>{"".join(content)}</w:tc>'
+
+
+def _tbl(*rows):
+    return '<w:tbl>' + ''.join(f'<w:tr>{"".join(cells)}</w:tr>' for cells in rows) + '</w:tbl>'
+
+
+def _make_docx(body, header=None, parts=None, rels=''):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zf:
+        zf.writestr('word/document.xml', f'<w:document {W}><w:body>{body}</w:body></w:document>')
+        zf.writestr('word/_rels/document.xml.rels',
+                    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                    f'{rels}</Relationships>')
+        if header:
+            zf.writestr('word/header1.xml', f'<w:hdr {W}>{header}</w:hdr>')
+        for name, data in (parts or {}).items():
+            zf.writestr(name, data)
+    return buffer.getvalue()
+
+
+@tagged('post_install', '-at_install')
+class TestDocxReader(BaseCase):
+    """The streaming extractor keeps the output of the whole-tree one it replaced."""
+
+    def test_nested_table(self):
+        nested = _tbl([_tc(_p('N1')), _tc(_p('N2'))])
+        docx = _make_docx(
+            _p('Intro')
+            + _tbl([_tc(_p('A1'), nested), _tc(_p('B1'))], [_tc(_p('A2')), _tc(_p('B2'))])
+            + _p('Outro'))
+        # Nested cells are part of the outer cell and listed again, then the
+        # nested row follows the outer one.
+        self.assertEqual(extract_docx_text(docx).split('\n'), [
+            'Intro',
+            'A1 N1 N2\tN1\tN2\tB1',
+            'N1\tN2',
+            'A2\tB2',
+            'Outro',
+        ])
+
+    def test_blocks_in_document_order(self):
+        docx = _make_docx(
+            _p('Title')
+            + '<w:sdt><w:sdtContent>' + _p('Control') + '</w:sdtContent></w:sdt>'
+            + '<w:altChunk r:id="rIdHtml"/>'
+            + _p('End'),
+            header=_tbl([_tc(_p('Header cell'))]) + _p('Header line'),
+            parts={'word/chunk.html': '<html><body><p>Embedded &amp; HTML</p></body></html>'},
+            rels='<Relationship Id="rIdHtml" Target="chunk.html"/>')
+        self.assertEqual(extract_docx_text(docx).split('\n'), [
+            'Title', 'Control', 'Embedded & HTML', 'End', 'Header cell', 'Header line',
+        ])
+
+    def test_max_chars(self):
+        docx = _make_docx(''.join(_p(f'Paragraph {index}') for index in range(1000)))
+        text = extract_docx_text(docx, max_chars=50)
+        self.assertEqual(len(text), 50)
+        self.assertTrue(text.startswith('Paragraph 0\nParagraph 1\n'))
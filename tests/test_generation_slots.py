@@ -0,0 +1,48 @@
+from unittest.mock import patch
+
+from odoo import api, SUPERUSER_ID
+from odoo.sql_db import db_connect
+from odoo.tests import TransactionCase, tagged
+from odoo.addons.queue_job.exception import RetryableJobError
+
+from odoo.addons.project_rfp_ai.utils import concurrency
+from odoo.addons.project_rfp_ai.utils.concurrency import acquire_generation_slot
+
+
+@tagged('post_install', '-at_install')
+class TestGenerationSlots(TransactionCase):
+    """Slots are advisory locks held by separate database sessions."""
+
+    def _new_env(self):
+        # A connection of its own: the test cursor would share one session
+        cr = db_connect(self.env.cr.dbname).cursor()
+        self.addCleanup(cr.close)
+        return api.Environment(cr, SUPERUSER_ID, {})
+
+    def test_limit_enforced_across_sessions(self):
+        first, second, third = self._new_env(), self._new_env(), self._new_env()
+        with patch.object(concurrency, 'get_generation_concurrency', return_value=2):
+            self.assertEqual(acquire_generation_slot(first), 0)
+            self.assertEqual(acquire_generation_slot(second), 1)
+            with self.assertRaises(RetryableJobError):
+                acquire_generation_slot(third)
+
+            # Ending the transaction frees its slot
+            first.cr.rollback()
+            self.assertEqual(acquire_generation_slot(third), 0)
+
+    def test_limit_follows_setting(self):
+        first, second = self._new_env(), self._new_env()
+        with patch.object(concurrency, 'get_generation_concurrency', return_value=1):
+            acquire_generation_slot(first)
+            with self.assertRaises(RetryableJobError):
+                acquire_generation_slot(second)
+        with patch.object(concurrency, 'get_generation_concurrency', return_value=2):
+            self.assertEqual(acquire_generation_slot(second), 1)
+
+    def test_concurrency_setting(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        ICP.set_param(concurrency.CONCURRENCY_PARAM, '3')
+        self.assertEqual(concurrency.get_generation_concurrency(self.env), 3)
+        ICP.set_param(concurrency.CONCURRENCY_PARAM, 'invalid')
+        self.assertEqual(concurrency.get_generation_concurrency(self.env), concurrency.DEFAULT_CONCURRENCY)
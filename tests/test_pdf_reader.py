@@ -0,0 +1,114 @@
+import io
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from odoo.tests import BaseCase, tagged
+
+from odoo.addons.project_rfp_ai.utils import pdf_reader
+from odoo.addons.project_rfp_ai.utils.pdf_reader import iter_pdf_pages, rfp_pdf_worker
+
+_logger = logging.getLogger(__name__)
+
+
+def _make_pdf(page_count):
+    """Minimal PDF whose page N reads "Page N"."""
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>', None,
+               '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for index in range(page_count):
+        stream = f'BT /F1 12 Tf 72 720 Td (Page {index}) Tj ET'
+        objects.append(f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream')
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                       f'/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>')
+        kids.append(f'{len(objects)} 0 R')
+    objects[1] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(kids)} >>'
+
+    out = io.BytesIO()
+    out.write(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(f'{number} 0 obj\n{body}\nendobj\n'.encode())
+    xref = out.tell()
+    out.write(f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode())
+    for offset in offsets:
+        out.write(f'{offset:010d} 00000 n \n'.encode())
+    out.write(f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode())
+    return out.getvalue()
+
+
+def _texts(pages):
+    return [(index, text.strip()) for index, text in pages]
+
+
+@tagged('post_install', '-at_install')
+class TestPdfReader(BaseCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.page_count = 3 * pdf_reader.PARALLEL_MIN_PAGES
+        cls.pdf = _make_pdf(cls.page_count)
+        cls.expected = [(index, f"Page {index}") for index in range(cls.page_count)]
+
+    def test_serial(self):
+        self.assertEqual(_texts(iter_pdf_pages(self.pdf, parallel=False)), self.expected)
+
+    def test_worker_pool(self):
+        # Force the pool on single-CPU hosts
+        with patch.object(pdf_reader.os, 'cpu_count', return_value=2):
+            self.assertEqual(_texts(iter_pdf_pages(self.pdf)), self.expected)
+
+    def _collect(self, extract_page_range, deadline=None):
+        reader = rfp_pdf_worker.open_reader(self.pdf)
+        ranges = [(start, min(start + pdf_reader.PAGES_PER_CHUNK, self.page_count))
+                  for start in range(0, self.page_count, pdf_reader.PAGES_PER_CHUNK)]
+        with patch.object(rfp_pdf_worker, 'extract_page_range', side_effect=extract_page_range), \
+                ThreadPoolExecutor(max_workers=2) as executor:
+            return _texts(pdf_reader._collect_chunks(executor, 'unused.pdf', reader, ranges, deadline))
+
+    def test_failed_chunk_read_in_process(self):
+        reader = rfp_pdf_worker.open_reader(self.pdf)
+
+        def extract_page_range(path, start, stop):
+            if start == pdf_reader.PAGES_PER_CHUNK:
+                raise ValueError("worker failure")
+            return [(index, rfp_pdf_worker.read_page(reader, index)) for index in range(start, stop)]
+
+        self.assertEqual(self._collect(extract_page_range), self.expected)
+
+    def test_failed_chunk_respects_deadline(self):
+        def extract_page_range(path, start, stop):
+            if start == 0:
+                raise ValueError("worker failure")
+            return [(index, f"Page {index}") for index in range(start, stop)]
+
+        def slow_read_page(reader, index):
+            time.sleep(0.1)
+            return f"Page {index}"
+
+        # The in-process re-read stops at the deadline, and the pages after
+        # the gap are not returned.
+        with patch.object(rfp_pdf_worker, 'read_page', side_effect=slow_read_page):
+            pages = self._collect(extract_page_range, deadline=time.monotonic() + 0.25)
+        self.assertTrue(0 < len(pages) < pdf_reader.PAGES_PER_CHUNK)
+        self.assertEqual(pages, self.expected[:len(pages)])
+
+
+@tagged('post_install', '-at_install', '-standard', 'rfp_benchmark')
+class TestPdfReaderBenchmark(BaseCase):
+    """Serial vs worker-pool extraction time; run with --test-tags rfp_benchmark."""
+
+    def test_benchmark(self):
+        pdf = _make_pdf(600)
+        timings = {}
+        results = {}
+        for parallel in (False, True):
+            start = time.perf_counter()
+            results[parallel] = _texts(iter_pdf_pages(pdf, parallel=parallel, time_budget=None))
+            timings[parallel] = time.perf_counter() - start
+        self.assertEqual(results[True], results[False])
+        _logger.info("PDF text of 600 pages: serial %.2fs, worker pool %.2fs (%d CPUs)",
+                     timings[False], timings[True], pdf_reader.os.cpu_count() or 1)
@@ -0,0 +1,225 @@
+import base64
+import json
+from unittest.mock import patch
+
+from odoo.tests import tagged
+from odoo.tests.common import TransactionCase
+from odoo.addons.website.tools import MockRequest
+
+from odoo.addons.project_rfp_ai.const import STAGE_GENERATING_CONTENT, STAGE_INITIALIZED
+from odoo.addons.project_rfp_ai.controllers.portal import RfpCustomerPortal
+
+# Record counts each flow is run with: the query count measured at the
+# small size is the budget for the large one.
+SMALL = 3
+LARGE = 15
+PNG_BYTES = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg==')
+
+
+@tagged('post_install', '-at_install')
+class TestQueryCounts(TransactionCase):
+    """Batched flows must not run more queries as their records grow."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Project = cls.env['rfp.project']
+        cls.ai_log_class = type(cls.env['rfp.ai.log'])
+
+    def _create_project(self, **vals):
+        return self.Project.create(dict({
+            'name': "Query Count Project",
+            'description': "Project used to count the queries of batched flows.",
+            'user_id': self.env.user.id,
+        }, **vals))
+
+    def _create_inputs(self, project, count):
+        return self.env['rfp.form.input'].create([{
+            'project_id': project.id,
+            'field_key': f"question_{index}",
+            'label': f"Question {index}",
+            'user_value': f"Answer {index}",
+        } for index in range(count)])
+
+    def _create_sections(self, project, count, diagrams=False):
+        sections = self.env['rfp.document.section'].create([{
+            'project_id': project.id,
+            'section_title': f"Section {index}",
+            'sequence': (index + 1) * 10,
+            'content_html': f"<p>Content {index}</p>",
+        } for index in range(count)])
+        if diagrams:
+            self.env['rfp.section.diagram'].create([{
+                'section_id': section.id,
+                'title': f"Diagram of {section.section_title}",
+                'description': "Diagram",
+                'image_file': base64.b64encode(PNG_BYTES),
+            } for section in sections])
+        return sections
+
+    def _assert_constant_queries(self, prepare, run):
+        """Run ``run(prepare(size))`` at both sizes; the large run may not take more queries.
+
+        Args:
+            prepare: callable(size) creating the records, returns the argument of ``run``.
+            run: callable(prepared) running the flow.
+        """
+        prepared = prepare(SMALL)
+        self.env.flush_all()
+        self.env.invalidate_all()
+        start = self.cr.sql_log_count
+        run(prepared)
+        self.env.flush_all()
+        expected = self.cr.sql_log_count - start
+
+        prepared = prepare(LARGE)
+        self.env.flush_all()
+        self.env.invalidate_all()
+        with self.assertQueryCount(expected):
+            run(prepared)
+
+    def test_generate_structure(self):
+        def prepare(size):
+            toc = {'table_of_contents': [{
+                'title': f"Section {index}",
+                'section_type': 'narrative',
+                'subsections': [{'title': f"Subsection {index}", 'section_type': 'narrative'}],
+            } for index in range(size)]}
+            return self._create_project(), json.dumps(toc)
+
+        def run(prepared):
+            project, toc_json = prepared
+            with patch.object(self.ai_log_class, 'execute_request', return_value=toc_json):
+                project.action_generate_structure()
+            self.assertEqual(len(project.document_section_ids), 2 * len(json.loads(toc_json)['table_of_contents']))
+
+        self._assert_constant_queries(prepare, run)
+
+    def test_copy_content_from_project(self):
+        def prepare(size):
+            project = self._create_project()
+            self._create_sections(project, size, diagrams=True)
+            return self.env['rfp.published'].create({'project_id': project.id, 'title': project.name})
+
+        def run(published):
+            published.copy_content_from_project()
+            self.assertEqual(len(published.section_ids.diagram_ids),
+                             len(published.project_id.document_section_ids))
+
+        self._assert_constant_queries(prepare, run)
+
+    def test_update_structure(self):
+        def prepare(size):
+            project = self._create_project()
+            sections = self._create_sections(project, size)
+            # Reverse the order, rename every section, add as many and drop the first
+            payload = [{'id': section.id, 'section_title': f"{section.section_title} (renamed)",
+                        'sequence': (size - index) * 10}
+                       for index, section in enumerate(sections) if index]
+            payload += [{'id': f"new_{index}", 'section_title': f"New {index}", 'sequence': 1000 + index}
+                        for index in range(size)]
+            return project, payload
+
+        def run(prepared):
+            project, payload = prepared
+            id_map = project.action_update_structure(payload)
+            self.assertEqual(len(id_map), sum(isinstance(row['id'], str) for row in payload))
+            self.assertEqual(len(project.document_section_ids), len(payload))
+
+        self._assert_constant_queries(prepare, run)
+
+    def test_duplicate_for_adaptation(self):
+        def prepare(size):
+            project = self._create_project()
+            self._create_inputs(project, size)
+            self.env['rfp.practice.input'].create([{
+                'project_id': project.id,
+                'field_key': f"practice_{index}",
+                'label': f"Practice {index}",
+                'user_value': f"Practice answer {index}",
+            } for index in range(size)])
+            self.env['rfp.evaluation.criterion'].create([{
+                'project_id': project.id, 'name': f"Criterion {index}",
+            } for index in range(size)])
+            self.env['rfp.required.document'].create([{
+                'project_id': project.id, 'name': f"Document {index}",
+            } for index in range(size)])
+            return project
+
+        def run(project):
+            with patch.object(self.ai_log_class, 'execute_request', return_value='{}'):
+                new_project = self.Project.browse(project.action_duplicate_for_adaptation())
+            self.assertEqual(len(new_project.form_input_ids), len(project.form_input_ids))
+            self.assertEqual(len(new_project.evaluation_criterion_ids), len(project.evaluation_criterion_ids))
+
+        self._assert_constant_queries(prepare, run)
+
+    def test_create_kb_from_project(self):
+        def prepare(size):
+            project = self._create_project()
+            self._create_sections(project, size)
+            return project
+
+        def run(project):
+            kb = self.env['rfp.knowledge.base'].browse(project.action_create_kb_from_project()['res_id'])
+            self.assertEqual(len(kb.section_ids), len(project.document_section_ids))
+
+        self._assert_constant_queries(prepare, run)
+
+    def test_auto_fill_from_source(self):
+        def prepare(size):
+            project = self._create_project(source_extracted_text="Source document text. " * 10)
+            inputs = self._create_inputs(project, size)
+            inputs.write({
+                'user_value': False,
+                'component_type': 'radio',
+                'options': json.dumps(['Yes', 'No']),
+            })
+            response = {'auto_filled_fields': [{
+                'field_key': inp.field_key,
+                'answer': 'Yes' if index % 2 else 'No',
+                'confidence': 'high',
+            } for index, inp in enumerate(inputs)]}
+            return project, json.dumps(response)
+
+        def run(prepared):
+            project, response = prepared
+            with patch.object(self.ai_log_class, 'execute_request', return_value=response):
+                project._auto_fill_from_source()
+            self.assertTrue(all(project.form_input_ids.mapped('is_auto_filled')))
+
+        self._assert_constant_queries(prepare, run)
+
+    def test_portal_next_step(self):
+        def prepare(size):
+            project = self._create_project(current_stage=STAGE_INITIALIZED)
+            inputs = self._create_inputs(project, size)
+            inputs.user_value = False
+            post = {inp.field_key: f"Portal answer {inp.field_key}" for inp in inputs}
+            return project, post
+
+        def run(prepared):
+            project, post = prepared
+            with MockRequest(self.env), \
+                    patch.object(type(project), 'action_analyze_gap', return_value=True):
+                RfpCustomerPortal().portal_rfp_next_step(project.id, **post)
+            self.assertTrue(all(project.form_input_ids.mapped('user_value')))
+
+        self._assert_constant_queries(prepare, run)
+
+    def test_generation_status(self):
+        def prepare(size):
+            project = self._create_project(current_stage=STAGE_GENERATING_CONTENT)
+            sections = self._create_sections(project, size, diagrams=True)
+            sections[0].content_html = False
+            return project, size
+
+        def run(prepared):
+            project, size = prepared
+            counts = project._get_generation_counts()
+            self.assertEqual(counts['content'], {'total': size, 'completed': size - 1, 'failed': 0})
+            self.assertEqual(counts['images'], {'total': size, 'completed': size, 'failed': 0})
+            self.assertEqual(project.get_generation_status()['status'], 'generating')
+
+        self._assert_constant_queries(prepare, run)
@@ -24,6 +24,18 @@ DEFAULT_GEMINI_KEY = ""
 DEFAULT_OPENAI_MODEL = "gpt-4o"
 DEFAULT_OPENAI_KEY = ""
 
+# Fixed image generation parameters per provider. They are part of the
+# illustration cache key, so changing one here invalidates cached images.
+IMAGE_GENERATION_PARAMS = {
+    'google': {'number_of_images': 1},
+    'openai': {
+        'n': 1,
+        'size': "1024x1024",
+        'quality': "standard",
+        'style': "natural",  # "natural" produces cleaner diagrams vs "vivid" (default) which over-stylizes
+    },
+}
+
 # Google types.Type -> JSON Schema type mapping
 _GTYPE_MAP = {
     'STRING': 'string',
@@ -89,6 +101,22 @@ def _gemini_schema_to_json_schema(schema):
 
     return result
 
+def _attachment_bytes(data):
+    """
+    Attachments may carry bytes, any buffer (memoryview, bytearray) or a
+    readable binary file object. Materialize to bytes only here, at the API
+    boundary, where the SDKs need it.
+    """
+    if hasattr(data, 'read'):
+        # The same file may be read for an upload and again for an inline retry
+        if hasattr(data, 'seek'):
+            data.seek(0)
+        return data.read()
+    if isinstance(data, bytes):
+        return data
+    return bytes(data)
+
+
 def _call_gemini_api(system_instructions, user_content, env, response_mime_type="text/plain", response_schema=None, model_name=None, tools=None, attachments=None):
     """
     Helper to call Google Gemini API using the SDK.
@@ -118,7 +146,11 @@ def _call_gemini_api(system_instructions, user_content, env, response_mime_type=
 
         if attachments:
             for attach in attachments:
-                parts.append(types.Part.from_bytes(data=attach['data'], mime_type=attach['mime_type']))
+                attach = _resolve_local_file_ref(attach)
+                if attach.get('file_ref'):
+                    parts.append(types.Part.from_uri(file_uri=attach['file_ref'], mime_type=attach['mime_type']))
+                else:
+                    parts.append(types.Part.from_bytes(data=_attachment_bytes(attach['data']), mime_type=attach['mime_type']))
 
         contents = [
             types.Content(
@@ -179,54 +211,174 @@ def _call_gemini_api(system_instructions, user_content, env, response_mime_type=
         _logger.error(f"Gemini SDK Error: {error_msg}")
         raise e
 
-def _render_mermaid(mermaid_code):
+# ---------- Provider file store (upload once, reference many times) ----------
+
+# Process-local stand-in for the provider file stores, used when the
+# 'project_rfp_ai.ai_file_store' parameter is 'local' (tests / offline).
+_LOCAL_FILE_STORE = {}
+LOCAL_FILE_PREFIX = 'local://'
+
+
+def _resolve_local_file_ref(attach):
+    """Turn a local:// reference back into inline bytes for the request."""
+    ref = attach.get('file_ref') or ''
+    if ref.startswith(LOCAL_FILE_PREFIX):
+        if ref not in _LOCAL_FILE_STORE:
+            # E.g. after a worker restart; same handling as a provider 404
+            raise FileNotFoundError(f"File {ref} not found in the local file store")
+        return {'data': _LOCAL_FILE_STORE[ref], 'mime_type': attach['mime_type']}
+    return attach
+
+
+def _upload_file_local(data, mime_type, env, display_name=None):
+    import hashlib
+    data = _attachment_bytes(data)
+    ref = LOCAL_FILE_PREFIX + hashlib.sha1(data).hexdigest()
+    _LOCAL_FILE_STORE[ref] = bytes(data)
+    return {'file_ref': ref, 'remote_name': ref, 'expires_at': None}
+
+
+def _upload_file_gemini(data, mime_type, env, display_name=None):
+    """
+    Upload a file to the Gemini Files API.
+    Returns: dict(file_ref=<uri>, remote_name=<files/...>, expires_at=<aware datetime|None>).
+    """
+    import io
+    import time as _time
+
+    if not genai:
+        raise ValueError("google-genai library not installed")
+    api_key = env['ir.config_parameter'].sudo().get_param('project_rfp_ai.gemini_api_key', DEFAULT_GEMINI_KEY)
+    if not api_key:
+        raise ValueError("Gemini API Key is not configured")
+
+    client = genai.Client(api_key=api_key)
+    uploaded = client.files.upload(
+        file=data if hasattr(data, 'read') else io.BytesIO(data),
+        config=types.UploadFileConfig(mime_type=mime_type, display_name=display_name),
+    )
+    # Large documents are processed server-side before they can be referenced.
+    for _attempt in range(30):
+        state = getattr(uploaded.state, 'name', str(uploaded.state or ''))
+        if state != 'PROCESSING':
+            break
+        _time.sleep(2)
+        uploaded = client.files.get(name=uploaded.name)
+    if getattr(uploaded.state, 'name', str(uploaded.state or '')) == 'FAILED':
+        raise ValueError(f"Gemini file processing failed for {display_name or uploaded.name}")
+
+    return {
+        'file_ref': uploaded.uri,
+        'remote_name': uploaded.name,
+        'expires_at': uploaded.expiration_time,
+    }
+
+
+def _upload_file_openai(data, mime_type, env, display_name=None):
     """
-    Render Mermaid.js code to PNG image bytes via the Kroki.io API (POST).
-    Returns: image bytes (PNG) or None.
+    Upload a file to the OpenAI Files API (purpose=user_data).
+    Returns: dict(file_ref=<file id>, remote_name=<file id>, expires_at=None).
     """
-    import json as _json, urllib.request
-
-    # Strip YAML frontmatter (---\n...\n---) that Kroki doesn't support
-    lines = mermaid_code.strip().split('\n')
-    if lines and lines[0].strip() == '---':
-        end_idx = next((i for i in range(1, len(lines)) if lines[i].strip() == '---'), None)
-        if end_idx is not None:
-            lines = lines[end_idx + 1:]
-    # Strip classDef/linkStyle lines that can cause errors
-    lines = [l for l in lines if not l.strip().startswith(('classDef ', 'linkStyle '))]
-    clean_code = '\n'.join(lines).strip()
-
-    # Prepend theme config for visible arrows and clean styling
-    theme_init = (
-        '%%{init: {"theme": "base", "themeVariables": {'
-        '"primaryColor": "#e8f0fe", "primaryBorderColor": "#1a73e8", '
-        '"primaryTextColor": "#1a1a1a", "lineColor": "#1a73e8", '
-        '"secondaryColor": "#f1f3f4", "tertiaryColor": "#fff"'
-        '}}}%%'
+    if not openai_lib:
+        raise ValueError("openai library not installed")
+    api_key = env['ir.config_parameter'].sudo().get_param('project_rfp_ai.openai_api_key', DEFAULT_OPENAI_KEY)
+    if not api_key:
+        raise ValueError("OpenAI API Key is not configured")
+
+    client = openai_lib.OpenAI(api_key=api_key, timeout=3600)
+    uploaded = client.files.create(
+        file=(display_name or 'document.pdf', _attachment_bytes(data), mime_type),
+        purpose='user_data',
     )
-    if not clean_code.startswith('%%{'):
-        clean_code = theme_init + '\n' + clean_code
+    # OpenAI files do not expire; rfp.ai.file applies its own retention.
+    return {'file_ref': uploaded.id, 'remote_name': uploaded.id, 'expires_at': None}
 
-    try:
-        # Use POST for reliability with longer diagrams
-        payload = _json.dumps({"diagram_source": clean_code, "diagram_type": "mermaid", "output_format": "png"})
-        req = urllib.request.Request(
-            'https://kroki.io/',
-            data=payload.encode('utf-8'),
-            headers={'Content-Type': 'application/json', 'User-Agent': 'RFP-AI/1.0'},
-        )
-        resp = urllib.request.urlopen(req, timeout=30)
-        image_bytes = resp.read()
 
-        if image_bytes[:4] == bytes([0x89, 0x50, 0x4E, 0x47]):
-            _logger.info(f"Mermaid diagram rendered: {len(image_bytes)} bytes")
-            return image_bytes
-        else:
-            _logger.error("Kroki returned non-PNG response")
-            return None
-    except Exception as e:
-        _logger.error(f"Mermaid rendering failed: {e}")
-        raise
+def _delete_file_local(remote_name, env):
+    _LOCAL_FILE_STORE.pop(remote_name, None)
+
+
+def _delete_file_gemini(remote_name, env):
+    if not genai:
+        raise ValueError("google-genai library not installed")
+    api_key = env['ir.config_parameter'].sudo().get_param('project_rfp_ai.gemini_api_key', DEFAULT_GEMINI_KEY)
+    if not api_key:
+        raise ValueError("Gemini API Key is not configured")
+    genai.Client(api_key=api_key).files.delete(name=remote_name)
+
+
+def _delete_file_openai(remote_name, env):
+    if not openai_lib:
+        raise ValueError("openai library not installed")
+    api_key = env['ir.config_parameter'].sudo().get_param('project_rfp_ai.openai_api_key', DEFAULT_OPENAI_KEY)
+    if not api_key:
+        raise ValueError("OpenAI API Key is not configured")
+    openai_lib.OpenAI(api_key=api_key, timeout=60).files.delete(remote_name)
+
+
+_FILE_UPLOADERS = {
+    'google': _upload_file_gemini,
+    'openai': _upload_file_openai,
+    'local': _upload_file_local,
+}
+
+_FILE_DELETERS = {
+    'google': _delete_file_gemini,
+    'openai': _delete_file_openai,
+    'local': _delete_file_local,
+}
+
+_FILE_STORE_KEY_PARAMS = {
+    'google': ('project_rfp_ai.gemini_api_key', DEFAULT_GEMINI_KEY),
+    'openai': ('project_rfp_ai.openai_api_key', DEFAULT_OPENAI_KEY),
+}
+
+# Error text of a request that references a file the provider does not know,
+# e.g. deleted remotely or uploaded with another API key / account.
+_MISSING_FILE_MARKERS = ('not found', 'not_found', 'no such file', 'does not exist',
+                         'permission_denied', 'do not have permission', 'does not have permission')
+
+
+def _file_store_supports(provider, mime_type):
+    """Whether a file of this type can be sent by reference to the provider."""
+    if provider == 'openai':
+        # Chat completions only accept file ids for documents, not images.
+        return mime_type == 'application/pdf'
+    return provider in _FILE_UPLOADERS
+
+
+def _file_ref_available(provider, file_ref):
+    """Local references do not survive a restart; provider ones live until expiry."""
+    if provider == 'local':
+        return file_ref in _LOCAL_FILE_STORE
+    return True
+
+
+def _upload_file(provider, data, mime_type, env, display_name=None):
+    return _FILE_UPLOADERS[provider](data, mime_type, env, display_name=display_name)
+
+
+def _delete_file(provider, remote_name, env):
+    return _FILE_DELETERS[provider](remote_name, env)
+
+
+def _file_store_account(provider, env):
+    """Fingerprint of the API key files are uploaded with (never the key itself).
+
+    File references only resolve for the account that uploaded them.
+    """
+    import hashlib
+    param, default = _FILE_STORE_KEY_PARAMS.get(provider, (None, ''))
+    api_key = env['ir.config_parameter'].sudo().get_param(param, default) if param else ''
+    return hashlib.sha256(f"{provider}:{api_key or ''}".encode()).hexdigest()[:16]
+
+
+def _is_missing_file_error(error):
+    """Whether a provider error means a referenced file is gone or not ours."""
+    if isinstance(error, FileNotFoundError):
+        return True
+    message = str(error).lower()
+    return 'file' in message and any(marker in message for marker in _MISSING_FILE_MARKERS)
 
 
 def _generate_image_gemini(prompt, env, model_name='imagen-3.0-generate-001'):
@@ -249,9 +401,7 @@ def _generate_image_gemini(prompt, env, model_name='imagen-3.0-generate-001'):
     response = client.models.generate_images(
         model=model_name,
         prompt=prompt,
-        config=types.GenerateImagesConfig(
-            number_of_images=1,
-        )
+        config=types.GenerateImagesConfig(**IMAGE_GENERATION_PARAMS['google'])
     )
     
     if response.generated_images:
@@ -292,23 +442,30 @@ def _call_openai_api(system_instructions, user_content, env, response_mime_type=
         if attachments:
             user_parts = [{"type": "text", "text": user_content}]
             for attach in attachments:
+                attach = _resolve_local_file_ref(attach)
                 mime = attach.get('mime_type', 'application/octet-stream')
-                if mime.startswith('image/'):
-                    b64_data = base64.b64encode(attach['data']).decode('utf-8')
+                if attach.get('file_ref'):
+                    # Uploaded once via the Files API, referenced by id
+                    user_parts.append({
+                        "type": "file",
+                        "file": {"file_id": attach['file_ref']}
+                    })
+                elif mime.startswith('image/'):
+                    b64_data = base64.b64encode(_attachment_bytes(attach['data'])).decode('ascii')
                     user_parts.append({
                         "type": "image_url",
                         "image_url": {"url": f"data:{mime};base64,{b64_data}"}
                     })
                 # For PDFs and other files, encode as base64 in text
                 elif mime == 'application/pdf':
-                    b64_data = base64.b64encode(attach['data']).decode('utf-8')
+                    b64_data = base64.b64encode(_attachment_bytes(attach['data'])).decode('ascii')
                     user_parts.append({
                         "type": "file",
                         "file": {"filename": "document.pdf", "file_data": f"data:{mime};base64,{b64_data}"}
                     })
                 else:
-                    # Fallback: include as base64 text block
-                    b64_data = base64.b64encode(attach['data']).decode('utf-8')
+                    # Fallback: include as base64 text block (only the preview is sent)
+                    b64_data = base64.b64encode(memoryview(_attachment_bytes(attach['data']))[:150]).decode('ascii')
                     user_parts.append({
                         "type": "text",
                         "text": f"[Attached file ({mime})]: {b64_data[:200]}..."
@@ -386,11 +543,8 @@ def _generate_image_openai(prompt, env, model_name='dall-e-3'):
     response = client.images.generate(
         model=model_name,
         prompt=prompt,
-        n=1,
-        size="1024x1024",
-        quality="standard",
-        style="natural",  # "natural" produces cleaner diagrams vs "vivid" (default) which over-stylizes
         response_format="b64_json",
+        **IMAGE_GENERATION_PARAMS['openai'],
     )
 
     if response.data:
@@ -0,0 +1,76 @@
+import functools
+import logging
+import zlib
+
+from odoo.addons.project_rfp_ai.const import CHANNEL_BULK, CHANNEL_IMAGES, CHANNEL_BACKGROUND
+
+_logger = logging.getLogger(__name__)
+
+CONCURRENCY_PARAM = 'project_rfp_ai.generation_concurrency'
+DEFAULT_CONCURRENCY = 1
+# Seconds before a job that found every slot busy is retried.
+SLOT_RETRY_SECONDS = 10
+# First key of the two-key advisory lock; the second key is the slot number.
+_LOCK_NAMESPACE = zlib.crc32(b'project_rfp_ai.generation') & 0x7FFFFFFF
+# Lanes sharing the slot pool. The interactive lane is only bounded by its
+# channel capacity so that bulk runs never hold up a waiting user.
+THROTTLED_CHANNELS = (CHANNEL_BULK, CHANNEL_IMAGES, CHANNEL_BACKGROUND)
+
+
+def get_generation_concurrency(env):
+    """Configured number of AI generation jobs allowed to run at once."""
+    value = env['ir.config_parameter'].sudo().get_param(CONCURRENCY_PARAM, DEFAULT_CONCURRENCY)
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        return DEFAULT_CONCURRENCY
+
+
+def acquire_generation_slot(env):
+    """
+    Take one of the configured generation slots for the current transaction.
+
+    Slots are PostgreSQL transaction-level advisory locks, so they are shared
+    by every worker process, released automatically on commit/rollback, and
+    the limit follows the setting without a restart. When all slots are busy
+    the job is postponed via RetryableJobError (not counted as a retry).
+
+    Returns:
+        int: The slot number held.
+    """
+    from odoo.addons.queue_job.exception import RetryableJobError
+
+    limit = get_generation_concurrency(env)
+    for slot in range(limit):
+        env.cr.execute("SELECT pg_try_advisory_xact_lock(%s, %s)", (_LOCK_NAMESPACE, slot))
+        if env.cr.fetchone()[0]:
+            return slot
+    raise RetryableJobError(
+        f"All {limit} AI generation slots are busy",
+        seconds=SLOT_RETRY_SECONDS,
+        ignore_retry=True,
+    )
+
+
+def _get_job_channel(env, job_uuid):
+    env.cr.execute("SELECT channel FROM queue_job WHERE uuid = %s", (job_uuid,))
+    row = env.cr.fetchone()
+    return row[0] if row else None
+
+
+def generation_slot(method):
+    """
+    Decorator for queue job methods that call the AI providers.
+
+    Only applies when the method runs as a queue job (``job_uuid`` in the
+    context) on one of the ``THROTTLED_CHANNELS``; direct calls and
+    interactive-lane jobs are not throttled.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        job_uuid = self.env.context.get('job_uuid')
+        if job_uuid and _get_job_channel(self.env, job_uuid) in THROTTLED_CHANNELS:
+            slot = acquire_generation_slot(self.env)
+            _logger.debug("%s.%s running in generation slot %d", self._name, method.__name__, slot)
+        return method(self, *args, **kwargs)
+    return wrapper
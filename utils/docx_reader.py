@@ -0,0 +1,168 @@
+import io
+import re
+import zipfile
+from xml.etree import ElementTree
+
+NS_W = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+NS_R = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+_W_BODY = f'{{{NS_W}}}body'
+_W_P = f'{{{NS_W}}}p'
+_W_T = f'{{{NS_W}}}t'
+_W_TBL = f'{{{NS_W}}}tbl'
+_W_TR = f'{{{NS_W}}}tr'
+_W_TC = f'{{{NS_W}}}tc'
+_W_SDT = f'{{{NS_W}}}sdt'
+_W_ALT_CHUNK = f'{{{NS_W}}}altChunk'
+_R_ID = f'{{{NS_R}}}id'
+
+
+def _strip_html(html_str):
+    """Strip HTML tags and return clean text."""
+    text = re.sub(r'<[^>]+>', ' ', html_str)
+    text = re.sub(r'&amp;', '&', text)
+    text = re.sub(r'&lt;', '<', text)
+    text = re.sub(r'&gt;', '>', text)
+    text = re.sub(r'&nbsp;', ' ', text)
+    text = re.sub(r'&#\d+;', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def _read_relationships(zf, names):
+    """Map relationship Id -> Target for word/document.xml."""
+    rel_map = {}
+    rels_path = 'word/_rels/document.xml.rels'
+    if rels_path in names:
+        with zf.open(rels_path) as rels_xml:
+            for rel in ElementTree.parse(rels_xml).getroot():
+                rid = rel.get('Id', '')
+                target = rel.get('Target', '')
+                if target:
+                    rel_map[rid] = target
+    return rel_map
+
+
+def _read_alt_chunk(zf, names, target):
+    """Return the plain text of an altChunk HTML part, or '' if unavailable."""
+    html_path = f'word/{target}' if not target.startswith('word/') else target
+    if html_path not in names:
+        return ''
+    try:
+        with zf.open(html_path) as hf:
+            return _strip_html(hf.read().decode('utf-8', errors='ignore'))
+    except Exception:
+        return ''
+
+
+def _block_lines(elem):
+    """Lines of one body-level paragraph, content control or table.
+
+    Rows and cells are matched at any depth, as the extractor always did: a
+    nested table's text is part of its outer cell and its rows follow as
+    lines of their own.
+    """
+    if elem.tag in (_W_P, _W_SDT):
+        texts = [t.text for t in elem.iter(_W_T) if t.text]
+        if texts:
+            yield ''.join(texts)
+    elif elem.tag == _W_TBL:
+        for row in elem.iter(_W_TR):
+            cells = [' '.join(t.text for t in cell.iter(_W_T) if t.text) for cell in row.iter(_W_TC)]
+            if cells:
+                yield '\t'.join(cells)
+
+
+def _iter_body_text(zf, names, rel_map, xml_file):
+    """Stream lines out of word/document.xml in document order.
+
+    Each body-level block is turned into lines once it is fully parsed
+    (see _block_lines), altChunk parts are resolved to their HTML text.
+    Processed blocks are dropped from the tree so memory stays bounded by
+    the largest single block, not by the document.
+    """
+    body = None
+    depth = 0
+    body_depth = None
+    saw_body = False
+
+    for event, elem in ElementTree.iterparse(xml_file, events=('start', 'end')):
+        if event == 'start':
+            depth += 1
+            if elem.tag == _W_BODY and body is None:
+                body, body_depth, saw_body = elem, depth, True
+            continue
+
+        # --- end event ---
+        if not saw_body and elem.tag == _W_T and elem.text:
+            # Degenerate package without a body: keep every run.
+            yield elem.text
+        elif body_depth is not None and depth == body_depth + 1:
+            if elem.tag == _W_ALT_CHUNK:
+                target = rel_map.get(elem.get(_R_ID, ''), '')
+                if target:
+                    clean_text = _read_alt_chunk(zf, names, target)
+                    if clean_text:
+                        yield clean_text
+            else:
+                yield from _block_lines(elem)
+            # Drop the processed block (and its already-empty siblings).
+            body.clear()
+        elif elem.tag == _W_BODY:
+            body_depth = None
+
+        depth -= 1
+
+
+def _iter_part_paragraphs(xml_file):
+    """One line per paragraph of a header/footer part (nested ones included).
+
+    Headers and footers are small, so the part is parsed whole.
+    """
+    for p in ElementTree.parse(xml_file).getroot().iter(_W_P):
+        texts = [t.text for t in p.iter(_W_T) if t.text]
+        if texts:
+            yield ''.join(texts)
+
+
+def iter_docx_text(source):
+    """Yield text lines from a DOCX in document order with bounded memory.
+
+    Order: body (paragraphs, table rows, altChunk HTML), then headers and
+    footers. ``source`` may be raw bytes or a seekable binary file object.
+    Callers can stop iterating early once they have enough text.
+    """
+    fileobj = io.BytesIO(source) if isinstance(source, (bytes, bytearray, memoryview)) else source
+    with zipfile.ZipFile(fileobj) as zf:
+        names = set(zf.namelist())
+        rel_map = _read_relationships(zf, names)
+
+        if 'word/document.xml' in names:
+            with zf.open('word/document.xml') as doc_xml:
+                yield from _iter_body_text(zf, names, rel_map, doc_xml)
+
+        for name in sorted(names):
+            if name.startswith('word/header') or name.startswith('word/footer'):
+                try:
+                    with zf.open(name) as hf_xml:
+                        yield from _iter_part_paragraphs(hf_xml)
+                except Exception:
+                    pass
+
+
+def extract_docx_text(source, max_chars=None):
+    """Extract plain text from a DOCX file.
+
+    Args:
+        source: DOCX bytes or a seekable binary file object.
+        max_chars: Optional cap; parsing stops as soon as it is reached.
+    """
+    parts = []
+    total = 0
+    for line in iter_docx_text(source):
+        parts.append(line)
+        total += len(line) + 1
+        if max_chars and total >= max_chars:
+            break
+    text = '\n'.join(parts)
+    return text[:max_chars] if max_chars else text
@@ -0,0 +1,48 @@
+import io
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Longest side of the derivatives, in pixels. The display copy is what the
+# editor preview and the export view load; the thumbnail fills a diagram card.
+DISPLAY_SIZE = 1280
+THUMB_SIZE = 384
+WEBP_QUALITY = 80
+
+
+def _encode_webp(image, size):
+    image = image.copy()
+    image.thumbnail((size, size))
+    output = io.BytesIO()
+    image.save(output, format='WEBP', quality=WEBP_QUALITY, method=4)
+    return output.getvalue(), image.width
+
+
+def make_variants(data):
+    """
+    Compressed WebP derivatives of an image for the browser.
+
+    The original is left untouched (the Word export needs it). Images the
+    server cannot decode, or a Pillow built without WebP, give no variants;
+    templates then fall back to the original.
+
+    Returns:
+        dict: {'display': bytes, 'display_width': int, 'thumb': bytes, 'thumb_width': int},
+        or {} when no variant could be made.
+    """
+    if not data:
+        return {}
+    try:
+        from PIL import Image, features
+        if not features.check('webp'):
+            return {}
+        with Image.open(io.BytesIO(data)) as image:
+            image.load()
+            # Keep transparency; everything else (palette, CMYK...) goes to RGB
+            image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+            display, display_width = _encode_webp(image, DISPLAY_SIZE)
+            thumb, thumb_width = _encode_webp(image, THUMB_SIZE)
+    except Exception as e:
+        _logger.warning("Could not build image variants: %s", e)
+        return {}
+    return {'display': display, 'display_width': display_width, 'thumb': thumb, 'thumb_width': thumb_width}
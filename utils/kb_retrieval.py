@@ -0,0 +1,140 @@
+import math
+import re
+from collections import Counter
+
+# Default number of KB sections and approximate token budget injected into
+# a single section writer prompt.
+DEFAULT_TOP_K = 4
+DEFAULT_TOKEN_BUDGET = 1500
+# Matches scoring below this fraction of the best match are dropped.
+RELATIVE_SCORE_CUTOFF = 0.25
+# Rough chars-per-token ratio used to turn the token budget into characters.
+CHARS_PER_TOKEN = 4
+
+_BM25_K1 = 1.5
+_BM25_B = 0.75
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have in into is it its of on or that the
+their this to was were will with within section sections all any other per
+""".split())
+
+# Vocabulary attached to each rfp.kb.section type so that a target section
+# titled e.g. "Pricing Schedule" still reaches a KB section typed 'budget'.
+KB_TYPE_KEYWORDS = {
+    'introduction': 'introduction overview background purpose scope objectives',
+    'functional': 'functional requirements features capabilities use cases',
+    'technical': 'technical architecture infrastructure integration platform',
+    'compliance': 'compliance standards regulation regulatory legal certification',
+    'security': 'security privacy access protection data confidentiality',
+    'timeline': 'timeline schedule milestones delivery phases plan',
+    'budget': 'budget cost pricing commercial payment quantities boq',
+    'evaluation': 'evaluation criteria scoring selection award',
+    'support': 'support sla maintenance warranty service level',
+    'appendix': 'appendix glossary annex references',
+}
+
+# Extra query terms for rfp.document.section types.
+SECTION_TYPE_KEYWORDS = {
+    'boq': 'bill quantities boq pricing cost budget',
+}
+
+
+def _stem(word):
+    for suffix in ('ies', 'ing', 'ed', 'es', 's'):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[:-len(suffix)] + ('y' if suffix == 'ies' else '')
+    return word
+
+
+def tokenize(text):
+    """Lowercase, split on non-alphanumerics, drop stopwords, light stemming."""
+    return [_stem(w) for w in _WORD_RE.findall((text or '').lower())
+            if len(w) > 1 and w not in _STOPWORDS]
+
+
+class KbSectionIndex:
+    """
+    In-memory BM25 index over knowledge base sections.
+
+    Documents are dicts with at least 'section_title', 'section_type' and
+    'best_practices'; 'key_topics' (list of str) is optional. Title, type
+    vocabulary and key topics are counted twice so they outweigh body text.
+    """
+
+    def __init__(self, documents):
+        self.documents = list(documents)
+        self._term_freqs = []
+        doc_freq = Counter()
+        for doc in self.documents:
+            heading = ' '.join([
+                doc.get('section_title') or '',
+                KB_TYPE_KEYWORDS.get(doc.get('section_type'), ''),
+                ' '.join(doc.get('key_topics') or []),
+            ])
+            tokens = tokenize(heading) * 2 + tokenize(doc.get('best_practices'))
+            freqs = Counter(tokens)
+            self._term_freqs.append((freqs, len(tokens)))
+            doc_freq.update(freqs.keys())
+
+        count = len(self.documents)
+        self._avg_len = (sum(length for _f, length in self._term_freqs) / count) if count else 0.0
+        self._idf = {term: math.log(1 + (count - df + 0.5) / (df + 0.5))
+                     for term, df in doc_freq.items()}
+
+    def score(self, query_tokens):
+        """Return the BM25 score of every document for the query, in index order."""
+        query_terms = set(query_tokens)
+        scores = []
+        for freqs, length in self._term_freqs:
+            norm = _BM25_K1 * (1 - _BM25_B + _BM25_B * length / (self._avg_len or 1))
+            total = 0.0
+            for term in query_terms:
+                tf = freqs.get(term)
+                if tf:
+                    total += self._idf[term] * tf * (_BM25_K1 + 1) / (tf + norm)
+            scores.append(total)
+        return scores
+
+    def search(self, query, section_type=None, top_k=DEFAULT_TOP_K, token_budget=DEFAULT_TOKEN_BUDGET):
+        """
+        Rank KB sections against a target section and keep the best ones.
+
+        Args:
+            query: Target section title (plus any intent text).
+            section_type: rfp.document.section type, adds its vocabulary.
+            top_k: Maximum number of KB sections returned.
+            token_budget: Approximate cap on the returned best-practice text.
+        Returns:
+            list of (score, document), best first.
+        """
+        query_tokens = tokenize(query) + tokenize(SECTION_TYPE_KEYWORDS.get(section_type, ''))
+        if not self.documents or not query_tokens:
+            return []
+
+        scores = self.score(query_tokens)
+        # Stable sort: ties keep KB order
+        ranked = sorted(((scores[i], i) for i in range(len(scores))), key=lambda item: -item[0])
+        best = ranked[0][0]
+        if best <= 0:
+            return []
+
+        results = []
+        budget_chars = token_budget * CHARS_PER_TOKEN if token_budget else None
+        used_chars = 0
+        for score, index in ranked[:top_k]:
+            if score < best * RELATIVE_SCORE_CUTOFF:
+                break
+            doc = self.documents[index]
+            size = len(doc.get('best_practices') or '') + len(doc.get('section_title') or '')
+            if budget_chars and used_chars + size > budget_chars:
+                if results:
+                    break
+                # The best match alone is over budget: keep a truncated copy.
+                doc = dict(doc, best_practices=(doc.get('best_practices') or '')[:budget_chars])
+                size = budget_chars
+            used_chars += size
+            results.append((score, doc))
+        return results
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+import urllib.request
+
+_logger = logging.getLogger(__name__)
+
+RENDERER_PARAM = 'project_rfp_ai.mermaid_renderer'
+KROKI_URL_PARAM = 'project_rfp_ai.kroki_url'
+MMDC_PATH_PARAM = 'project_rfp_ai.mmdc_path'
+MMDC_WORKERS_PARAM = 'project_rfp_ai.mmdc_workers'
+RENDER_THREADS_PARAM = 'project_rfp_ai.render_threads'
+FORMAT_PARAM = 'project_rfp_ai.mermaid_format'
+
+DEFAULT_RENDERER = 'kroki'
+DEFAULT_KROKI_URL = 'https://kroki.io/'
+DEFAULT_MMDC_PATH = 'mmdc'
+DEFAULT_MMDC_WORKERS = 2
+# Diagrams of one section rendered at once by a batch render job.
+DEFAULT_RENDER_THREADS = 4
+# Vector output is smaller and stays sharp; PNG is derived on demand for Word.
+DEFAULT_FORMAT = 'svg'
+RENDER_TIMEOUT = 30
+
+PNG_SIGNATURE = b'\x89PNG'
+MIMETYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+# Prepended to diagrams without their own init block: visible arrows and
+# clean styling. Part of the cache key, so changing it re-renders.
+THEME_INIT = (
+    '%%{init: {"theme": "base", "themeVariables": {'
+    '"primaryColor": "#e8f0fe", "primaryBorderColor": "#1a73e8", '
+    '"primaryTextColor": "#1a1a1a", "lineColor": "#1a73e8", '
+    '"secondaryColor": "#f1f3f4", "tertiaryColor": "#fff"'
+    '}}}%%'
+)
+
+
+def clean_mermaid_source(mermaid_code):
+    """Strip what renderers choke on and apply the default theme."""
+    # Strip YAML frontmatter (---\n...\n---) that Kroki doesn't support
+    lines = (mermaid_code or '').strip().split('\n')
+    if lines and lines[0].strip() == '---':
+        end_idx = next((i for i in range(1, len(lines)) if lines[i].strip() == '---'), None)
+        if end_idx is not None:
+            lines = lines[end_idx + 1:]
+    # Strip classDef/linkStyle lines that can cause errors
+    lines = [l for l in lines if not l.strip().startswith(('classDef ', 'linkStyle '))]
+    clean_code = '\n'.join(lines).strip()
+    if not clean_code.startswith('%%{'):
+        clean_code = THEME_INIT + '\n' + clean_code
+    return clean_code
+
+
+def source_key(clean_code, output_format='png'):
+    """Content address of a rendered diagram: its cleaned source (theme included) and format."""
+    return hashlib.sha256(f"mermaid:{output_format}\n{clean_code}".encode()).hexdigest()
+
+
+def _render_kroki(clean_code, config, output_format='png'):
+    """Render through a Kroki server (public kroki.io or self-hosted)."""
+    payload = json.dumps({"diagram_source": clean_code, "diagram_type": "mermaid",
+                          "output_format": output_format})
+    req = urllib.request.Request(
+        config.get('kroki_url') or DEFAULT_KROKI_URL,
+        data=payload.encode('utf-8'),
+        headers={'Content-Type': 'application/json', 'User-Agent': 'RFP-AI/1.0'},
+    )
+    with urllib.request.urlopen(req, timeout=RENDER_TIMEOUT) as resp:
+        return resp.read()
+
+
+# Bounds concurrent mermaid-cli processes (each one starts a headless browser).
+_mmdc_slots = None
+_mmdc_slots_size = 0
+_mmdc_slots_lock = threading.Lock()
+
+
+def _get_mmdc_slots(size):
+    global _mmdc_slots, _mmdc_slots_size
+    with _mmdc_slots_lock:
+        if _mmdc_slots is None or _mmdc_slots_size != size:
+            _mmdc_slots = threading.BoundedSemaphore(size)
+            _mmdc_slots_size = size
+        return _mmdc_slots
+
+
+def _render_mmdc(clean_code, config, output_format='png'):
+    """Render with a local mermaid-cli (``mmdc``) subprocess."""
+    slots = _get_mmdc_slots(max(1, int(config.get('mmdc_workers') or DEFAULT_MMDC_WORKERS)))
+    with slots, tempfile.TemporaryDirectory(prefix='rfp_mermaid_') as tmp_dir:
+        source_path = os.path.join(tmp_dir, 'diagram.mmd')
+        output_path = os.path.join(tmp_dir, f'diagram.{output_format}')
+        with open(source_path, 'w', encoding='utf-8') as f:
+            f.write(clean_code)
+        result = subprocess.run(
+            [config.get('mmdc_path') or DEFAULT_MMDC_PATH, '-i', source_path, '-o', output_path,
+             '-b', 'white', '--quiet'],
+            capture_output=True, timeout=RENDER_TIMEOUT, check=False,
+        )
+        if result.returncode != 0 or not os.path.exists(output_path):
+            raise RuntimeError(f"mermaid-cli failed: {result.stderr.decode(errors='replace')[:500]}")
+        with open(output_path, 'rb') as f:
+            return f.read()
+
+
+RENDERERS = {
+    'kroki': _render_kroki,
+    'mmdc': _render_mmdc,
+}
+
+
+def get_renderer_config(env):
+    ICP = env['ir.config_parameter'].sudo()
+    return {
+        'renderer': ICP.get_param(RENDERER_PARAM, DEFAULT_RENDERER),
+        'kroki_url': ICP.get_param(KROKI_URL_PARAM, DEFAULT_KROKI_URL),
+        'mmdc_path': ICP.get_param(MMDC_PATH_PARAM, DEFAULT_MMDC_PATH),
+        'mmdc_workers': ICP.get_param(MMDC_WORKERS_PARAM, DEFAULT_MMDC_WORKERS),
+        'render_threads': ICP.get_param(RENDER_THREADS_PARAM, DEFAULT_RENDER_THREADS),
+        'output_format': ICP.get_param(FORMAT_PARAM, DEFAULT_FORMAT),
+    }
+
+
+def is_valid_output(data, output_format):
+    """Whether renderer output is an image of the requested format (and not an error page)."""
+    if not data:
+        return False
+    if output_format == 'svg':
+        return b'<svg' in data[:2048]
+    return data[:4] == PNG_SIGNATURE
+
+
+def render_mermaid_source(clean_code, config, output_format='png'):
+    """
+    Render cleaned Mermaid code to PNG or SVG bytes with the configured backend.
+
+    Needs no environment, so it can run in worker threads.
+
+    Returns:
+        bytes: The image, or None if the backend returned something else.
+    """
+    renderer = RENDERERS.get(config.get('renderer')) or RENDERERS[DEFAULT_RENDERER]
+    try:
+        image_bytes = renderer(clean_code, config, output_format=output_format)
+    except Exception as e:
+        _logger.error("Mermaid rendering failed (%s): %s", config.get('renderer'), e)
+        raise
+    if is_valid_output(image_bytes, output_format):
+        _logger.info("Mermaid diagram rendered: %d bytes of %s", len(image_bytes), output_format)
+        return image_bytes
+    _logger.error("Mermaid renderer %s returned no %s image", config.get('renderer'), output_format)
+    return None
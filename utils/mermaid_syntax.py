@@ -0,0 +1,308 @@
+"""
+Local syntax check of Mermaid code before it is sent to a renderer.
+
+Covers the grammars the writer produces most (flowchart, sequence, class
+and ER diagrams) line by line. It is deliberately lenient: it only reports
+constructs the Mermaid parser is known to reject, so a valid diagram is
+never held back. Other diagram types are accepted unchecked.
+"""
+import re
+
+MAX_ERRORS = 5
+
+# What happens to invalid writer output: 'repair' asks the model once to fix
+# it, 'flag' only marks the diagram as failed.
+INVALID_ACTION_PARAM = 'project_rfp_ai.mermaid_invalid_action'
+DEFAULT_INVALID_ACTION = 'repair'
+
+FLOWCHART_DIRECTIONS = {'TB', 'TD', 'BT', 'RL', 'LR'}
+UNCHECKED_TYPES = {
+    'stateDiagram', 'stateDiagram-v2', 'gantt', 'pie', 'journey', 'gitGraph', 'mindmap', 'timeline',
+    'quadrantChart', 'requirementDiagram', 'C4Context', 'C4Container', 'C4Component', 'C4Dynamic',
+    'C4Deployment', 'sankey-beta', 'xychart-beta', 'block-beta', 'packet-beta', 'architecture-beta',
+    'kanban', 'radar-beta', 'treemap-beta',
+}
+
+_NODE_ID_RE = re.compile(r'[\w\u00C0-\uFFFF]+(?:-(?![-.>])[\w\u00C0-\uFFFF]+)*')
+# Shape openers, longest first, with their closers
+_SHAPES = [
+    ('(((', ')))'), ('((', '))'), ('([', '])'), ('[[', ']]'), ('[(', ')]'), ('{{', '}}'),
+    ('[/', ('/]', '\\]')), ('[\\', ('\\]', '/]')), ('(', ')'), ('[', ']'), ('{', '}'), ('>', ']'),
+]
+_LABELLED_LINK_RE = re.compile(r'(--|==|-\.)(?![-=.>ox])\s*([^|]+?)\s*(-{2,}[>ox]|={2,}[>ox]|\.-+[>ox]|-{3,}|={3,}|\.-+)')
+_LINK_RE = re.compile(r'<?(?:-{2,}|={2,}|-\.+-)[>ox]?|[ox](?:-{2,}|={2,}|-\.+-)[ox]|~{3,}')
+_PIPE_LABEL_RE = re.compile(r'\|[^|]*\|')
+_FLOWCHART_KEYWORDS = ('style ', 'classDef ', 'class ', 'click ', 'linkStyle ', 'direction ')
+
+_SEQUENCE_ARROWS = r'(?:<<-->>|<<->>|-->>|->>|-->|->|--x|-x|--\)|-\))'
+_SEQUENCE_MESSAGE_RE = re.compile(r'^([^:]+?)\s*' + _SEQUENCE_ARROWS + r'\s*[+-]?\s*([^:]+?)\s*(?::.*)?$')
+_SEQUENCE_STATEMENT_RE = re.compile(
+    r'^(?:(?:create\s+)?(?:participant|actor)\s+\S.*|destroy\s+\S+|autonumber.*|(?:de)?activate\s+\S+'
+    r'|note\s+(?:left of|right of|over)\s+[^:]+:.*|title\b.*|acc(?:Title|Descr)\b.*'
+    r'|links?\s+\S.*|properties\s+\S.*|details\s+\S.*|box\b.*)$', re.I)
+_SEQUENCE_BLOCKS = ('loop', 'alt', 'opt', 'par', 'critical', 'break', 'rect')
+_SEQUENCE_BRANCHES = {'else': 'alt', 'and': 'par', 'option': 'critical'}
+
+_CLASS_NAME = r'(?:`[^`]+`|[\w.]+(?:~[^~]+~)?)'
+_CLASS_RELATION_RE = re.compile(
+    r'^' + _CLASS_NAME + r'\s*(?:"[^"]*")?\s*(?:<\||[*o<])?(?:--|\.\.)(?:\|>|[*o>])?\s*(?:"[^"]*")?\s*'
+    + _CLASS_NAME + r'\s*(?::.*)?$')
+_CLASS_STATEMENT_RE = re.compile(
+    r'^(?:class\s+' + _CLASS_NAME + r'(?:\["[^"]*"\])?(?::::\w+)?\s*\{?|<<[^>]+>>\s*' + _CLASS_NAME
+    + r'|' + _CLASS_NAME + r'\s*:\s*.+|note(?:\s+for\s+\S+)?\s+".*"|namespace\s+\S+\s*\{'
+    + r'|direction\s+\w+|(?:style|classDef|cssClass|click|callback|link)\s+.+|title\b.*|acc(?:Title|Descr)\b.*)$')
+
+_ER_ENTITY = r'(?:"[^"]+"|[\w-]+)(?:\["[^"]*"\])?'
+_ER_RELATION_RE = re.compile(
+    r'^(' + _ER_ENTITY + r')\s*(\|o|\|\||\}o|\}\|)(--|\.\.)(o\||\|\||o\{|\|\{)\s*(' + _ER_ENTITY + r')\s*(:\s*\S.*)?$')
+_ER_ENTITY_RE = re.compile(r'^' + _ER_ENTITY + r'\s*\{?$')
+# Relationships written with word cardinalities ("CUSTOMER one or more to zero or many ORDER : places")
+_ER_WORD_RELATION_RE = re.compile(r'^' + _ER_ENTITY + r'\s+[\w ()+]+?\s+(?:optionally\s+)?to\s+[\w ()+]+?\s+' + _ER_ENTITY + r'\s*:\s*\S.*$')
+_ER_ATTRIBUTE_RE = re.compile(r'^[A-Za-z_*][\w\-\[\]()*,]*\s+[\w\-*\[\]]+(?:\s+(?:PK|FK|UK)(?:\s*,\s*(?:PK|FK|UK))*)?(?:\s+"[^"]*")?$')
+
+
+def _body_lines(code):
+    """(line number, stripped text) of the diagram, without frontmatter, comments and blank lines."""
+    lines = (code or '').split('\n')
+    start = 0
+    if lines and lines[0].strip() == '---':
+        end_idx = next((i for i in range(1, len(lines)) if lines[i].strip() == '---'), None)
+        if end_idx is not None:
+            start = end_idx + 1
+    return [(number + 1, line.strip()) for number, line in enumerate(lines[start:], start)
+            if line.strip() and not line.strip().startswith('%%')]
+
+
+def _scan_label(text, pos, closer):
+    """
+    Read a node label starting at ``pos``; return (end position after the closer, error).
+
+    Unquoted labels may not contain other bracket characters, which is the
+    writer's most common mistake (``A[Gateway (v2)]``).
+    """
+    closers = closer if isinstance(closer, tuple) else (closer,)
+    if text.startswith('"', pos):
+        end_quote = text.find('"', pos + 1)
+        if end_quote < 0:
+            return None, "unterminated quoted label"
+        pos = end_quote + 1
+        while pos < len(text) and text[pos] == ' ':
+            pos += 1
+        for c in closers:
+            if text.startswith(c, pos):
+                return pos + len(c), None
+        return None, f"expected '{closers[0]}' after quoted label"
+    label_start = pos
+    while pos < len(text):
+        for c in closers:
+            if text.startswith(c, pos):
+                label = text[label_start:pos]
+                if any(ch in label for ch in '()[]{}'):
+                    return None, f"unquoted brackets in label '{label.strip()}' (wrap the label in double quotes)"
+                return pos + len(c), None
+        if text[pos] in ')]}':
+            return None, f"label '{text[label_start:pos + 1].strip()}' closed with the wrong bracket"
+        if text[pos] in '([{':
+            rest = text[pos:]
+            return None, f"unquoted brackets in label near '{text[label_start:pos]}{rest[:10]}' (wrap the label in double quotes)"
+        pos += 1
+    return None, f"missing '{closers[0]}' to close the node label"
+
+
+def _scan_node(text, pos):
+    """Read one node reference (id, optional shape and class); return (end position, node id, error)."""
+    match = _NODE_ID_RE.match(text, pos)
+    if not match:
+        return None, None, f"expected a node id at '{text[pos:pos + 15]}'"
+    node_id, pos = match.group(), match.end()
+    if text.startswith('@{', pos):
+        end = text.find('}', pos)
+        if end < 0:
+            return None, node_id, "missing '}' to close the node shape"
+        pos = end + 1
+    else:
+        for opener, closer in _SHAPES:
+            if text.startswith(opener, pos):
+                pos, error = _scan_label(text, pos + len(opener), closer)
+                if error:
+                    return None, node_id, error
+                break
+    if text.startswith(':::', pos):
+        match = re.compile(r'[\w-]+').match(text, pos + 3)
+        if not match:
+            return None, node_id, "expected a class name after ':::'"
+        pos = match.end()
+    return pos, node_id, None
+
+
+def _check_flowchart_statement(statement):
+    """Check one node/edge statement (``A[x] --> B & C``)."""
+    pos, expect_node, length = 0, True, len(statement)
+    while True:
+        while pos < length and statement[pos] == ' ':
+            pos += 1
+        if expect_node:
+            pos, node_id, error = _scan_node(statement, pos)
+            if error:
+                return error
+            if node_id == 'end':
+                return "'end' cannot be a node id (it closes a subgraph); use e.g. 'End'"
+            expect_node = False
+            continue
+        if pos >= length:
+            return None
+        if statement[pos] == '&':
+            pos += 1
+            expect_node = True
+            continue
+        match = _LABELLED_LINK_RE.match(statement, pos) or _LINK_RE.match(statement, pos)
+        if not match:
+            return f"unexpected '{statement[pos:pos + 15]}' (expected a link such as '-->')"
+        pos = match.end()
+        while pos < length and statement[pos] == ' ':
+            pos += 1
+        label = _PIPE_LABEL_RE.match(statement, pos)
+        if statement.startswith('|', pos):
+            if not label:
+                return "unterminated '|' link label"
+            pos = label.end()
+        expect_node = True
+
+
+def _check_flowchart(lines, header):
+    errors = []
+    words = header.split()
+    if len(words) > 1 and words[1].rstrip(';') not in FLOWCHART_DIRECTIONS:
+        errors.append((lines[0][0], f"unknown flowchart direction '{words[1]}'"))
+    depth = 0
+    for number, line in lines[1:]:
+        for statement in (s.strip() for s in line.split(';')):
+            if not statement:
+                continue
+            if statement == 'end':
+                depth -= 1
+                if depth < 0:
+                    errors.append((number, "'end' without a matching 'subgraph'"))
+                    depth = 0
+                continue
+            if statement == 'subgraph' or statement.startswith('subgraph '):
+                depth += 1
+                continue
+            if statement.startswith(_FLOWCHART_KEYWORDS):
+                continue
+            error = _check_flowchart_statement(statement)
+            if error:
+                errors.append((number, error))
+    if depth > 0:
+        errors.append((lines[-1][0], f"{depth} 'subgraph' block(s) not closed with 'end'"))
+    return errors
+
+
+def _check_sequence(lines, header):
+    errors = []
+    blocks = []
+    for number, line in lines[1:]:
+        keyword = line.split()[0].lower()
+        if keyword == 'end':
+            if not blocks:
+                errors.append((number, "'end' without an open block"))
+            else:
+                blocks.pop()
+        elif keyword in _SEQUENCE_BLOCKS or keyword == 'box':
+            blocks.append(keyword)
+        elif keyword in _SEQUENCE_BRANCHES:
+            if _SEQUENCE_BRANCHES[keyword] not in blocks:
+                errors.append((number, f"'{keyword}' outside of a '{_SEQUENCE_BRANCHES[keyword]}' block"))
+        elif not (_SEQUENCE_STATEMENT_RE.match(line) or _SEQUENCE_MESSAGE_RE.match(line)):
+            errors.append((number, f"unrecognized statement '{line[:40]}'"))
+    if blocks:
+        errors.append((lines[-1][0], f"'{blocks[-1]}' block not closed with 'end'"))
+    return errors
+
+
+def _check_class(lines, header):
+    errors = []
+    depth = 0
+    in_class_body = False
+    for number, line in lines[1:]:
+        if in_class_body:
+            if line.startswith('}'):
+                in_class_body = False
+                depth -= 1
+            continue
+        if line == '}':
+            depth -= 1
+            if depth < 0:
+                errors.append((number, "unmatched '}'"))
+                depth = 0
+            continue
+        if not (_CLASS_STATEMENT_RE.match(line) or _CLASS_RELATION_RE.match(line)):
+            errors.append((number, f"unrecognized statement '{line[:40]}'"))
+            continue
+        if line.endswith('{'):
+            depth += 1
+            in_class_body = line.startswith('class ')
+    if depth > 0 or in_class_body:
+        errors.append((lines[-1][0], "'{' block not closed with '}'"))
+    return errors
+
+
+def _check_er(lines, header):
+    errors = []
+    in_entity = False
+    for number, line in lines[1:]:
+        if in_entity:
+            if line == '}':
+                in_entity = False
+            elif not _ER_ATTRIBUTE_RE.match(line):
+                errors.append((number, f"invalid attribute '{line[:40]}' (expected 'type name [PK|FK|UK] [\"comment\"]')"))
+            continue
+        relation = _ER_RELATION_RE.match(line)
+        if relation:
+            if not relation.group(6):
+                errors.append((number, "relationship needs a label (': label')"))
+            continue
+        if _ER_WORD_RELATION_RE.match(line):
+            continue
+        if _ER_ENTITY_RE.match(line):
+            in_entity = line.endswith('{')
+            continue
+        if line.startswith(('direction ', 'title ', 'style ', 'classDef ', 'class ', 'accTitle', 'accDescr')):
+            continue
+        errors.append((number, f"unrecognized statement '{line[:40]}'"))
+    if in_entity:
+        errors.append((lines[-1][0], "entity block not closed with '}'"))
+    return errors
+
+
+CHECKERS = {
+    'graph': _check_flowchart,
+    'flowchart': _check_flowchart,
+    'flowchart-elk': _check_flowchart,
+    'sequenceDiagram': _check_sequence,
+    'classDiagram': _check_class,
+    'classDiagram-v2': _check_class,
+    'erDiagram': _check_er,
+}
+
+
+def validate(code):
+    """
+    Check Mermaid code for syntax errors.
+
+    Returns:
+        list: Error messages ("line N: ..."), empty when the code looks valid.
+    """
+    lines = _body_lines(code)
+    if not lines:
+        return ["the diagram is empty"]
+    header = lines[0][1]
+    diagram_type = header.split()[0].rstrip(';')
+    checker = CHECKERS.get(diagram_type)
+    if not checker:
+        if diagram_type in UNCHECKED_TYPES:
+            return []
+        return [f"line {lines[0][0]}: unknown diagram type '{diagram_type}'"]
+    if len(lines) < 2:
+        return [f"line {lines[0][0]}: the {diagram_type} has no content"]
+    return [f"line {number}: {message}" for number, message in checker(lines, header)[:MAX_ERRORS]]
@@ -0,0 +1,150 @@
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+# The worker module is imported by its top-level name (see its docstring);
+# spawned children inherit this sys.path.
+_WORKERS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'workers')
+if _WORKERS_DIR not in sys.path:
+    sys.path.append(_WORKERS_DIR)
+
+import rfp_pdf_worker  # noqa: E402
+
+_logger = logging.getLogger(__name__)
+
+# Documents with fewer pages than this are read inline; the process pool
+# start-up cost is not worth it for short files.
+PARALLEL_MIN_PAGES = 40
+PAGES_PER_CHUNK = 10
+MAX_WORKERS = 4
+# Seconds a single document may spend in text extraction.
+DEFAULT_TIME_BUDGET = 120
+
+
+def _iter_serial(reader, page_count, deadline, start=0):
+    for index in range(start, page_count):
+        if deadline and time.monotonic() > deadline:
+            _logger.warning("PDF extraction time budget exhausted after %d/%d pages", index, page_count)
+            return
+        yield index, rfp_pdf_worker.read_page(reader, index)
+
+
+def _iter_parallel(file_bytes, reader, page_count, deadline, max_workers):
+    """Spread page ranges over a process pool and yield pages in order.
+
+    Workers read the PDF from a temporary file rather than receiving the
+    bytes with every chunk. Each finished chunk is buffered until every
+    earlier chunk has arrived, so consumers see a contiguous prefix as
+    early as possible. A chunk that fails in its worker is read again
+    in-process, within the time budget. Closing the generator (early
+    termination) or running out of budget cancels the chunks that have not
+    started yet.
+    """
+    ranges = [(start, min(start + PAGES_PER_CHUNK, page_count))
+              for start in range(0, page_count, PAGES_PER_CHUNK)]
+    workers = max(1, min(max_workers or MAX_WORKERS, os.cpu_count() or 1, len(ranges)))
+    with tempfile.NamedTemporaryFile(suffix='.pdf') as pdf_file:
+        pdf_file.write(file_bytes)
+        pdf_file.flush()
+        # 'spawn' keeps children clear of locks held by the server's threads.
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        try:
+            yield from _collect_chunks(executor, pdf_file.name, reader, ranges, deadline)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _collect_chunks(executor, path, reader, ranges, deadline):
+    pending = {executor.submit(rfp_pdf_worker.extract_page_range, path, start, stop): (start, stop)
+               for start, stop in ranges}
+    sizes = dict(ranges)
+    done_chunks = {}
+    next_start = 0
+    while pending:
+        timeout = max(0.0, deadline - time.monotonic()) if deadline else None
+        finished, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        if not finished:
+            _logger.warning("PDF extraction time budget exhausted, %d/%d chunks pending",
+                            len(pending), len(ranges))
+            return
+        for future in finished:
+            start, stop = pending.pop(future)
+            try:
+                done_chunks[start] = future.result()
+            except BrokenProcessPool:
+                raise
+            except Exception as e:
+                _logger.warning("PDF pages %d-%d failed in a worker, reading them in-process: %s",
+                                start, stop - 1, e)
+                # Stops at the deadline; a short chunk ends the document
+                done_chunks[start] = list(_iter_serial(reader, stop, deadline, start=start))
+        while next_start in done_chunks:
+            chunk = done_chunks.pop(next_start)
+            yield from chunk
+            if len(chunk) < sizes[next_start] - next_start:
+                return
+            next_start += PAGES_PER_CHUNK
+
+
+def iter_pdf_pages(file_bytes, max_pages=None, time_budget=DEFAULT_TIME_BUDGET, max_workers=None, parallel=True):
+    """Yield ``(page_index, text)`` for a PDF, in page order.
+
+    Args:
+        file_bytes: Raw PDF content.
+        max_pages: Only read the first N pages.
+        time_budget: Seconds allowed for the whole document; extraction
+            stops (keeping what was read so far) once exceeded.
+        max_workers: Cap on worker processes for large documents.
+        parallel: Allow the process pool for documents of
+            ``PARALLEL_MIN_PAGES`` pages or more (on multi-core hosts).
+    """
+    reader = rfp_pdf_worker.open_reader(file_bytes)
+    page_count = len(reader.pages)
+    if max_pages:
+        page_count = min(page_count, max_pages)
+    deadline = time.monotonic() + time_budget if time_budget else None
+
+    # A single worker process would only add its start-up cost
+    if not parallel or page_count < PARALLEL_MIN_PAGES or (os.cpu_count() or 1) < 2:
+        yield from _iter_serial(reader, page_count, deadline)
+        return
+
+    next_index = 0
+    try:
+        for index, text in _iter_parallel(file_bytes, reader, page_count, deadline, max_workers):
+            next_index = index + 1
+            yield index, text
+    except BrokenProcessPool as e:
+        # Worker processes unavailable (resource limits, sandboxing):
+        # finish the remaining pages in-process.
+        _logger.warning("PDF worker pool failed (%s), continuing in-process from page %d", e, next_index)
+        yield from _iter_serial(reader, page_count, deadline, start=next_index)
+
+
+def extract_pdf_text(file_bytes, max_pages=None, max_chars=None, time_budget=DEFAULT_TIME_BUDGET):
+    """Extract plain text from a PDF, stopping early at ``max_pages`` / ``max_chars``.
+
+    Character-capped reads stay in-process: they normally finish within the
+    first few pages, well before a worker pool would have started.
+    """
+    parts = []
+    total = 0
+    pages = iter_pdf_pages(file_bytes, max_pages=max_pages, time_budget=time_budget,
+                           parallel=not max_chars)
+    try:
+        for _index, text in pages:
+            if not text:
+                continue
+            parts.append(text)
+            total += len(text) + 1
+            if max_chars and total >= max_chars:
+                break
+    finally:
+        pages.close()
+    text = '\n'.join(parts)
+    return text[:max_chars] if max_chars else text
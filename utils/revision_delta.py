@@ -0,0 +1,55 @@
+import difflib
+import json
+import re
+import zlib
+
+# A full snapshot is stored at least every SNAPSHOT_INTERVAL revisions, so
+# rebuilding any revision applies at most SNAPSHOT_INTERVAL - 1 deltas.
+SNAPSHOT_INTERVAL = 10
+
+# HTML is split after every tag so that a delta touches only the changed
+# elements, even when the whole section is a single line.
+_TOKEN_RE = re.compile(r"(?<=>)")
+
+
+def tokenize(text):
+    return [token for token in _TOKEN_RE.split(text or '') if token]
+
+
+def compress_text(text):
+    """zlib-compressed UTF-8 of a full snapshot."""
+    return zlib.compress((text or '').encode(), 9)
+
+
+def decompress_text(payload):
+    return zlib.decompress(payload).decode() if payload else ''
+
+
+def make_delta(old, new):
+    """
+    Compressed delta turning ``old`` into ``new``.
+
+    The delta is a list of operations over the tokens of ``old``: an integer
+    pair copies a token range, a string inserts new text.
+    """
+    old_tokens, new_tokens = tokenize(old), tokenize(new)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old_tokens, new_tokens, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append(''.join(new_tokens[j1:j2]))
+    return zlib.compress(json.dumps(ops, separators=(',', ':')).encode(), 9)
+
+
+def apply_delta(old, payload):
+    """Rebuild the new text from ``old`` and a delta made by make_delta."""
+    old_tokens = tokenize(old)
+    parts = []
+    for op in json.loads(zlib.decompress(payload)):
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(old_tokens[op[0]:op[1]])
+    return ''.join(parts)
@@ -1,64 +1,71 @@
+import tempfile
 import zipfile
-import io
-import re
+
+# Already-compressed image formats are stored as-is in the zip: deflating
+# them again costs CPU and saves nothing.
+IMAGE_SIGNATURES = (
+    (b'\x89PNG', 'png'),
+    (b'\xff\xd8', 'jpg'),
+)
+
 
 class SimpleDocxGenerator:
     """
     A lightweight, zero-dependency DOCX generator for Odoo.
     Uses 'altChunk' to embed HTML directly, allowing Word to render complex formatting.
+
+    Parts are written to the zip as they are added, so HTML chunks and
+    images are never all held in memory; only the document body XML (small,
+    since HTML lives in its own parts) and the relationship list are kept.
+    The zip goes to ``fileobj`` or, by default, to a temporary file.
     """
     
-    def __init__(self):
-        self.buffer = io.BytesIO()
-        self.document_xml_body = ""
-        self.rels = []
-        self.html_parts = [] # List of tuples (id, html_content)
-        self.media_parts = [] # List of tuples (id, image_bytes, filename)
+    def __init__(self, fileobj=None):
+        self.file = fileobj if fileobj is not None else tempfile.TemporaryFile()
+        self.zip = zipfile.ZipFile(self.file, 'w', zipfile.ZIP_DEFLATED)
+        self.body_parts = []
+        self.rels = [] # List of tuples (id, type, target)
         self.counter = 0
-        
-        # Initial Relationship for styles is optional but good practice
-        # We will add relationships dynamicall for altChunks
+
+        # Static parts go first
+        self.zip.writestr('[Content_Types].xml', self._get_content_types_xml())
+        self.zip.writestr('_rels/.rels', self._get_global_rels_xml())
+        self.zip.writestr('word/styles.xml', self._get_styles_xml())
         
     def add_heading(self, text, level=1):
         """
         Adds a native Word heading.
         """
-        xml = "<w:p>"
-        xml += f'<w:pPr><w:pStyle w:val="Heading{level}"/></w:pPr>'
-        xml += f'<w:r><w:t>{self._escape_xml(text)}</w:t></w:r>'
-        xml += "</w:p>"
-        self.document_xml_body += xml
+        self.body_parts.append(
+            f'<w:p><w:pPr><w:pStyle w:val="Heading{level}"/></w:pPr>'
+            f'<w:r><w:t>{self._escape_xml(text)}</w:t></w:r></w:p>'
+        )
 
     def add_text(self, text):
         """
-        Adds a native Word paragraph.
+        Adds a native Word paragraph per non-empty line.
         """
         if not text: return
         for line in text.split('\n'):
             if line.strip():
-                xml = "<w:p>"
-                xml += f'<w:r><w:t>{self._escape_xml(text)}</w:t></w:r>'
-                xml += "</w:p>"
-                self.document_xml_body += xml
+                self.body_parts.append(f'<w:p><w:r><w:t>{self._escape_xml(line)}</w:t></w:r></w:p>')
 
     def add_caption(self, text):
         """
         Adds a centered, gray caption.
         """
         if not text: return
-        xml = "<w:p>"
-        # Center alignment
-        xml += '<w:pPr><w:jc w:val="center"/></w:pPr>'
-        # Gray color (e.g., 767676)
-        xml += f'<w:r><w:rPr><w:color w:val="767676"/></w:rPr><w:t>{self._escape_xml(text)}</w:t></w:r>'
-        xml += "</w:p>"
-        self.document_xml_body += xml
+        # Center alignment, gray color (e.g., 767676)
+        self.body_parts.append(
+            '<w:p><w:pPr><w:jc w:val="center"/></w:pPr>'
+            f'<w:r><w:rPr><w:color w:val="767676"/></w:rPr><w:t>{self._escape_xml(text)}</w:t></w:r></w:p>'
+        )
 
     def add_spacer(self):
         """
         Adds an empty paragraph for spacing.
         """
-        self.document_xml_body += "<w:p/>"
+        self.body_parts.append("<w:p/>")
 
     def add_html_chunk(self, html_content):
         """
@@ -71,11 +78,13 @@ class SimpleDocxGenerator:
         self.counter += 1
         r_id = f"rIdHtml{self.counter}"
         
-        # 2. Store the HTML part
-        self.html_parts.append((r_id, html_content))
+        # 2. Write the HTML part, wrapped in a basic structure, with a BOM for Word compatibility
+        full_html = f"<html><head><meta charset='utf-8'/></head><body>{html_content}</body></html>"
+        self.zip.writestr(f"word/html/{r_id}.html", ('\ufeff' + full_html).encode('utf-8'))
+        self.rels.append((r_id, 'aFChunk', f"html/{r_id}.html"))
         
         # 3. Add the altChunk reference in the document body
-        self.document_xml_body += f'<w:altChunk r:id="{r_id}"/>'
+        self.body_parts.append(f'<w:altChunk r:id="{r_id}"/>')
         
     def add_image(self, image_bytes, width=400, height=300):
         """
@@ -88,50 +97,44 @@ class SimpleDocxGenerator:
 
         self.counter += 1
         r_id = f"rIdImg{self.counter}"
-        filename = f"image{self.counter}.png" # Assume PNG for now or detect?
+        extension = next((ext for signature, ext in IMAGE_SIGNATURES if image_bytes.startswith(signature)), 'png')
+        filename = f"image{self.counter}.{extension}"
         
-        self.media_parts.append((r_id, image_bytes, filename))
+        self.zip.writestr(f"word/media/{filename}", image_bytes, compress_type=zipfile.ZIP_STORED)
+        self.rels.append((r_id, 'image', f"media/{filename}"))
         
         # Convert to EMU
         cx = int(width * 9525) 
         cy = int(height * 9525)
 
         # Drawing XML (Inline)
-        xml = '<w:p><w:pPr><w:jc w:val="center"/></w:pPr><w:r><w:drawing>'
-        xml += f'<wp:inline distT="0" distB="0" distL="0" distR="0"><wp:extent cx="{cx}" cy="{cy}"/><wp:effectExtent l="0" t="0" r="0" b="0"/><wp:docPr id="{self.counter}" name="Picture {self.counter}"/><wp:cNvGraphicFramePr><a:graphicFrameLocks xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" noChangeAspect="1"/></wp:cNvGraphicFramePr><a:graphic xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"><a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/picture"><pic:pic xmlns:pic="http://schemas.openxmlformats.org/drawingml/2006/picture"><pic:nvPicPr><pic:cNvPr id="{self.counter}" name="{filename}"/><pic:cNvPicPr/></pic:nvPicPr><pic:blipFill><a:blip r:embed="{r_id}"/><a:stretch><a:fillRect/></a:stretch></pic:blipFill><pic:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm><a:prstGeom prst="rect"><a:avLst/></a:prstGeom></pic:spPr></pic:pic></a:graphicData></a:graphic></wp:inline>'
-        xml += '</w:drawing></w:r></w:p>'
-        
-        self.document_xml_body += xml
+        self.body_parts.append(
+            '<w:p><w:pPr><w:jc w:val="center"/></w:pPr><w:r><w:drawing>'
+            f'<wp:inline distT="0" distB="0" distL="0" distR="0"><wp:extent cx="{cx}" cy="{cy}"/><wp:effectExtent l="0" t="0" r="0" b="0"/><wp:docPr id="{self.counter}" name="Picture {self.counter}"/><wp:cNvGraphicFramePr><a:graphicFrameLocks xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" noChangeAspect="1"/></wp:cNvGraphicFramePr><a:graphic xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"><a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/picture"><pic:pic xmlns:pic="http://schemas.openxmlformats.org/drawingml/2006/picture"><pic:nvPicPr><pic:cNvPr id="{self.counter}" name="{filename}"/><pic:cNvPicPr/></pic:nvPicPr><pic:blipFill><a:blip r:embed="{r_id}"/><a:stretch><a:fillRect/></a:stretch></pic:blipFill><pic:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm><a:prstGeom prst="rect"><a:avLst/></a:prstGeom></pic:spPr></pic:pic></a:graphicData></a:graphic></wp:inline>'
+            '</w:drawing></w:r></w:p>'
+        )
 
     def _escape_xml(self, text):
         return str(text).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
 
+    def close(self):
+        """
+        Write the document body and relationships and finish the zip.
+
+        Returns:
+            file: The output file, rewound to the start.
+        """
+        self.zip.writestr('word/document.xml', self._get_document_xml())
+        self.zip.writestr('word/_rels/document.xml.rels', self._get_document_rels_xml())
+        self.zip.close()
+        self.body_parts = []
+        self.file.seek(0)
+        return self.file
+
     def generate(self):
-        with zipfile.ZipFile(self.buffer, 'a', zipfile.ZIP_DEFLATED) as zf:
-            # 1. [Content_Types].xml
-            zf.writestr('[Content_Types].xml', self._get_content_types_xml())
-            # 2. _rels/.rels
-            zf.writestr('_rels/.rels', self._get_global_rels_xml())
-            # 3. word/document.xml
-            zf.writestr('word/document.xml', self._get_document_xml())
-            # 4. word/_rels/document.xml.rels
-            zf.writestr('word/_rels/document.xml.rels', self._get_document_rels_xml())
-            # 5. word/styles.xml
-            zf.writestr('word/styles.xml', self._get_styles_xml())
-            
-            # 6. Write HTML Parts
-            for r_id, content in self.html_parts:
-                # Wrap HTML in basic structure
-                full_html = f"<html><head><meta charset='utf-8'/></head><body>{content}</body></html>"
-                # Add BOM for Word compatibility
-                zf.writestr(f"word/html/{r_id}.html", ('\ufeff' + full_html).encode('utf-8'))
-                
-            # 7. Write Media Parts
-            for r_id, img_data, filename in self.media_parts:
-                zf.writestr(f"word/media/{filename}", img_data)
-
-        self.buffer.seek(0)
-        return self.buffer.getvalue()
+        """Finish the document and return it as bytes."""
+        with self.close() as f:
+            return f.read()
 
     # --- XML Templates ---
     
@@ -156,26 +159,24 @@ class SimpleDocxGenerator:
 </Relationships>"""
 
     def _get_document_rels_xml(self):
-        xml = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
-        xml += '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\n'
-        xml += '<Relationship Id="rIdStyles" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>\n'
-        
-        # Add Relationships for HTML chunks
-        for r_id, _ in self.html_parts:
-            xml += f'<Relationship Id="{r_id}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/aFChunk" Target="html/{r_id}.html"/>\n'
-            
-        # Add Relationships for Media
-        for r_id, _, filename in self.media_parts:
-            xml += f'<Relationship Id="{r_id}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/image" Target="media/{filename}"/>\n'
-
-        xml += '</Relationships>'
-        return xml
+        # Relationships for HTML chunks (aFChunk) and media (image), in document order
+        parts = [
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\n'
+            '<Relationship Id="rIdStyles" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>\n'
+        ]
+        parts.extend(
+            f'<Relationship Id="{r_id}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/{rel_type}" Target="{target}"/>\n'
+            for r_id, rel_type, target in self.rels
+        )
+        parts.append('</Relationships>')
+        return ''.join(parts)
 
     def _get_document_xml(self):
         return f"""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 <w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing">
 <w:body>
-{self.document_xml_body}
+{''.join(self.body_parts)}
 </w:body>
 </w:document>"""
 
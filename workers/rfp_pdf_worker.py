@@ -0,0 +1,27 @@
+"""PDF page extraction run in the worker processes of utils/pdf_reader.py.
+
+This directory is put on ``sys.path`` and the module imported under its
+own top-level name, so spawned workers can import it without the
+``odoo.addons`` paths the server sets up at start-up, and without loading
+the addon. Keep it free of Odoo and addon imports.
+"""
+import io
+
+
+def open_reader(source):
+    """PdfReader over raw bytes or a file path."""
+    import PyPDF2
+    return PyPDF2.PdfReader(io.BytesIO(source) if isinstance(source, bytes) else source)
+
+
+def read_page(reader, index):
+    try:
+        return reader.pages[index].extract_text() or ''
+    except Exception:
+        return ''
+
+
+def extract_page_range(path, start, stop):
+    """Return [(page_index, text), ...] for pages [start, stop) of the PDF at ``path``."""
+    reader = open_reader(path)
+    return [(index, read_page(reader, index)) for index in range(start, min(stop, len(reader.pages)))]